@@ -0,0 +1,91 @@
+"""
+Gemeinsame Hilfsfunktionen der Benchmarks: Datenbankverbindung, Kennzahlen
+und Ergebnisdateien (JSON) für den Vergleich mit einer Baseline (compare.py).
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def connection_params():
+    """Parameter der lokalen Benchmark-Datenbank (dieselben wie beim Server)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return {
+        "dbname": os.getenv("BENCH_DB_NAME", "BirdApp"),
+        "user": "postgres",
+        "password": os.getenv("DB_PASSWD"),
+        "host": "localhost",
+        "port": "5433",
+    }
+
+
+def connect():
+    """Verbindung zur lokalen Datenbank mit denselben Parametern wie der Server."""
+    import psycopg
+
+    return psycopg.connect(**connection_params())
+
+
+def connect_psycopg2():
+    """
+    Dieselbe Verbindung mit psycopg2 für Funktionen aus updateDb.py
+    (copy_expert, execute_values), siehe updateDb.use_connection.
+    """
+    import psycopg2
+
+    return psycopg2.connect(**connection_params())
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(latencies_ms):
+    """p50/p95/p99/Mittelwert einer Liste von Latenzen in Millisekunden."""
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies_ms), 2) if latencies_ms else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, benchmark, results, args):
+    """
+    Speichert Ergebnisse mit Metadaten (Zeitpunkt, Git-Revision, Parameter),
+    damit spätere Läufe mit compare.py gegen diese Datei verglichen werden können.
+    """
+    document = {
+        "benchmark": benchmark,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "parameters": vars(args),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, default=str)
+    print(f"Ergebnisse gespeichert: {path}")
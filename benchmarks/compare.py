@@ -0,0 +1,78 @@
+"""
+Vergleicht eine Ergebnisdatei der Benchmarks (endpoints.py, ingestion.py)
+mit einer Baseline und meldet Verschlechterungen über --threshold Prozent.
+
+Aufruf aus dem Repository-Root:
+    python benchmarks/compare.py baseline/endpoints.json endpoints.json --threshold 10
+
+Zeiten (*_ms, seconds) und Grössen (*bytes) sind besser, wenn sie kleiner
+werden, Raten (*_per_s, rps) besser, wenn sie grösser werden.
+Exit-Code 1, wenn mindestens eine Kennzahl schlechter als der Schwellwert ist.
+"""
+import argparse
+import json
+import sys
+
+
+def metrics(results, prefix=""):
+    """Flacht verschachtelte Ergebnisse zu {"pfad/kennzahl": Wert} ab."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(metrics(value, path + "/"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def direction(name):
+    """+1: grösser ist besser, -1: kleiner ist besser, None: nicht vergleichen."""
+    key = name.rsplit("/", 1)[-1]
+    if key.endswith("_per_s") or key == "rps":
+        return 1
+    if key.endswith("_ms") or key == "seconds" or key.endswith("bytes"):
+        return -1
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark-Ergebnisse mit einer Baseline vergleichen")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Erlaubte Verschlechterung in Prozent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline.get("benchmark") != current.get("benchmark"):
+        sys.exit(f"Unterschiedliche Benchmarks: {baseline.get('benchmark')} / {current.get('benchmark')}")
+
+    print(f"Baseline {baseline.get('git_revision')} ({baseline.get('created')}) → "
+          f"aktuell {current.get('git_revision')} ({current.get('created')})")
+
+    old, new = metrics(baseline["results"]), metrics(current["results"])
+    regressions = 0
+    for name in sorted(old.keys() & new.keys()):
+        sign = direction(name)
+        if sign is None or not old[name]:
+            continue
+        change = (new[name] - old[name]) / abs(old[name]) * 100
+        worse = -sign * change > args.threshold
+        regressions += worse
+        marker = "SCHLECHTER" if worse else ""
+        print(f"{name:<55} {old[name]:>12} → {new[name]:>12}  {change:+7.1f}%  {marker}")
+
+    for name in sorted(old.keys() - new.keys()):
+        print(f"{name:<55} fehlt im aktuellen Lauf")
+
+    print(f"{regressions} Verschlechterung(en) über {args.threshold}%"
+          if regressions else "Keine Verschlechterungen")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Benchmark der Auswertungs-Endpunkte: /getGeojson/ (GeoJSON, mit Ausschnitt,
+binär), /getObservationsTimeline/, /getLandcover/ und /getHoehenDiagramm.
+
+Pro Endpunkt werden --repeat verschiedene Filter (zufällige Arten und Zeiträume,
+reproduzierbar über --seed) je zweimal abgefragt:
+    first   erste Abfrage eines Filters (Antwort-Cache verfehlt, soweit möglich)
+    repeat  dieselbe Abfrage erneut (aus dem Antwort-Cache)
+Damit "first" auch bei wiederholten Läufen den Cache verfehlt, wird date_to um
+zufällige Sekunden verschoben (ändert das Ergebnis nicht, da nach Tagen gefiltert
+wird). /getLandcover/ hat keinen Zeitraum und ist nur nach einem Neustart des
+Servers ungecacht.
+
+Aufruf aus dem Repository-Root (Server muss laufen, z.B. mit synthetischen Daten
+aus generate_observations.py):
+    python benchmarks/endpoints.py --output endpoints.json
+    python benchmarks/compare.py baseline/endpoints.json endpoints.json
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from common import summarize, write_results
+
+# Kartenausschnitte (WGS84) für die Abfragen mit bbox: Mittelland, Alpen, Genfersee
+BBOXES = [
+    [7.2, 46.8, 7.8, 47.2],
+    [8.2, 46.3, 9.0, 46.8],
+    [6.1, 46.2, 6.9, 46.6],
+]
+
+
+def build_cases(species, args, rng):
+    """
+    Liste von (Endpunkt, Methode, Pfad, Parameter, JSON-Body) mit --repeat
+    Filtern pro Endpunkt.
+    """
+    start = date.fromisoformat(args.date_from)
+    end = date.fromisoformat(args.date_to)
+    cases = []
+    for _ in range(args.repeat):
+        chosen = rng.sample(species, min(args.species_per_request, len(species)))
+        ids = [s["speciesid"] for s in chosen]
+        length = rng.randint(30, max(30, (end - start).days))
+        first_day = start + timedelta(days=rng.randint(0, max(0, (end - start).days - length)))
+        date_from = f"{first_day.isoformat()}T00:00:00"
+        # Zufällige Sekunden → neuer Cache-Schlüssel, gleiches Ergebnis
+        date_to = f"{(first_day + timedelta(days=length)).isoformat()}T00:00:{rng.randint(1, 59):02d}"
+        body = {"speciesids": ids, "familiesIds": [], "date_from": date_from, "date_to": date_to}
+        latin_name = chosen[0]["latinname"]
+
+        cases += [
+            ("getGeojson (grid5)", "POST", "/getGeojson/", None, {**body, "zoom": 7}),
+            ("getGeojson (grid1, bbox)", "POST", "/getGeojson/", None,
+             {**body, "zoom": 10, "bbox": rng.choice(BBOXES)}),
+            ("getGeojson (binary)", "POST", "/getGeojson/", None,
+             {**body, "zoom": 7, "format": "binary"}),
+            ("getObservationsTimeline", "GET", "/getObservationsTimeline/",
+             {"date_from": date_from, "date_to": date_to,
+              "speciesids": ",".join(str(i) for i in ids)}, None),
+            ("getLandcover", "GET", "/getLandcover/", {"latinName": latin_name}, None),
+            ("getHoehenDiagramm", "GET", "/getHoehenDiagramm", {"species": latin_name}, None),
+        ]
+    return cases
+
+
+def measure(client, method, path, params, body):
+    started = time.perf_counter()
+    response = client.request(method, path, params=params, json=body)
+    content = response.content
+    elapsed = (time.perf_counter() - started) * 1000
+    response.raise_for_status()
+    return elapsed, len(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der API-Endpunkte")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--repeat", type=int, default=20, help="Filter pro Endpunkt")
+    parser.add_argument("--species-per-request", type=int, default=3)
+    parser.add_argument("--date-from", default="2024-01-01")
+    parser.add_argument("--date-to", default="2024-12-31")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Ergebnisse als JSON speichern")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with httpx.Client(base_url=args.base_url, timeout=120) as client:
+        species = [s for s in client.get("/getSpecies/").json() if s.get("latinname")]
+        cases = build_cases(species, args, rng)
+
+        measurements = {}
+        for name, method, path, params, body in cases:
+            entry = measurements.setdefault(name, {"first": [], "repeat": [], "bytes": [], "errors": 0})
+            try:
+                for phase in ("first", "repeat"):
+                    elapsed, size = measure(client, method, path, params, body)
+                    entry[phase].append(elapsed)
+                entry["bytes"].append(size)
+            except httpx.HTTPError as e:
+                print(f"Fehler bei {name}: {e}")
+                entry["errors"] += 1
+
+    results = {}
+    for name, entry in measurements.items():
+        results[name] = {
+            "first": summarize(entry["first"]),
+            "repeat": summarize(entry["repeat"]),
+            "mean_bytes": round(sum(entry["bytes"]) / len(entry["bytes"])) if entry["bytes"] else None,
+            "errors": entry["errors"],
+        }
+        print(f"{name:<26} first p50 {results[name]['first']['p50_ms']:>8} ms  "
+              f"p95 {results[name]['first']['p95_ms']:>8} ms  "
+              f"repeat p50 {results[name]['repeat']['p50_ms']:>8} ms  "
+              f"{results[name]['mean_bytes']} bytes")
+
+    if args.output:
+        write_results(args.output, "endpoints", results, args)
+
+
+if __name__ == "__main__":
+    main()
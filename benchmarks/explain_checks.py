@@ -0,0 +1,172 @@
+"""
+Prüft mit EXPLAIN, ob die Abfragemuster der API und von updateDb.py die
+vorgesehenen Indizes und die Monatspartitionen von 'observations' verwenden
+(siehe preprocessing/create_database.sql).
+
+Aufruf aus dem Repository-Root gegen eine lokale PostGIS-Datenbank mit Daten:
+    python benchmarks/explain_checks.py
+
+Standardmässig wird enable_seqscan ausgeschaltet, damit auch kleine
+Testdatenbanken aussagekräftig sind (geprüft wird dann, ob ein Index verwendet
+werden *kann*). Mit --planner-defaults wird der Plan mit den normalen
+Planer-Einstellungen geprüft. Exit-Code 1, wenn eine Prüfung fehlschlägt.
+"""
+import argparse
+import json
+import os
+import sys
+
+from common import ROOT, connect
+
+sys.path.insert(0, os.path.join(ROOT, "server"))
+from app.pyramid import sql_cell  # noqa: E402
+
+
+def plan_nodes(plan):
+    """Alle Knoten eines EXPLAIN-(FORMAT JSON)-Plans, rekursiv."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def parent_indexes(cursor):
+    """Zuordnung Partitionsindex → Index der partitionierten Tabelle."""
+    cursor.execute("""
+        SELECT c.relname, p.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE c.relkind = 'i'
+    """)
+    return dict(cursor.fetchall())
+
+
+def explain(cursor, sql, params):
+    cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def sample_values(cursor):
+    """Eine Art, ein Tag und eine Koordinate aus den vorhandenen Daten."""
+    cursor.execute("""
+        SELECT speciesid, date::date, ST_X(geom), ST_Y(geom)
+        FROM public.observations
+        WHERE geom IS NOT NULL
+        LIMIT 1
+    """)
+    row = cursor.fetchone()
+    if row is None:
+        sys.exit("Tabelle observations ist leer, bitte zuerst Daten importieren.")
+    return {"speciesid": row[0], "day": row[1], "lon": row[2], "lat": row[3]}
+
+
+def build_checks(v):
+    """
+    Liste der Prüfungen: (Name, SQL, Parameter, erwartete Indizes, max. Anzahl
+    gescannter Partitionen von observations oder None).
+    """
+    day = v["day"]
+    envelope = (v["lon"] - 0.05, v["lat"] - 0.05, v["lon"] + 0.05, v["lat"] + 0.05)
+    return [
+        ("Rollup-Neuberechnung (Tagesbereich)",
+         """SELECT speciesid, cell1, cell5, cell_lv95, landcover, FLOOR(elevation / 100), COUNT(*)
+            FROM public.observations
+            WHERE date >= %s AND date < %s::date + 1
+            GROUP BY 1, 2, 3, 4, 5, 6""",
+         (day, day), {"observations_rollup_idx"}, 1),
+        ("Abfrage pro Art (Höhen)",
+         "SELECT elevation FROM public.observations WHERE speciesid = %s",
+         (v["speciesid"],), {"observations_species_date_idx"}, None),
+        ("Räumliche Abfrage (Kartenausschnitt)",
+         "SELECT COUNT(*) FROM public.observations WHERE geom && ST_MakeEnvelope(%s, %s, %s, %s, 4326)",
+         envelope, {"observations_geom_idx"}, None),
+        ("Import-Watermark",
+         "SELECT MAX(date) FROM public.observations",
+         (), {"observations_unique", "observations_rollup_idx"}, None),
+        ("/getObservationsTimeline/",
+         """SELECT SUM(r.count), r.day FROM obs_daily_cells r
+            WHERE r.day BETWEEN %s::timestamp AND %s::timestamp AND r.speciesid IN (%s)
+            GROUP BY r.day""",
+         (day, day, v["speciesid"]), {"obs_daily_cells_species_idx", "obs_daily_cells_day_idx"}, None),
+        ("/getGeojson/ (Familien als speciesids)",
+         """SELECT r.cell5, SUM(r.count) FROM obs_daily_cells r
+            WHERE r.speciesid = ANY(%s) AND r.day BETWEEN %s::timestamp AND %s::timestamp
+            GROUP BY r.cell5""",
+         ([v["speciesid"]], day, day), {"obs_daily_cells_species_idx", "obs_daily_cells_day_idx"}, None),
+        ("/getGeojson/ (LV95-Raster, resolution_km=5)",
+         f"""SELECT {sql_cell(5)} AS cell_id, SUM(r.count) FROM obs_daily_cells r
+            WHERE r.speciesid = ANY(%s) AND r.day BETWEEN %s::timestamp AND %s::timestamp
+              AND {sql_cell(5)} IS NOT NULL
+            GROUP BY 1""",
+         ([v["speciesid"]], day, day), {"obs_daily_cells_species_idx", "obs_daily_cells_day_idx"}, None),
+        ("/getHoehenDiagramm",
+         "SELECT elevation_band, SUM(count) FROM obs_daily_elevation WHERE speciesid = %s GROUP BY 1",
+         (v["speciesid"],), {"obs_daily_elevation_species_day_idx"}, None),
+        ("/getLandcover/",
+         "SELECT landcover, SUM(count) FROM obs_daily_landcover WHERE speciesid = %s GROUP BY 1",
+         (v["speciesid"],), {"obs_daily_landcover_species_day_idx"}, None),
+        ("/getHistograms/ (Höhen)",
+         """SELECT speciesid, FLOOR(elevation_band / %s::numeric)::integer, SUM(count)
+            FROM obs_daily_elevation
+            WHERE speciesid = ANY(%s) AND day BETWEEN %s::timestamp AND %s::timestamp
+            GROUP BY 1, 2""",
+         (1, [v["speciesid"]], day, day), {"obs_daily_elevation_species_day_idx"}, None),
+        ("/getHistograms/ (Landbedeckung)",
+         """SELECT speciesid, landcover, SUM(count)
+            FROM obs_daily_landcover
+            WHERE speciesid = ANY(%s) AND day BETWEEN %s::timestamp AND %s::timestamp
+            GROUP BY 1, 2""",
+         ([v["speciesid"]], day, day), {"obs_daily_landcover_species_day_idx"}, None),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN-Prüfungen der Indizes und Partitionen")
+    parser.add_argument("--planner-defaults", action="store_true",
+                        help="enable_seqscan nicht ausschalten")
+    args = parser.parse_args()
+
+    conn = connect()
+    failures = 0
+    try:
+        with conn.cursor() as cursor:
+            if not args.planner_defaults:
+                cursor.execute("SET enable_seqscan = off")
+            parents = parent_indexes(cursor)
+            values = sample_values(cursor)
+
+            for name, sql, params, expected, max_partitions in build_checks(values):
+                plan = explain(cursor, sql, params)
+                nodes = list(plan_nodes(plan))
+                used = {parents.get(n["Index Name"], n["Index Name"])
+                        for n in nodes if "Index Name" in n}
+                scanned = {n["Relation Name"] for n in nodes
+                           if n.get("Relation Name", "").startswith("observations")}
+                seq_scans = sorted(n["Relation Name"] for n in nodes
+                                   if n["Node Type"] == "Seq Scan")
+
+                problems = []
+                if not used & expected:
+                    problems.append(f"erwartet {sorted(expected)}, verwendet {sorted(used) or '-'}")
+                if max_partitions is not None and len(scanned) > max_partitions:
+                    problems.append(f"{len(scanned)} Partitionen gescannt: {sorted(scanned)}")
+                if seq_scans:
+                    problems.append(f"Seq Scan auf {seq_scans}")
+
+                if problems:
+                    failures += 1
+                    print(f"FAIL  {name}: " + "; ".join(problems))
+                else:
+                    print(f"ok    {name}: {', '.join(sorted(used))}")
+    finally:
+        conn.close()
+
+    print(f"{failures} Prüfung(en) fehlgeschlagen" if failures else "Alle Prüfungen bestanden")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
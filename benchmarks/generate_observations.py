@@ -0,0 +1,177 @@
+"""
+Erzeugt synthetische Beobachtungen für Benchmarks und lädt sie in eine lokale
+PostGIS-Datenbank (gleiche Verbindung wie der Server, Name über BENCH_DB_NAME).
+
+Die Punkte liegen zufällig in den Zellen des 5-km-Rasters, die Arten stammen
+aus der Tabelle 'species' (häufige und seltene Arten, Zipf-Verteilung), die
+Höhen liegen zwischen 200 und 3000 m. Mit gleichem --seed entstehen dieselben
+Daten. Danach werden die Tagesaggregate der betroffenen Tage neu berechnet.
+
+Aufruf aus dem Repository-Root (Tabellen aus create_database.sql und Arten
+müssen vorhanden sein):
+    python benchmarks/generate_observations.py --count 1000000 --start 2024-01-01 --days 365
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from common import ROOT, connect
+
+sys.path.insert(0, os.path.join(ROOT, "preprocessing"))
+
+GRID_PATH = os.path.join(ROOT, "server", "data", "km_Grid_5_wgs84.gpkg")
+LANDCOVER_PATH = "zip://" + os.path.join(ROOT, "preprocessing", "data", "LandCoverage.zip")
+
+
+def load_cells(path=GRID_PATH):
+    """Geometrien der Rasterzellen (WGS84)."""
+    import geopandas as gpd
+
+    return gpd.read_file(path).to_crs(epsg=4326).geometry.values
+
+
+def synthetic_rows(species_ids, count, start, days, cells, seed):
+    """
+    Erzeugt count Beobachtungen als Tupel (isozeit, speciesid, lon, lat, alt),
+    wie sie insert_observation / insert_observations_batch erwarten.
+
+    Args:
+        species_ids (Sequence[int]): Art-IDs aus der Datenbank
+        count (int): Anzahl Beobachtungen
+        start (date): erster Tag
+        days (int): Anzahl Tage ab start
+        cells (GeometryArray): Rasterzellen, in denen die Punkte liegen
+        seed (int): Startwert des Zufallsgenerators
+    """
+    import shapely
+
+    rng = np.random.default_rng(seed)
+
+    # Wenige häufige und viele seltene Arten
+    species = np.array(sorted(species_ids))
+    rng.shuffle(species)
+    weights = 1.0 / np.arange(1, len(species) + 1) ** 1.1
+    speciesid = rng.choice(species, size=count, p=weights / weights.sum())
+
+    # Zufällige Zelle, darin ein zufälliger Punkt (Punkte ausserhalb der Zelle verwerfen)
+    bounds = shapely.bounds(cells)
+    lons = np.empty(count)
+    lats = np.empty(count)
+    filled = 0
+    while filled < count:
+        n = int((count - filled) * 1.2) + 16
+        index = rng.integers(0, len(cells), n)
+        lon = rng.uniform(bounds[index, 0], bounds[index, 2])
+        lat = rng.uniform(bounds[index, 1], bounds[index, 3])
+        inside = shapely.contains_xy(cells[index], lon, lat)
+        take = min(count - filled, int(inside.sum()))
+        lons[filled:filled + take] = lon[inside][:take]
+        lats[filled:filled + take] = lat[inside][:take]
+        filled += take
+
+    alts = rng.uniform(200, 3000, count).round(1)
+    seconds = rng.integers(0, days * 86400, count)
+    origin = datetime.combine(start, datetime.min.time())
+    return [
+        ((origin + timedelta(seconds=int(s))).isoformat(), int(sid), float(lon), float(lat), float(alt))
+        for s, sid, lon, lat, alt in zip(seconds, speciesid, lons, lats, alts)
+    ]
+
+
+def load_rows(conn, rows, landcover_values):
+    """
+    Lädt Zeilen per COPY über eine Staging-Tabelle in 'observations'.
+
+    Returns:
+        tuple: (Tage mit neuen Beobachtungen, Anzahl eingefügt)
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS bench_staging (
+                date timestamp, speciesid integer,
+                lon double precision, lat double precision, alt double precision,
+                landcover text
+            ) ON COMMIT DELETE ROWS
+        """)
+        with cur.copy("COPY bench_staging FROM STDIN") as copy:
+            for row, landcover in zip(rows, landcover_values):
+                copy.write_row((*row, landcover))
+        cur.execute("""
+            INSERT INTO public.observations (date, speciesid, geom, landcover)
+            SELECT date, speciesid, ST_SetSRID(ST_MakePoint(lon, lat, alt), 4326), landcover
+            FROM bench_staging
+            ON CONFLICT DO NOTHING
+            RETURNING date::date
+        """)
+        returned = cur.fetchall()
+    conn.commit()
+    return {row[0] for row in returned}, len(returned)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetische Beobachtungen erzeugen und laden")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--no-landcover", action="store_true",
+                        help="Landbedeckung nicht bestimmen (schneller)")
+    args = parser.parse_args()
+
+    conn = connect()
+    with conn.cursor() as cur:
+        cur.execute("SELECT speciesid FROM public.species")
+        species_ids = [row[0] for row in cur.fetchall()]
+    if not species_ids:
+        sys.exit("Tabelle species ist leer, bitte zuerst get_species() aus updateDb.py ausführen.")
+
+    started = time.perf_counter()
+    rows = synthetic_rows(species_ids, args.count, args.start, args.days, load_cells(), args.seed)
+    print(f"{len(rows)} Beobachtungen erzeugt in {time.perf_counter() - started:.1f}s")
+
+    landcover_gdf = None
+    if not args.no_landcover:
+        from landcover import get_landcover_values, load_landcover
+        landcover_gdf = load_landcover(LANDCOVER_PATH)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT public.ensure_observation_partitions(%s, %s)",
+            (args.start, args.start + timedelta(days=args.days)),
+        )
+    conn.commit()
+
+    started = time.perf_counter()
+    touched_days = set()
+    inserted = 0
+    for offset in range(0, len(rows), args.batch_size):
+        batch = rows[offset:offset + args.batch_size]
+        if landcover_gdf is not None:
+            landcover_values = get_landcover_values(
+                landcover_gdf, [row[2] for row in batch], [row[3] for row in batch])
+        else:
+            landcover_values = [None] * len(batch)
+        days, count = load_rows(conn, batch, landcover_values)
+        touched_days |= days
+        inserted += count
+        print(f"{offset + len(batch)}/{len(rows)} geladen")
+    seconds = time.perf_counter() - started
+    print(f"{inserted} eingefügt in {seconds:.1f}s ({inserted / seconds:.0f} rows/s)")
+
+    # Tagesaggregate und Cache-Generation wie nach einem Import aktualisieren
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute("SELECT public.refresh_daily_rollups(%s::date[])", (sorted(touched_days),))
+        cur.execute("UPDATE public.cache_generation SET generation = generation + 1 WHERE id = 1")
+    conn.commit()
+    print(f"Tagesaggregate für {len(touched_days)} Tage in {time.perf_counter() - started:.1f}s")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: Zählung pro Zelle aus dem Snapshot im eigenen Prozess gegen die
+blockweise, parallele Zählung in Prozessen (Snapshot.grid_counts, SNAPSHOT_WORKERS).
+
+Aufruf aus dem Repository-Root:
+    python benchmarks/grid_counts.py --rows 20000000 --workers 8
+
+Der Snapshot wird synthetisch in einem temporären Ordner erzeugt; gezählt
+werden grid1, grid5 und eine Stufe des LV95-Rasters in einem Aufruf.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "server"))
+
+from app import snapshot  # noqa: E402
+from app.snapshot import ALL_DAYS, COLUMNS, Snapshot  # noqa: E402
+
+
+def write_snapshot(directory, rows, species, seed):
+    """Zufälliger Snapshot mit rows Zeilen, sortiert nach (speciesid, day)."""
+    rng = np.random.default_rng(seed)
+    speciesid = np.sort(rng.integers(1, species + 1, rows)).astype(np.int32)
+    values = {
+        "day": rng.integers(17000, 20000, rows).astype(np.int32),
+        "speciesid": speciesid,
+        "lon": rng.uniform(6, 10, rows).astype(np.float32),
+        "lat": rng.uniform(46, 48, rows).astype(np.float32),
+        "elevation": rng.uniform(200, 3000, rows),
+        "landcover": rng.integers(0, 10, rows).astype(np.uint8),
+        "cell1": rng.integers(-1, 45000, rows).astype(np.int32),
+        "cell5": rng.integers(-1, 1800, rows).astype(np.int32),
+        "cell_lv95": rng.integers(-1, 100_000, rows).astype(np.int32),
+    }
+    # Tage innerhalb jeder Art sortieren
+    order = np.lexsort((values["day"], speciesid))
+    for column in COLUMNS:
+        np.save(os.path.join(directory, f"{column}.npy"), values[column][order])
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({"generation": 0, "rows": rows, "landcover": [str(i) for i in range(10)]}, f)
+
+
+def measure(snap, species_ids, grids, executor, repeat):
+    snapshot._executor = executor
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = snap.grid_counts(species_ids, *ALL_DAYS, grids)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--species", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    grids = [("cell1", None, None), ("cell5", None, None), ("cell_lv95", None, 5)]
+    species_ids = list(range(1, args.species + 1))
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_snapshot(directory, args.rows, args.species, args.seed)
+        snap = Snapshot(directory)
+
+        single_seconds, single = measure(snap, species_ids, grids, None, args.repeat)
+        with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            # Prozesse starten und Spalten mappen, bevor gemessen wird
+            measure(snap, species_ids, grids, executor, 1)
+            parallel_seconds, parallel = measure(snap, species_ids, grids, executor, args.repeat)
+        snapshot._executor = None
+
+    print(f"1 process:   {args.rows} rows, {len(grids)} grids in {single_seconds:.3f}s")
+    print(f"{args.workers} processes: {args.rows} rows, {len(grids)} grids in {parallel_seconds:.3f}s "
+          f"(blocks of {snapshot.SNAPSHOT_BLOCK_ROWS} rows, {os.cpu_count()} CPUs)")
+    print(f"Speedup: {single_seconds / parallel_seconds:.1f}x, "
+          f"identical: {single == parallel}")
+    return 0 if single == parallel else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
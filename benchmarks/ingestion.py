@@ -0,0 +1,120 @@
+"""
+Benchmark des Imports: insert_observation (einzeln), insert_observations_batch
+(COPY) aus updateDb.py sowie get_landcover_value / get_landcover_values.
+
+Verwendet die lokale Benchmark-Datenbank (common.connection_params), nicht
+die Standardverbindung von updateDb.py. Die synthetischen
+Beobachtungen werden auf einen eigenen Tag (--day, standardmässig weit vor
+allen echten Daten) geschrieben und am Ende wieder gelöscht; die
+Tagesaggregate bleiben unverändert.
+
+Aufruf aus dem Repository-Root:
+    python benchmarks/ingestion.py --rows 20000 --output ingestion.json
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from common import ROOT, connect_psycopg2, write_results
+from generate_observations import load_cells, synthetic_rows
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des Imports")
+    parser.add_argument("--rows", type=int, default=20_000,
+                        help="Beobachtungen für insert_observations_batch")
+    parser.add_argument("--single-rows", type=int, default=500,
+                        help="Beobachtungen für insert_observation (einzeln)")
+    parser.add_argument("--landcover-sample", type=int, default=500,
+                        help="Punkte für get_landcover_value (linearer Scan)")
+    parser.add_argument("--day", type=date.fromisoformat, default=date(1999, 1, 1))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Ergebnisse als JSON speichern")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+
+    # updateDb.py lädt seine Daten relativ zum Ordner preprocessing
+    os.chdir(os.path.join(ROOT, "preprocessing"))
+    sys.path.insert(0, os.getcwd())
+    import updateDb
+    from landcover import get_landcover_value, get_landcover_values
+
+    updateDb.use_connection(connect_psycopg2())
+    landcover_gdf = updateDb.get_landcover_gdf()
+
+    # Ohne INFO-Log pro Beobachtung, damit die Ausgabe nicht mitgemessen wird
+    logging.getLogger().setLevel(logging.WARNING)
+
+    day_start = args.day.isoformat()
+    day_end = (args.day + timedelta(days=1)).isoformat()
+    updateDb.cur.execute(
+        "SELECT COUNT(*) FROM public.observations WHERE date >= %s AND date < %s",
+        (day_start, day_end))
+    if updateDb.cur.fetchone()[0]:
+        sys.exit(f"Am {day_start} gibt es bereits Beobachtungen, bitte mit --day einen freien Tag wählen.")
+
+    species_ids = updateDb.load_species_ids()
+    if not species_ids:
+        sys.exit("Tabelle species ist leer, bitte zuerst get_species() aus updateDb.py ausführen.")
+    rows = synthetic_rows(
+        species_ids, args.single_rows + args.rows, args.day, 1, load_cells(), args.seed)
+    single_rows, batch_rows = rows[:args.single_rows], rows[args.single_rows:]
+    results = {}
+
+    try:
+        day = datetime.combine(args.day, datetime.min.time())
+        updateDb.ensure_partitions(day, day)
+
+        started = time.perf_counter()
+        for isozeit, speciesid, lon, lat, alt in single_rows:
+            updateDb.insert_observation(isozeit, speciesid, lon, lat, alt)
+        seconds = time.perf_counter() - started
+        results["insert_observation"] = {
+            "rows": len(single_rows), "seconds": round(seconds, 3),
+            "rows_per_s": rate(len(single_rows), seconds)}
+
+        started = time.perf_counter()
+        updateDb.insert_observations_batch(batch_rows, species_ids)
+        seconds = time.perf_counter() - started
+        results["insert_observations_batch"] = {
+            "rows": len(batch_rows), "seconds": round(seconds, 3),
+            "rows_per_s": rate(len(batch_rows), seconds)}
+    finally:
+        updateDb.cur.execute(
+            "DELETE FROM public.observations WHERE date >= %s AND date < %s",
+            (day_start, day_end))
+        updateDb.conn.commit()
+
+    lons = [row[2] for row in rows]
+    lats = [row[3] for row in rows]
+    sample = min(args.landcover_sample, len(rows))
+    started = time.perf_counter()
+    for lon, lat in zip(lons[:sample], lats[:sample]):
+        get_landcover_value(landcover_gdf, lon, lat)
+    seconds = time.perf_counter() - started
+    results["get_landcover_value"] = {
+        "points": sample, "seconds": round(seconds, 3), "points_per_s": rate(sample, seconds)}
+
+    started = time.perf_counter()
+    get_landcover_values(landcover_gdf, lons, lats)
+    seconds = time.perf_counter() - started
+    results["get_landcover_values"] = {
+        "points": len(lons), "seconds": round(seconds, 3), "points_per_s": rate(len(lons), seconds)}
+
+    for name, result in results.items():
+        per_s = result.get("rows_per_s") or result.get("points_per_s")
+        print(f"{name:<28} {per_s:>12} /s  ({result['seconds']}s)")
+
+    if output:
+        write_results(output, "ingestion", results, args)
+
+
+if __name__ == "__main__":
+    main()
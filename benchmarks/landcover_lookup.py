@@ -0,0 +1,83 @@
+"""
+Benchmark: Landbedeckung pro Punkt (get_landcover_value) gegen die
+Index-Abfrage für ganze Abschnitte (get_landcover_values).
+
+Aufruf aus dem Repository-Root:
+    python benchmarks/landcover_lookup.py --points 100000
+
+Die Einzelabfrage ist ein linearer Scan über alle Polygone und wird deshalb
+standardmässig nur auf einer Stichprobe gemessen und hochgerechnet
+(--per-point-sample 100000 misst alle Punkte).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "preprocessing"))
+
+from landcover import load_landcover, get_landcover_value, get_landcover_values  # noqa: E402
+
+
+def random_points(landcover_gdf, n, seed):
+    """Zufällige Punkte innerhalb der Ausdehnung der Landbedeckungsdaten."""
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = landcover_gdf.total_bounds
+    return rng.uniform(minx, maxx, n), rng.uniform(miny, maxy, n)
+
+
+def same_value(a, b):
+    """Vergleich inkl. None/NaN."""
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, float) and isinstance(b, float) and np.isnan(a) and np.isnan(b):
+        return True
+    return a == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--landcover",
+        default="zip://" + os.path.join(ROOT, "preprocessing", "data", "LandCoverage.zip"))
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--per-point-sample", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    landcover_gdf = load_landcover(args.landcover)
+    print(f"Loaded {len(landcover_gdf)} polygons incl. sindex in "
+          f"{time.perf_counter() - started:.2f}s")
+
+    lons, lats = random_points(landcover_gdf, args.points, args.seed)
+
+    started = time.perf_counter()
+    batch_values = get_landcover_values(landcover_gdf, lons, lats)
+    batch_seconds = time.perf_counter() - started
+
+    sample = min(args.per_point_sample, args.points)
+    started = time.perf_counter()
+    single_values = [
+        get_landcover_value(landcover_gdf, lons[i], lats[i]) for i in range(sample)
+    ]
+    single_seconds = time.perf_counter() - started
+    single_total = single_seconds * args.points / max(sample, 1)
+
+    mismatches = sum(
+        not same_value(a, b) for a, b in zip(single_values, batch_values[:sample]))
+
+    print(f"get_landcover_values: {args.points} points in {batch_seconds:.3f}s "
+          f"({args.points / batch_seconds:.0f} points/s)")
+    print(f"get_landcover_value:  {sample} points in {single_seconds:.3f}s, "
+          f"~{single_total:.1f}s for {args.points} points")
+    print(f"Speedup: ~{single_total / batch_seconds:.0f}x, "
+          f"mismatches in sample: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
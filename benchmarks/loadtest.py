@@ -0,0 +1,106 @@
+"""
+Lasttest für die API: misst Latenzen (p50/p95/p99) und Durchsatz bei
+steigender Anzahl gleichzeitiger Clients.
+
+Aufruf aus dem Repository-Root (Server muss laufen):
+    python benchmarks/loadtest.py --base-url http://localhost:8000 --clients 50 100 200
+
+Für einen Vorher/Nachher-Vergleich den Test gegen beide Server-Versionen
+laufen lassen und die Ergebnisse mit --output als JSON speichern.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+import httpx
+
+from common import percentile
+
+
+def build_requests(args):
+    """Liste der (Methode, Pfad, Parameter, JSON-Body) für einen Durchlauf."""
+    species = ",".join(str(s) for s in args.species)
+    return [
+        ("GET", "/getSpecies/", None, None),
+        ("GET", "/getFamilies/", None, None),
+        ("GET", "/getObservationsTimeline/",
+         {"date_from": args.date_from, "date_to": args.date_to, "speciesids": species}, None),
+        ("POST", "/getGeojson/", None,
+         {"speciesids": args.species, "familiesIds": [],
+          "date_from": args.date_from, "date_to": args.date_to}),
+        ("GET", "/getLandcover/", {"latinName": args.latin_name}, None),
+        ("GET", "/getHoehenDiagramm", {"species": args.latin_name}, None),
+        ("GET", "/getImage/", {"species": args.latin_name}, None),
+        ("GET", "/getText/", {"species": args.latin_name}, None),
+    ]
+
+
+async def run_level(client, requests, clients, total):
+    """Schickt total Requests mit clients gleichzeitigen Verbindungen."""
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, path, params, body = requests[i % len(requests)]
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, params=params, json=body)
+                response.raise_for_status()
+                await response.aread()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    seconds = time.perf_counter() - started
+    return {
+        "clients": clients,
+        "requests": total,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mean_ms": round(statistics.fmean(latencies), 1) if latencies else None,
+    }
+
+
+async def main(args):
+    requests = build_requests(args)
+    limits = httpx.Limits(max_connections=max(args.clients), max_keepalive_connections=max(args.clients))
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        # Aufwärmen (Caches, Verbindungspool)
+        await run_level(client, requests, 4, len(requests) * 2)
+        results = []
+        for clients in args.clients:
+            result = await run_level(client, requests, clients, args.requests_per_level)
+            results.append(result)
+            print(f"{clients:>4} clients: {result['rps']:>7} req/s  p50 {result['p50_ms']:>7} ms  "
+                  f"p95 {result['p95_ms']:>7} ms  p99 {result['p99_ms']:>7} ms  errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"base_url": args.base_url, "label": args.label, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lasttest für die Vogelradar-API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--requests-per-level", type=int, default=2000)
+    parser.add_argument("--species", type=int, nargs="+", default=[8, 12])
+    parser.add_argument("--latin-name", default="Parus major")
+    parser.add_argument("--date-from", default="2024-06-01T00:00:00")
+    parser.add_argument("--date-to", default="2025-05-31T00:00:00")
+    parser.add_argument("--label", default="", help="Bezeichnung der Server-Version im JSON")
+    parser.add_argument("--output", help="Ergebnisse als JSON speichern")
+    sys.exit(asyncio.run(main(parser.parse_args())))
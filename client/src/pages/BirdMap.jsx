@@ -6,16 +6,74 @@ import { Tile as TileLayer, Vector as VectorLayer } from "ol/layer";
 import { XYZ, Vector as VectorSource } from "ol/source";
 import { Fill, Style, Stroke } from "ol/style";
 import { GeoJSON } from "ol/format";
+import Feature from "ol/Feature";
 import chroma from "chroma-js";
 import { CircularProgress, Typography } from "@mui/material";
 import { ScaleLine } from "ol/control";
+import { transformExtent } from "ol/proj";
+
+const API_URL = "http://localhost:8000";
+// Grid-Kennung im Binärformat → Grid (GRID_CODES in server/app/grids.py)
+const GRID_NAMES = {
+  1: "grid1",
+  5: "grid5",
+  1001: "lv95_1",
+  1002: "lv95_2",
+  1005: "lv95_5",
+  1010: "lv95_10",
+  1025: "lv95_25",
+};
+
+// Geometrie eines Grids einmal laden (statische Datei, vom Browser gecacht); Features nach cell_id
+const gridGeometryCache = {};
+const loadGridGeometry = (gridName) => {
+  if (!gridGeometryCache[gridName]) {
+    gridGeometryCache[gridName] = fetch(`${API_URL}/grids/${gridName}.geojson`)
+      .then((res) => res.json())
+      .then((data) => {
+        const byId = {};
+        new GeoJSON()
+          .readFeatures(data, { dataProjection: "EPSG:4326", featureProjection: "EPSG:3857" })
+          .forEach((feature) => {
+            byId[feature.getId()] = feature.getGeometry();
+          });
+        return byId;
+      })
+      .catch((err) => {
+        delete gridGeometryCache[gridName]; // Beim nächsten Mal erneut versuchen
+        throw err;
+      });
+  }
+  return gridGeometryCache[gridName];
+};
+
+// Binärantwort von /getGeojson/ (format "binary") lesen: uint32 little-endian,
+// Anzahl Abschnitte, dann pro Abschnitt Grid-Kennung, n, n Zell-IDs, n Zählungen
+const parseCounts = (buffer) => {
+  const values = new Uint32Array(buffer);
+  const sections = [];
+  let offset = 1;
+  for (let i = 0; i < values[0]; i++) {
+    const n = values[offset + 1];
+    sections.push({
+      gridName: GRID_NAMES[values[offset]],
+      cellIds: values.subarray(offset + 2, offset + 2 + n),
+      counts: values.subarray(offset + 2 + n, offset + 2 + 2 * n),
+    });
+    offset += 2 + 2 * n;
+  }
+  return sections;
+};
+
+// Wartezeit nach dem letzten Verschieben/Zoomen, bevor das Raster neu geladen wird (ms)
+const MOVE_DEBOUNCE_MS = 200;
 
 // BirdMap-Komponente zeigt eine interaktive Karte mit Rasterdaten für Vogelsichtungen
 const BirdMap = ({ birdIds, familiesIds, range }) => {
   const mapRef = useRef(null); // Referenz auf das div-Element für die Karte
   const olMapRef = useRef(null); // Referenz auf die OpenLayers-Map-Instanz
-  const grid1LayerRef = useRef(null); // Layer für das feinere 1-km-Raster
-  const grid5LayerRef = useRef(null); // Layer für das gröbere 5-km-Raster
+  const gridLayerRef = useRef(null); // Layer für das vom Server gewählte Raster (1 km oder 5 km)
+  const [viewState, setViewState] = useState(null); // Sichtbarer Ausschnitt (WGS84) und Zoomstufe
   const [loading, setLoading] = useState(false); // Ladeanzeige
   const [legendData, setLegendData] = useState(null); // Daten für die Legende
   const [hoverCount, setHoverCount] = useState(null); // Wert für Hover-Anzeige
@@ -92,41 +150,37 @@ const BirdMap = ({ birdIds, familiesIds, range }) => {
       }
     });
 
-    // Zoom-Stufenabhängigkeit: 1km- oder 5km-Raster anzeigen
+    // Ausschnitt und Zoomstufe merken: der Server wählt damit das Raster (1 km ab Zoom 9)
+    // und liefert nur die sichtbaren Zellen. Erst MOVE_DEBOUNCE_MS nach dem letzten
+    // moveend, damit schnelles Verschieben/Zoomen nur einen Request auslöst
+    let moveTimer = null;
     map.on("moveend", () => {
-      const zoom = map.getView().getZoom();
-      if (grid1LayerRef.current && grid5LayerRef.current) {
-        grid1LayerRef.current.setVisible(zoom >= 9);
-        grid5LayerRef.current.setVisible(zoom < 9);
-      }
+      clearTimeout(moveTimer);
+      moveTimer = setTimeout(() => {
+        const bbox = transformExtent(view.calculateExtent(map.getSize()), "EPSG:3857", "EPSG:4326");
+        setViewState({ bbox, zoom: view.getZoom() });
+      }, MOVE_DEBOUNCE_MS);
     });
 
     olMapRef.current = map;
 
     return () => {
+      clearTimeout(moveTimer);
       map.setTarget(null); // Karte bei Unmount entfernen
     };
   }, []);
 
-  // Datenabruf bei Änderung der Filterparameter
+  // Datenabruf bei Änderung der Filterparameter oder des Kartenausschnitts
   useEffect(() => {
-    if (!olMapRef.current) return;
+    if (!olMapRef.current || !viewState) return;
     const map = olMapRef.current;
-
-    // Alte Layer entfernen
-    if (grid1LayerRef.current) {
-      map.removeLayer(grid1LayerRef.current);
-      grid1LayerRef.current = null;
-    }
-    if (grid5LayerRef.current) {
-      map.removeLayer(grid5LayerRef.current);
-      grid5LayerRef.current = null;
-    }
+    const controller = new AbortController(); // Veralteten Request bei neuer Ansicht abbrechen
 
     setLoading(true);
 
-    // API-Request mit Filterparametern
-    fetch("http://localhost:8000/getGeojson/", {
+    // API-Request mit Filterparametern, Ausschnitt und Zoomstufe; der Server liefert
+    // nur Zell-IDs und Zählungen, die Geometrie kommt aus der statischen Grid-Datei
+    fetch(`${API_URL}/getGeojson/`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({
@@ -134,39 +188,46 @@ const BirdMap = ({ birdIds, familiesIds, range }) => {
         familiesIds: familiesIds,
         date_from: range[0].toISOString(),
         date_to: range[1].toISOString(),
+        bbox: viewState.bbox,
+        zoom: viewState.zoom,
+        format: "binary",
       }),
+      signal: controller.signal,
     })
-      .then((res) => res.json())
-      .then((data) => {
-        if (data && data.grid1.length > 0 && data.grid5.length > 0) {
-          const format = new GeoJSON();
+      .then((res) => res.arrayBuffer())
+      .then((buffer) => {
+        // Der Server liefert nur das Raster zur aktuellen Zoomstufe
+        const [section] = parseCounts(buffer);
+        return loadGridGeometry(section.gridName).then((geometries) => ({ section, geometries }));
+      })
+      .then(({ section, geometries }) => {
+        if (controller.signal.aborted) return;
 
-          // Features extrahieren und Zählwerte sammeln
-          const processFeatures = (geojsonData) => {
-            const features = format.readFeatures(geojsonData, {
-              dataProjection: "EPSG:4326",
-              featureProjection: "EPSG:3857",
-            });
-            const counts = features.map((f) => f.get("count") || 0);
-            return { features, counts };
-          };
+        // Alten Layer entfernen
+        if (gridLayerRef.current) {
+          map.removeLayer(gridLayerRef.current);
+          gridLayerRef.current = null;
+        }
 
-          const grid1 = processFeatures(data.grid1);
-          const grid5 = processFeatures(data.grid5);
+        const features = Array.from(section.cellIds, (cellId, i) => {
+          const feature = new Feature({ geometry: geometries[cellId], count: section.counts[i] });
+          feature.setId(cellId);
+          return feature;
+        });
 
+        if (features.length > 0) {
           // Wertebereich berechnen
-          const allCounts = [...grid1.counts, ...grid5.counts];
-          const min = Math.min(...allCounts);
-          const max = Math.max(...allCounts);
+          const counts = features.map((f) => f.get("count") || 0);
+          const min = Math.min(...counts);
+          const max = Math.max(...counts);
 
           // Farbskala mit Log-Skalierung definieren
           const scale = chroma.scale("greens").domain([Math.log10(min || 0), Math.log10(max || 0)]);
 
           // Funktion zur Layer-Erzeugung
-          const createLayer = (features, visible) => {
+          const createLayer = (features) => {
             return new VectorLayer({
               source: new VectorSource({ features }),
-              visible,
               style: (feature) => {
                 const count = feature.get("count") || 0;
                 return new Style({
@@ -184,15 +245,9 @@ const BirdMap = ({ birdIds, familiesIds, range }) => {
             });
           };
 
-          // Zoom prüfen und Layer sichtbar setzen
-          const zoom = map.getView().getZoom();
-          const layer1 = createLayer(grid1.features, zoom >= 9);
-          const layer5 = createLayer(grid5.features, zoom < 9);
-
-          map.addLayer(layer1);
-          map.addLayer(layer5);
-          grid1LayerRef.current = layer1;
-          grid5LayerRef.current = layer5;
+          const layer = createLayer(features);
+          map.addLayer(layer);
+          gridLayerRef.current = layer;
 
           setLegendData({
             scale,
@@ -208,12 +263,18 @@ const BirdMap = ({ birdIds, familiesIds, range }) => {
         }
       })
       .catch((err) => {
-        console.error("Fehler beim Laden des Grids:", err);
+        if (err.name !== "AbortError") {
+          console.error("Fehler beim Laden des Grids:", err);
+        }
       })
       .finally(() => {
-        setLoading(false);
-      }); 
-  }, [birdIds, familiesIds, range]);
+        if (!controller.signal.aborted) {
+          setLoading(false);
+        }
+      });
+
+    return () => controller.abort();
+  }, [birdIds, familiesIds, range, viewState]);
 
   // Legende zur Darstellung der Farbskala
   const createLegend = () => {
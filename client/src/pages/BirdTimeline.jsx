@@ -34,7 +34,7 @@ export default function VogelZeitstrahl({ birdIds, range, setRange, startDate, e
 
     const url = `http://localhost:8000/getObservationsTimeline/?speciesids=${birdIds.join(
       ","
-    )}&date_from=${startDate.toISOString()}&date_to=${endDate.toISOString()}`;
+    )}&date_from=${startDate.toISOString()}&date_to=${endDate.toISOString()}&bucket=day`;
 
     fetch(url)
       .then((response) => {
@@ -42,14 +42,12 @@ export default function VogelZeitstrahl({ birdIds, range, setRange, startDate, e
         return response.json();
       })
       .then((data) => {
-        // Formatieren und sortieren der Daten nach Zeitstempel
-        const formatted = data
-          .map((item) => ({
-            ...item,
-            date: new Date(item.date),
-            timestamp: new Date(item.date).getTime(),
-          }))
-          .sort((a, b) => a.timestamp - b.timestamp);
+        // Spaltenform: lückenlose, nach Datum sortierte Tage mit Zählungen
+        const formatted = data.dates.map((date, index) => ({
+          date: new Date(date),
+          timestamp: new Date(date).getTime(),
+          count: data.counts[index],
+        }));
 
         setData(formatted);
       })
@@ -26,19 +26,247 @@ CREATE TABLE IF NOT EXISTS public.species (
 ALTER TABLE IF EXISTS public.species OWNER TO postgres;
 
 -- Table: public.observations
+-- Nach Monaten partitioniert (date). Die Partitionen legt updateDb.py vor dem
+-- Import mit ensure_observation_partitions() an, Beobachtungen ausserhalb davon
+-- landen in observations_default.
+-- Bestehende, nicht partitionierte Tabellen: partition_observations.sql
 CREATE TABLE IF NOT EXISTS public.observations (
-	observationid SERIAL PRIMARY KEY,
-    date timestamp without time zone,
+	observationid SERIAL,
+    date timestamp without time zone NOT NULL,
     speciesid integer,
     geom geometry(PointZ,4326),
 	landcover TEXT,
+    cell1 integer,
+    cell5 integer,
+    cell_lv95 integer,
+    elevation double precision GENERATED ALWAYS AS (ST_Z(geom)) STORED,
+    CONSTRAINT observations_pkey PRIMARY KEY (observationid, date),
     CONSTRAINT observation_speciesid_fkey FOREIGN KEY (speciesid)
         REFERENCES public.species (speciesid) MATCH SIMPLE
         ON UPDATE NO ACTION
         ON DELETE NO ACTION
-);
+) PARTITION BY RANGE (date);
 ALTER TABLE IF EXISTS public.observations OWNER to postgres;
 
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'public.observations'::regclass) = 'p' THEN
+        CREATE TABLE IF NOT EXISTS public.observations_default
+            PARTITION OF public.observations DEFAULT;
+    END IF;
+END;
+$$;
+
+-- Legt die Monatspartitionen von observations für den Zeitraum an.
+-- Liegen in observations_default schon Zeilen eines neuen Monats, werden sie
+-- in dessen Partition verschoben.
+CREATE OR REPLACE FUNCTION public.ensure_observation_partitions(from_date date, to_date date)
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', from_date)::date;
+    month_end date;
+    partition_name text;
+BEGIN
+    -- Alte, nicht partitionierte Tabelle → nichts zu tun
+    IF (SELECT relkind FROM pg_class WHERE oid = 'public.observations'::regclass) <> 'p' THEN
+        RETURN;
+    END IF;
+
+    WHILE month_start <= to_date LOOP
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := format('observations_%s', to_char(month_start, 'YYYY_MM'));
+
+        IF to_regclass(format('public.%I', partition_name)) IS NULL THEN
+            IF EXISTS (SELECT 1 FROM public.observations_default
+                       WHERE date >= month_start AND date < month_end) THEN
+                ALTER TABLE public.observations DETACH PARTITION public.observations_default;
+                EXECUTE format(
+                    'CREATE TABLE public.%I PARTITION OF public.observations FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end);
+                INSERT INTO public.observations
+                    (observationid, date, speciesid, geom, landcover, cell1, cell5, cell_lv95)
+                SELECT observationid, date, speciesid, geom, landcover, cell1, cell5, cell_lv95
+                FROM public.observations_default
+                WHERE date >= month_start AND date < month_end;
+                DELETE FROM public.observations_default
+                WHERE date >= month_start AND date < month_end;
+                ALTER TABLE public.observations ATTACH PARTITION public.observations_default DEFAULT;
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE public.%I PARTITION OF public.observations FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end);
+            END IF;
+        END IF;
+
+        month_start := month_end;
+    END LOOP;
+END;
+$$;
+
 -- Unique index on observations
 CREATE UNIQUE INDEX IF NOT EXISTS observations_unique
-    ON public.observations (date ASC NULLS LAST, speciesid ASC NULLS LAST, geom ASC NULLS LAST);
\ No newline at end of file
+    ON public.observations (date ASC NULLS LAST, speciesid ASC NULLS LAST, geom ASC NULLS LAST);
+
+-- Table: public.grid1 / public.grid5
+-- Rasterzellen der Karte. cell_id entspricht der Zeilenposition in der Grid-Datei
+-- (server/data/km_Grid_*_wgs84.*) und damit der Feature-id in /getGeojson/.
+-- Befüllt werden die Tabellen mit load_grids() aus updateDb.py.
+CREATE TABLE IF NOT EXISTS public.grid1 (
+    cell_id integer PRIMARY KEY,
+    geom geometry(Geometry,4326) NOT NULL
+);
+ALTER TABLE IF EXISTS public.grid1 OWNER to postgres;
+CREATE INDEX IF NOT EXISTS grid1_geom_idx ON public.grid1 USING gist (geom);
+
+CREATE TABLE IF NOT EXISTS public.grid5 (
+    cell_id integer PRIMARY KEY,
+    geom geometry(Geometry,4326) NOT NULL
+);
+ALTER TABLE IF EXISTS public.grid5 OWNER to postgres;
+CREATE INDEX IF NOT EXISTS grid5_geom_idx ON public.grid5 USING gist (geom);
+
+-- Vorberechnete Rasterzellen und Höhe pro Beobachtung (für ältere Datenbanken)
+ALTER TABLE IF EXISTS public.observations
+    ADD COLUMN IF NOT EXISTS cell1 integer,
+    ADD COLUMN IF NOT EXISTS cell5 integer,
+    ADD COLUMN IF NOT EXISTS cell_lv95 integer,
+    ADD COLUMN IF NOT EXISTS elevation double precision GENERATED ALWAYS AS (ST_Z(geom)) STORED;
+
+-- 1-km-Zelle im LV95-Raster (server/app/pyramid.py): iy * 400 + ix ab E 2'450'000 / N 1'050'000,
+-- NULL ausserhalb. Die gröberen Stufen (2, 5, 10, 25 km) berechnet der Server daraus.
+CREATE OR REPLACE FUNCTION public.lv95_cell(point geometry)
+    RETURNS integer
+    LANGUAGE sql
+    IMMUTABLE
+AS $$
+    SELECT CASE WHEN ix BETWEEN 0 AND 399 AND iy BETWEEN 0 AND 249 THEN iy * 400 + ix END
+    FROM (
+        SELECT floor((ST_X(p) - 2450000) / 1000)::integer AS ix,
+               floor((ST_Y(p) - 1050000) / 1000)::integer AS iy
+        FROM ST_Transform(point, 2056) AS p
+    ) AS cell;
+$$;
+
+-- Setzt cell1/cell5/cell_lv95 beim Einfügen (gleiche Semantik wie sjoin mit predicate="contains")
+CREATE OR REPLACE FUNCTION public.observations_set_cells()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.cell1 := (SELECT g.cell_id FROM public.grid1 g
+                  WHERE ST_Contains(g.geom, NEW.geom) ORDER BY g.cell_id LIMIT 1);
+    NEW.cell5 := (SELECT g.cell_id FROM public.grid5 g
+                  WHERE ST_Contains(g.geom, NEW.geom) ORDER BY g.cell_id LIMIT 1);
+    NEW.cell_lv95 := public.lv95_cell(NEW.geom);
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS observations_set_cells ON public.observations;
+CREATE TRIGGER observations_set_cells
+    BEFORE INSERT OR UPDATE OF geom ON public.observations
+    FOR EACH ROW EXECUTE FUNCTION public.observations_set_cells();
+
+-- Indizes passend zu den Abfragen auf observations (Prüfung: benchmarks/explain_checks.py)
+-- Rollups neu berechnen: Tagesbereich, alle benötigten Spalten aus dem Index
+DROP INDEX IF EXISTS public.observations_date_cells_idx;
+CREATE INDEX IF NOT EXISTS observations_rollup_idx
+    ON public.observations (date, speciesid) INCLUDE (cell1, cell5, cell_lv95, landcover, elevation);
+-- Abfragen pro Art (Höhen, Landbedeckung)
+CREATE INDEX IF NOT EXISTS observations_species_date_idx
+    ON public.observations (speciesid, date) INCLUDE (elevation, landcover);
+-- Räumliche Abfragen (Zellzuordnung, Kartenausschnitt)
+CREATE INDEX IF NOT EXISTS observations_geom_idx
+    ON public.observations USING gist (geom);
+
+
+-- Tagesaggregate (Rollups) pro Tag und Art
+-- Die API-Endpunkte lesen aus diesen Tabellen statt aus 'observations'.
+-- Aktualisiert werden sie mit refresh_daily_rollups() für die importierten Tage.
+CREATE TABLE IF NOT EXISTS public.obs_daily_cells (
+    day date NOT NULL,
+    speciesid integer,
+    cell1 integer,
+    cell5 integer,
+    cell_lv95 integer,
+    count integer NOT NULL
+);
+ALTER TABLE IF EXISTS public.obs_daily_cells OWNER to postgres;
+ALTER TABLE IF EXISTS public.obs_daily_cells
+    ADD COLUMN IF NOT EXISTS cell_lv95 integer;
+CREATE INDEX IF NOT EXISTS obs_daily_cells_day_idx
+    ON public.obs_daily_cells (day, speciesid) INCLUDE (cell1, cell5, cell_lv95, count);
+-- Timeline und Karte mit wenigen Arten über lange Zeiträume
+CREATE INDEX IF NOT EXISTS obs_daily_cells_species_idx
+    ON public.obs_daily_cells (speciesid, day) INCLUDE (cell1, cell5, cell_lv95, count);
+
+CREATE TABLE IF NOT EXISTS public.obs_daily_landcover (
+    day date NOT NULL,
+    speciesid integer,
+    landcover text NOT NULL,
+    count integer NOT NULL
+);
+ALTER TABLE IF EXISTS public.obs_daily_landcover OWNER to postgres;
+CREATE INDEX IF NOT EXISTS obs_daily_landcover_day_idx
+    ON public.obs_daily_landcover (day, speciesid);
+-- Pro Art, mit Zeitraum (/getHistograms/) oder ohne (/getLandcover/)
+DROP INDEX IF EXISTS public.obs_daily_landcover_species_idx;
+CREATE INDEX IF NOT EXISTS obs_daily_landcover_species_day_idx
+    ON public.obs_daily_landcover (speciesid, day) INCLUDE (landcover, count);
+
+-- elevation_band = FLOOR(ST_Z(geom) / 100), gröbere Höhenklassen werden daraus summiert
+CREATE TABLE IF NOT EXISTS public.obs_daily_elevation (
+    day date NOT NULL,
+    speciesid integer,
+    elevation_band integer NOT NULL,
+    count integer NOT NULL
+);
+ALTER TABLE IF EXISTS public.obs_daily_elevation OWNER to postgres;
+CREATE INDEX IF NOT EXISTS obs_daily_elevation_day_idx
+    ON public.obs_daily_elevation (day, speciesid);
+-- Pro Art, mit Zeitraum (/getHistograms/) oder ohne (/getHoehenDiagramm)
+DROP INDEX IF EXISTS public.obs_daily_elevation_species_idx;
+CREATE INDEX IF NOT EXISTS obs_daily_elevation_species_day_idx
+    ON public.obs_daily_elevation (speciesid, day) INCLUDE (elevation_band, count);
+
+-- Generationszähler für die Antwort-Caches des Servers.
+-- updateDb.py erhöht ihn bei jedem Import, der Server leert danach seine Caches.
+CREATE TABLE IF NOT EXISTS public.cache_generation (
+    id integer PRIMARY KEY CHECK (id = 1),
+    generation bigint NOT NULL DEFAULT 0
+);
+ALTER TABLE IF EXISTS public.cache_generation OWNER to postgres;
+INSERT INTO public.cache_generation (id, generation) VALUES (1, 0)
+    ON CONFLICT (id) DO NOTHING;
+
+-- Berechnet die Tagesaggregate für die übergebenen Tage neu
+CREATE OR REPLACE FUNCTION public.refresh_daily_rollups(days date[])
+    RETURNS void
+    LANGUAGE sql
+AS $$
+    DELETE FROM public.obs_daily_cells WHERE day = ANY(days);
+    DELETE FROM public.obs_daily_landcover WHERE day = ANY(days);
+    DELETE FROM public.obs_daily_elevation WHERE day = ANY(days);
+
+    INSERT INTO public.obs_daily_cells (day, speciesid, cell1, cell5, cell_lv95, count)
+    SELECT d.day, o.speciesid, o.cell1, o.cell5, o.cell_lv95, COUNT(*)
+    FROM unnest(days) AS d(day)
+    JOIN public.observations o ON o.date >= d.day AND o.date < d.day + 1
+    GROUP BY d.day, o.speciesid, o.cell1, o.cell5, o.cell_lv95;
+
+    INSERT INTO public.obs_daily_landcover (day, speciesid, landcover, count)
+    SELECT d.day, o.speciesid, o.landcover, COUNT(*)
+    FROM unnest(days) AS d(day)
+    JOIN public.observations o ON o.date >= d.day AND o.date < d.day + 1
+    WHERE o.landcover IS NOT NULL
+    GROUP BY d.day, o.speciesid, o.landcover;
+
+    INSERT INTO public.obs_daily_elevation (day, speciesid, elevation_band, count)
+    SELECT d.day, o.speciesid, FLOOR(o.elevation / 100)::integer, COUNT(*)
+    FROM unnest(days) AS d(day)
+    JOIN public.observations o ON o.date >= d.day AND o.date < d.day + 1
+    WHERE o.elevation IS NOT NULL
+    GROUP BY d.day, o.speciesid, FLOOR(o.elevation / 100)::integer;
+$$;
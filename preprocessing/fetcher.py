@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlencode
+
+
+def api_url(base_url, path, **params):
+    """
+    Baut eine URL der ornitho.ch API, z.B. api_url(ORNITHO_API_URL, "species", rarity="common").
+
+    Args:
+        base_url (str): Basisadresse der API (ORNITHO_API_URL oder lokaler Testserver)
+        path (str): Endpunkt relativ zur Basisadresse
+        **params: Query-Parameter (inkl. Zugangsdaten), werden URL-kodiert
+    """
+    return f"{base_url.rstrip('/')}/{path}?{urlencode(params)}"
+
+
+class RateLimiter:
+    """
+    Begrenzt die Anzahl Requests pro Sekunde über alle Threads hinweg.
+    """
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        """Blockiert, bis der nächste Request gesendet werden darf."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Checkpoint:
+    """
+    Speichert abgeschlossene Datumsabschnitte in einer JSON-Datei, damit ein
+    abgebrochener Import nur noch fehlende Abschnitte lädt.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.done = set(json.load(f).get("completed", []))
+
+    @staticmethod
+    def key(chunk_start, chunk_end):
+        """Schlüssel eines Abschnitts, z.B. '2024-05-01/2024-05-01'."""
+        return f"{chunk_start:%Y-%m-%d}/{chunk_end:%Y-%m-%d}"
+
+    def is_done(self, chunk_start, chunk_end):
+        return self.key(chunk_start, chunk_end) in self.done
+
+    def mark_done(self, chunk_start, chunk_end):
+        """Markiert einen Abschnitt als abgeschlossen und schreibt die Datei atomar."""
+        with self.lock:
+            self.done.add(self.key(chunk_start, chunk_end))
+            if not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"completed": sorted(self.done)}, f, indent=0)
+            os.replace(tmp_path, self.path)
+
+
+def fetch_json(session, url, rate_limiter=None, max_retries=5, base_delay=1.0,
+               max_delay=60.0, timeout=15):
+    """
+    Ruft eine URL mit exponentiellem Backoff ab.
+    Wiederholt wird bei Verbindungsfehlern, 429 und 5xx; Retry-After wird beachtet.
+
+    Args:
+        session: Objekt mit get(url, timeout=...) (z.B. OAuth1Session, requests.Session)
+        url (str): Ziel-URL
+        rate_limiter (RateLimiter): Optionale Begrenzung der Request-Rate
+        max_retries (int): Anzahl Versuche
+        base_delay (float): Wartezeit vor dem zweiten Versuch in Sekunden
+        max_delay (float): Obergrenze der Wartezeit in Sekunden
+        timeout (float): Timeout pro Request in Sekunden
+
+    Returns:
+        dict oder None: JSON-Antwort oder None, wenn alle Versuche fehlschlagen
+    """
+    for attempt in range(max_retries):
+        if rate_limiter:
+            rate_limiter.wait()
+        retry_after = None
+        try:
+            response = session.get(url, timeout=timeout)
+            if response.status_code == 200:
+                return response.json()
+            logging.warning(
+                f"Attempt {attempt+1}: API returned {response.status_code} for {url}")
+            if response.status_code != 429 and response.status_code < 500:
+                return None
+            retry_after = response.headers.get("Retry-After")
+        except Exception as e:
+            logging.error(f"Attempt {attempt+1}: Request failed: {e}")
+
+        if attempt + 1 < max_retries:
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay * random.uniform(0.8, 1.2))
+    return None
+
+
+def fetch_chunks(session, chunks, url_for_chunk, max_workers=4,
+                 requests_per_second=2.0, **fetch_options):
+    """
+    Lädt mehrere Datumsabschnitte parallel über einen Thread-Pool.
+    Die Ergebnisse werden in Abschlussreihenfolge zurückgegeben, damit der
+    Aufrufer (Datenbank) sie im eigenen Thread verarbeiten kann.
+
+    Args:
+        session: HTTP-Session, siehe fetch_json
+        chunks (list): Tupel (chunk_start, chunk_end)
+        url_for_chunk (callable): Baut die URL für (chunk_start, chunk_end)
+        max_workers (int): Maximale Anzahl gleichzeitiger Requests
+        requests_per_second (float): Maximale Request-Rate (0 = unbegrenzt)
+        **fetch_options: Weitere Argumente für fetch_json
+
+    Yields:
+        ((chunk_start, chunk_end), dict oder None)
+    """
+    rate_limiter = RateLimiter(requests_per_second)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(
+                fetch_json, session, url_for_chunk(*chunk), rate_limiter, **fetch_options
+            ): chunk
+            for chunk in chunks
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # Bei Abbruch (z.B. Ctrl+C) keine weiteren Abschnitte mehr starten
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,76 @@
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely.geometry import Point
+
+
+def load_landcover(path):
+    """
+    Lädt die Landbedeckungsdaten und baut den räumlichen Index auf.
+
+    Args:
+        path (str): Pfad zum Datensatz (z.B. "zip://data/LandCoverage.zip")
+
+    Returns:
+        GeoDataFrame in WGS84 (EPSG:4326) mit vorberechnetem sindex
+    """
+    landcover_gdf = gpd.read_file(path)
+    # Koordinatensystem in WGS84 (EPSG:4326) umwandeln für geografische Berechnungen
+    landcover_gdf = landcover_gdf.to_crs(epsg=4326)
+    # STRtree einmalig aufbauen, damit die erste Abfrage nicht warten muss
+    landcover_gdf.sindex
+    return landcover_gdf
+
+
+def get_landcover_value(landcover_gdf, lon, lat):
+    """
+    Ermittelt den Landbedeckungswert an den angegebenen Koordinaten.
+
+    Args:
+        landcover_gdf (GeoDataFrame): Landbedeckungsdaten
+        lon (float): Längengrad
+        lat (float): Breitengrad
+
+    Returns:
+        Wert des Landbedeckungstyps oder None, falls kein Treffer
+    """
+    pt = Point(lon, lat)
+    matches = landcover_gdf[landcover_gdf.geometry.contains(pt)]
+    if not matches.empty:
+        return matches.iloc[0]["OBJVAL"]
+    return None
+
+
+def get_landcover_values(landcover_gdf, lons, lats):
+    """
+    Ermittelt die Landbedeckungswerte für viele Koordinaten auf einmal
+    über den räumlichen Index (STRtree) der Landbedeckungsdaten.
+    Liefert pro Punkt dasselbe Ergebnis wie get_landcover_value.
+
+    Args:
+        landcover_gdf (GeoDataFrame): Landbedeckungsdaten
+        lons (array-like): Längengrade
+        lats (array-like): Breitengrade
+
+    Returns:
+        np.ndarray (dtype=object): OBJVAL pro Punkt oder None, falls kein Treffer
+    """
+    points = shapely.points(
+        np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    values = np.full(len(points), None, dtype=object)
+    if len(points) == 0:
+        return values
+
+    point_idx, polygon_idx = landcover_gdf.sindex.query(points, predicate="within")
+    if len(point_idx) == 0:
+        return values
+
+    # Wie bei get_landcover_value gewinnt pro Punkt das erste Polygon (Zeilenreihenfolge)
+    order = np.lexsort((polygon_idx, point_idx))
+    point_idx = point_idx[order]
+    polygon_idx = polygon_idx[order]
+    first = np.flatnonzero(np.r_[True, point_idx[1:] != point_idx[:-1]])
+
+    objval = landcover_gdf["OBJVAL"].to_numpy(dtype=object)
+    values[point_idx[first]] = objval[polygon_idx[first]]
+    return values
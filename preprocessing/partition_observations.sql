@@ -0,0 +1,67 @@
+-- Migration: wandelt eine bestehende, nicht partitionierte Tabelle
+-- public.observations in die nach Monaten partitionierte Form um
+-- (gleiche Definition wie in create_database.sql).
+--
+-- Zuerst create_database.sql ausführen (legt u.a. ensure_observation_partitions()
+-- und die Spalte elevation an), danach einmalig dieses Skript.
+-- Beobachtungen ohne Datum werden nicht übernommen (Teil des Primärschlüssels).
+
+BEGIN;
+
+ALTER TABLE public.observations RENAME TO observations_old;
+ALTER TABLE public.observations_old RENAME CONSTRAINT observations_pkey TO observations_old_pkey;
+ALTER INDEX IF EXISTS public.observations_unique RENAME TO observations_old_unique;
+DROP INDEX IF EXISTS public.observations_date_cells_idx;
+DROP INDEX IF EXISTS public.observations_rollup_idx;
+DROP INDEX IF EXISTS public.observations_species_date_idx;
+DROP INDEX IF EXISTS public.observations_geom_idx;
+DROP TRIGGER IF EXISTS observations_set_cells ON public.observations_old;
+
+CREATE TABLE public.observations (
+    observationid integer NOT NULL DEFAULT nextval('public.observations_observationid_seq'),
+    date timestamp without time zone NOT NULL,
+    speciesid integer,
+    geom geometry(PointZ,4326),
+    landcover TEXT,
+    cell1 integer,
+    cell5 integer,
+    cell_lv95 integer,
+    elevation double precision GENERATED ALWAYS AS (ST_Z(geom)) STORED,
+    CONSTRAINT observations_pkey PRIMARY KEY (observationid, date),
+    CONSTRAINT observation_speciesid_fkey FOREIGN KEY (speciesid)
+        REFERENCES public.species (speciesid) MATCH SIMPLE
+        ON UPDATE NO ACTION
+        ON DELETE NO ACTION
+) PARTITION BY RANGE (date);
+ALTER TABLE public.observations OWNER to postgres;
+ALTER SEQUENCE public.observations_observationid_seq OWNED BY public.observations.observationid;
+
+CREATE TABLE public.observations_default PARTITION OF public.observations DEFAULT;
+
+SELECT public.ensure_observation_partitions(MIN(date)::date, MAX(date)::date)
+FROM public.observations_old;
+
+-- Zellen sind bereits berechnet → Trigger erst nach dem Kopieren anlegen
+INSERT INTO public.observations (observationid, date, speciesid, geom, landcover, cell1, cell5, cell_lv95)
+SELECT observationid, date, speciesid, geom, landcover, cell1, cell5, cell_lv95
+FROM public.observations_old
+WHERE date IS NOT NULL;
+
+DROP TABLE public.observations_old;
+
+CREATE UNIQUE INDEX observations_unique
+    ON public.observations (date ASC NULLS LAST, speciesid ASC NULLS LAST, geom ASC NULLS LAST);
+CREATE INDEX observations_rollup_idx
+    ON public.observations (date, speciesid) INCLUDE (cell1, cell5, cell_lv95, landcover, elevation);
+CREATE INDEX observations_species_date_idx
+    ON public.observations (speciesid, date) INCLUDE (elevation, landcover);
+CREATE INDEX observations_geom_idx
+    ON public.observations USING gist (geom);
+
+CREATE TRIGGER observations_set_cells
+    BEFORE INSERT OR UPDATE OF geom ON public.observations
+    FOR EACH ROW EXECUTE FUNCTION public.observations_set_cells();
+
+COMMIT;
+
+ANALYZE public.observations;
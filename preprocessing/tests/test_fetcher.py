@@ -0,0 +1,114 @@
+"""
+Tests für fetcher.py gegen einen lokalen Stub der ornitho.ch API.
+
+Aufruf aus dem Ordner preprocessing: python -m pytest tests
+"""
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetcher import Checkpoint, api_url, fetch_chunks, fetch_json  # noqa: E402
+
+
+class StubApi(BaseHTTPRequestHandler):
+    """Antwortet wie die API; die ersten failures[path] Requests eines Pfads mit 503."""
+
+    failures = {}
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        StubApi.requests.append((url.path, query))
+
+        if StubApi.failures.get(url.path, 0) > 0:
+            StubApi.failures[url.path] -= 1
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        if url.path == "/api/species":
+            body = {"data": [{"id": "1", "latin_name": "Parus major", "rarity": query["rarity"]}]}
+        elif url.path == "/api/observations":
+            body = {"data": {"sightings": [{"date": {"@ISO8601": query["date_from"]}}]}}
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    StubApi.failures = {}
+    StubApi.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubApi)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api"
+    server.shutdown()
+    server.server_close()
+
+
+def test_api_url_encodes_credentials(stub_api):
+    url = api_url(stub_api + "/", "species", user_email="a@b.ch", user_pw="p&w", rarity="rare")
+    assert url == f"{stub_api}/species?user_email=a%40b.ch&user_pw=p%26w&rarity=rare"
+
+    payload = fetch_json(requests.Session(), url)
+    assert payload["data"][0]["rarity"] == "rare"
+    assert StubApi.requests == [
+        ("/api/species", {"user_email": "a@b.ch", "user_pw": "p&w", "rarity": "rare"})]
+
+
+def test_fetch_json_retries_server_errors(stub_api):
+    StubApi.failures["/api/species"] = 2
+    payload = fetch_json(
+        requests.Session(), api_url(stub_api, "species", rarity="common"), base_delay=0.01)
+    assert payload is not None
+    assert len(StubApi.requests) == 3
+
+
+def test_fetch_json_gives_up_on_not_found(stub_api):
+    assert fetch_json(requests.Session(), api_url(stub_api, "unknown"), base_delay=0.01) is None
+    assert len(StubApi.requests) == 1
+
+
+def test_fetch_chunks_resumes_from_checkpoint(stub_api, tmp_path):
+    start = datetime(2024, 5, 1)
+    chunks = [(start + timedelta(days=day),) * 2 for day in range(4)]
+
+    def url_for_chunk(chunk_start, chunk_end):
+        return api_url(stub_api, "observations",
+                       date_from=f"{chunk_start:%d.%m.%Y}", date_to=f"{chunk_end:%d.%m.%Y}")
+
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    results = dict(fetch_chunks(
+        requests.Session(), chunks[:2], url_for_chunk, requests_per_second=0))
+    for chunk, payload in results.items():
+        assert payload["data"]["sightings"][0]["date"]["@ISO8601"] == f"{chunk[0]:%d.%m.%Y}"
+        checkpoint.mark_done(*chunk)
+
+    # Neuer Lauf: nur die noch fehlenden Abschnitte werden geladen
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    missing = [chunk for chunk in chunks if not checkpoint.is_done(*chunk)]
+    StubApi.requests = []
+    list(fetch_chunks(requests.Session(), missing, url_for_chunk, requests_per_second=0))
+    assert missing == chunks[2:]
+    assert sorted(query["date_from"] for _, query in StubApi.requests) == ["03.05.2024", "04.05.2024"]
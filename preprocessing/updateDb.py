@@ -2,22 +2,44 @@ import os
 from dotenv import load_dotenv
 from authlib.integrations.requests_client import OAuth1Session
 import psycopg2
+from psycopg2.extras import execute_values
 from datetime import datetime, timedelta
 import logging
+import argparse
 import geopandas as gpd
-from shapely.geometry import Point
 import time
 import json
+import io
+import math
+import csv
+import shutil
+import numpy as np
+from fetcher import Checkpoint, api_url, fetch_chunks, fetch_json
+from landcover import load_landcover, get_landcover_value, get_landcover_values
 
 # Laden der Raritätsstufen aus JSON-Datei
 with open("data/rarity.json") as f:
     rarity_levels = json.load(f)
 
 
-# Laden der Landbedeckungsdaten (Shapefile im ZIP-Archiv)
-landcover_gdf = gpd.read_file("zip://data/LandCoverage.zip")
-# Koordinatensystem in WGS84 (EPSG:4326) umwandeln für geografische Berechnungen
-landcover_gdf = landcover_gdf.to_crs(epsg=4326)
+# Landbedeckungsdaten (Shapefile im ZIP-Archiv) inkl. räumlichem Index,
+# geladen beim ersten Import (get_landcover_gdf)
+LANDCOVER_PATH = os.getenv("LANDCOVER_PATH", "zip://data/LandCoverage.zip")
+landcover_gdf = None
+
+# Rasterdateien des Servers (cell_id = Zeilenposition in der Datei)
+GRID_FILES = {
+    "grid1": "../server/data/km_Grid_1_wgs84.geojson",
+    "grid5": "../server/data/km_Grid_5_wgs84.gpkg",
+}
+
+# Spaltenweiser Snapshot für den Server (Format siehe server/app/snapshot.py)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "../server/data/snapshot")
+SNAPSHOT_COLUMNS = {
+    "day": np.int32, "speciesid": np.int32, "lon": np.float32, "lat": np.float32,
+    "elevation": np.float64, "landcover": np.uint8, "cell1": np.int32, "cell5": np.int32,
+    "cell_lv95": np.int32,
+}
 
 
 # .env Variablen laden (Sensible Daten wie Passwörter, API Keys)
@@ -27,36 +49,72 @@ USER_PW = os.getenv("USER_PW")
 OAUTH_CONSUMER_KEY = os.getenv("OAUTH_CONSUMER_KEY")
 OAUTH_CONSUMER_SECRET = os.getenv("OAUTH_CONSUMER_SECRET")
 DB_PASSWD = os.getenv("DB_PASSWD")
+ORNITHO_API_URL = os.getenv("ORNITHO_API_URL", "https://www.ornitho.ch/api")
 
 # OAuth1 Session zur Authentifizierung bei ornitho.ch API
 oauth_session = OAuth1Session(OAUTH_CONSUMER_KEY, OAUTH_CONSUMER_SECRET)
 
-# Verbindung zur PostgreSQL-Datenbank aufbauen
-conn = psycopg2.connect(
-    dbname="postgres",
-    user="postgres",
-    password="postgres",
-    host="10.175.13.26",
-    port="5432"
-)
-cur = conn.cursor()
+# Verbindung zur PostgreSQL-Datenbank, gesetzt mit use_connection (siehe __main__)
+conn = None
+cur = None
 
 # --- Funktionen ---
 
 
+def connect():
+    """
+    Öffnet die Verbindung zur Datenbank. DATABASE_URL (libpq-URL oder
+    "key=value"-String) hat Vorrang, sonst gelten DB_HOST, DB_PORT, DB_NAME,
+    DB_USER und DB_PASSWORD mit den bisherigen Standardwerten.
+    """
+    if os.getenv("DATABASE_URL"):
+        return psycopg2.connect(os.getenv("DATABASE_URL"))
+    return psycopg2.connect(
+        dbname=os.getenv("DB_NAME", "postgres"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", "postgres"),
+        host=os.getenv("DB_HOST", "10.175.13.26"),
+        port=os.getenv("DB_PORT", "5432"),
+    )
+
+
+def use_connection(connection):
+    """
+    Setzt die Verbindung (psycopg2), die alle Funktionen dieses Moduls
+    verwenden, z.B. die Benchmark- oder Testdatenbank.
+    """
+    global conn, cur
+    conn = connection
+    cur = connection.cursor()
+
+
+def get_landcover_gdf():
+    """Landbedeckungsdaten, beim ersten Aufruf aus LANDCOVER_PATH geladen."""
+    global landcover_gdf
+    if landcover_gdf is None:
+        landcover_gdf = load_landcover(LANDCOVER_PATH)
+    return landcover_gdf
+
+
+def ornitho_url(path, **params):
+    """
+    URL eines Endpunkts der ornitho.ch API unter ORNITHO_API_URL inkl. Zugangsdaten.
+    """
+    return api_url(ORNITHO_API_URL, path, user_email=USER_EMAIL, user_pw=USER_PW, **params)
+
+
 def get_species():
     """
     Lädt Arten aus der ornitho.ch API nach Seltenheitsstufen und fügt sie in die DB ein.
     """
     for i in rarity_levels:
         # URL für den API-Request mit Filter auf Taxonomie-Gruppe 1 und Seltenheit i
-        url = f"https://www.ornitho.ch/api/species?user_email={USER_EMAIL}&user_pw={USER_PW}&id_taxo_group=1&rarity={i}"
+        url = ornitho_url("species", id_taxo_group=1, rarity=i)
 
-        response = oauth_session.get(url)
-        if response.status_code == 200:
-            len(response.json().get("data", []))
+        payload = fetch_json(oauth_session, url)
+        if payload is not None:
             # Für jede Art in den API-Daten: Einfügen in die Datenbank
-            for i in response.json().get("data", []):
+            for i in payload.get("data", []):
                 insert_species(
                     rarity=i.get("rarity"),
                     latinname=i.get("latin_name"),
@@ -82,6 +140,7 @@ def insert_species(rarity, latinname, germanname, id, family_id):
         conn.commit()
 
     except Exception as e:
+        conn.rollback()
         print("Fehler beim Einfügen:", e)
 
 
@@ -90,12 +149,11 @@ def get_families():
     Lädt Vogelfamilien von ornitho.ch API und fügt sie in die DB ein.
     """
     # API Request
-    url = f"https://www.ornitho.ch/api/families?user_email={USER_EMAIL}&user_pw={USER_PW}&id_taxo_group=1"
+    url = ornitho_url("families", id_taxo_group=1)
 
-    response = oauth_session.get(url)
-    if response.status_code == 200:
-        len(response.json().get("data", []))
-        for i in response.json().get("data", []):
+    payload = fetch_json(oauth_session, url)
+    if payload is not None:
+        for i in payload.get("data", []):
 
             insert_families(
                 familyid=i.get("id"),
@@ -118,6 +176,7 @@ def insert_families(familyid, latin_name):
         conn.commit()
 
     except Exception as e:
+        conn.rollback()
         print("Fehler beim Einfügen:", e)
 
 
@@ -141,46 +200,89 @@ logging.basicConfig(
 )
 
 
-def getObservations():
+def observations_url(chunk_start, chunk_end):
     """
-    Lädt Beobachtungen der letzten 365 Tage in Wochenabschnitten
-    von der ornitho.ch API und speichert sie in der DB.
+    Baut die API-URL für Beobachtungen zwischen chunk_start und chunk_end.
     """
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=365)
+    return ornitho_url(
+        "observations",
+        date_from=chunk_start.strftime("%d.%m.%Y"),
+        date_to=chunk_end.strftime("%d.%m.%Y"),
+    )
+
+
+def getObservations(start_date=None, end_date=None, batch=True, max_workers=4,
+                    requests_per_second=2.0,
+                    checkpoint_path="observation_import_checkpoint.json",
+                    rollup_chunks=30):
+    """
+    Lädt Beobachtungen (standardmässig der letzten 365 Tage) in Tagesabschnitten
+    von der ornitho.ch API und speichert sie in der DB.
+
+    Die Abschnitte werden parallel geladen (fetch_chunks). Abgeschlossene
+    Abschnitte werden in checkpoint_path vermerkt, ein erneuter Aufruf lädt
+    nur fehlende oder neue Tage. Der laufende Tag wird nie als abgeschlossen
+    markiert, da dort noch Beobachtungen dazukommen.
 
-    for chunk_start, chunk_end in daterange_weeks(start_date, end_date):
+    Die Tagesaggregate werden gesammelt alle rollup_chunks Abschnitte und am
+    Ende aktualisiert (jeweils mit einer neuen cache_generation); erst danach
+    gelten die Abschnitte im Checkpoint als abgeschlossen.
+
+    Args:
+        start_date (datetime): Beginn des Zeitraums (Standard: end_date - 365 Tage)
+        end_date (datetime): Ende des Zeitraums (Standard: jetzt)
+        batch (bool): True → jeder Abschnitt wird gesammelt per COPY geladen
+                      (insert_observations_batch), False → Einzel-INSERTs
+        max_workers (int): Maximale Anzahl gleichzeitiger API-Requests
+        requests_per_second (float): Maximale Request-Rate an die API
+        checkpoint_path (str): Checkpoint-Datei (None = ohne Checkpoint)
+        rollup_chunks (int): Abschnitte pro Aktualisierung der Tagesaggregate
+
+    Returns:
+        dict: Anzahl erhaltener, eingefügter und übersprungener Beobachtungen
+    """
+    end_date = end_date or datetime.now()
+    start_date = start_date or end_date - timedelta(days=365)
+    species_ids = load_species_ids() if batch else None
+    total_rows = 0
+    total_seconds = 0.0
+    stats = {"received": 0, "inserted": 0, "skipped": 0}
+    # Tage mit neuen Beobachtungen und fertige Abschnitte seit der letzten Aktualisierung
+    touched_days = set()
+    pending_chunks = []
+
+    checkpoint = Checkpoint(checkpoint_path)
+    chunks = [
+        chunk for chunk in daterange_weeks(start_date, end_date)
+        if not checkpoint.is_done(*chunk)
+    ]
+    logging.info(
+        f"Fetching {len(chunks)} chunks ({len(checkpoint.done)} already completed)")
+    ensure_partitions(start_date, end_date)
+
+    for (chunk_start, chunk_end), payload in fetch_chunks(
+            oauth_session, chunks, observations_url,
+            max_workers=max_workers, requests_per_second=requests_per_second):
+        rows = []
         date_from_str = chunk_start.strftime("%d.%m.%Y")
         date_to_str = chunk_end.strftime("%d.%m.%Y")
-        logging.info(f"Requesting data from {date_from_str} to {date_to_str}")
-
-        url = f"https://www.ornitho.ch/api/observations?user_email={USER_EMAIL}&user_pw={USER_PW}&date_from={date_from_str}&date_to={date_to_str}"
+        logging.info(f"Received data from {date_from_str} to {date_to_str}")
 
-        # Bis zu 3 Versuche, um API-Daten abzurufen
-        for attempt in range(3):
-            try:
-                response = oauth_session.get(url, timeout=15)
-                if response.status_code == 200:
-                    break
-                logging.warning(
-                    f"Attempt {attempt+1}: API returned {response.status_code}")
-            except Exception as e:
-                logging.error(f"Attempt {attempt+1}: Request failed: {e}")
-            time.sleep(2)
-        else:
+        if payload is None:
             logging.error(
-                f"Failed to retrieve data from {date_from_str} to {date_to_str} after 3 attempts.")
+                f"Failed to retrieve data from {date_from_str} to {date_to_str}.")
             continue
 
          # Verarbeitung der erhaltenen Daten
         try:
-            data = response.json().get("data", {})
+            data = payload.get("data", {})
             sightings = data.get("sightings", [])
             if not isinstance(sightings, list):
                 logging.warning(
                     f"No valid 'sightings' list in response for {date_from_str} to {date_to_str}")
                 continue
 
+            stats["received"] += len(sightings)
             for i in sightings:
                 try:
                     # Daten aus Observation extrahieren
@@ -196,13 +298,31 @@ def getObservations():
                         logging.warning(f"Incomplete data skipped: {i}")
                         continue
 
-                    insert_observation(
+                    # Typen prüfen, damit ein fehlerhafter Eintrag nicht den ganzen Abschnitt verwirft
+                    try:
+                        species = int(species)
+                        lon, lat, alt = float(lon), float(lat), float(alt)
+                    except (TypeError, ValueError):
+                        logging.warning(f"Malformed data skipped: {i}")
+                        continue
+                    if not all(map(math.isfinite, (lon, lat, alt))):
+                        logging.warning(f"Malformed data skipped: {i}")
+                        continue
+
+                    if batch:
+                        rows.append((date_iso, species, lon, lat, alt))
+                        continue
+
+                    inserted = insert_observation(
                         speciesid=species,
                         isozeit=date_iso,
                         x=lon,
                         y=lat,
                         z=alt
                     )
+                    if inserted:
+                        touched_days.add(date_iso[:10])
+                        stats["inserted"] += 1
                 except Exception as e:
                     logging.error(
                         f"Error processing observation: {e} | Entry: {i}")
@@ -212,29 +332,104 @@ def getObservations():
             logging.error(
                 f"Error parsing JSON for range {date_from_str} to {date_to_str}: {e}")
 
+        if rows:
+            started = time.perf_counter()
+            result = insert_observations_batch(rows, species_ids)
+            if result is None:
+                # Abschnitt nicht als abgeschlossen markieren → nächster Lauf versucht erneut
+                continue
+            new_days, inserted = result
+            touched_days |= new_days
+            stats["inserted"] += inserted
+            total_seconds += time.perf_counter() - started
+            total_rows += len(rows)
+
+        if chunk_end.date() < end_date.date():
+            pending_chunks.append((chunk_start, chunk_end))
+        if len(pending_chunks) >= rollup_chunks:
+            flush_rollups(touched_days, pending_chunks, checkpoint)
+
+    flush_rollups(touched_days, pending_chunks, checkpoint)
+
+    if total_rows:
+        logging.info(
+            f"Batch import finished: {total_rows} rows in {total_seconds:.1f}s "
+            f"({total_rows / max(total_seconds, 1e-9):.0f} rows/s)")
+
+    # Übersprungen: Duplikate, unbekannte Arten, unvollständige oder fehlerhafte Einträge
+    stats["skipped"] = stats["received"] - stats["inserted"]
+    summary = (f"Import {start_date:%d.%m.%Y} - {end_date:%d.%m.%Y}: "
+               f"{stats['received']} received, {stats['inserted']} inserted, "
+               f"{stats['skipped']} skipped")
+    logging.info(summary)
+    print(summary)
+    return stats
+
 
-def get_landcover_value(lon, lat):
+def flush_rollups(touched_days, pending_chunks, checkpoint):
     """
-    Ermittelt den Landbedeckungswert an den angegebenen Koordinaten.
+    Aktualisiert die Tagesaggregate für touched_days (nur die Tage, die neue
+    Daten erhalten haben), markiert danach pending_chunks im Checkpoint als
+    abgeschlossen und leert beide Sammlungen.
+    """
+    refresh_rollups(touched_days)
+    for chunk in pending_chunks:
+        checkpoint.mark_done(*chunk)
+    touched_days.clear()
+    pending_chunks.clear()
+
+
+def get_import_watermark():
+    """
+    Gibt das Datum der neusten importierten Beobachtung zurück (None bei leerer DB).
+    """
+    cur.execute("SELECT MAX(date) FROM public.observations")
+    return cur.fetchone()[0]
+
+
+def syncObservations(overlap_days=3, **options):
+    """
+    Lädt nur Beobachtungen seit dem letzten Import. Zusätzlich werden die
+    letzten overlap_days Tage vor der neusten Beobachtung erneut geladen,
+    um nachträglich erfasste oder bearbeitete Beobachtungen zu übernehmen.
+    Bei leerer Datenbank wird wie bei getObservations ein ganzes Jahr geladen.
 
     Args:
-        lon (float): Längengrad
-        lat (float): Breitengrad
+        overlap_days (int): Anzahl Tage, die vor der neusten Beobachtung erneut geladen werden
+        **options: Weitere Argumente für getObservations
 
     Returns:
-        Wert des Landbedeckungstyps oder None, falls kein Treffer
+        dict: Anzahl erhaltener, eingefügter und übersprungener Beobachtungen
+    """
+    watermark = get_import_watermark()
+    start_date = None
+    if watermark:
+        start_date = datetime.combine(
+            watermark.date() - timedelta(days=overlap_days), datetime.min.time())
+    logging.info(f"Sync since {start_date or 'beginning'} (watermark {watermark})")
+    # Der Überlappungsbereich wurde bereits importiert → Checkpoint hier nicht verwenden
+    return getObservations(start_date=start_date, checkpoint_path=None, **options)
+
+
+def ensure_partitions(start_date, end_date):
+    """
+    Legt die Monatspartitionen von 'observations' für den Zeitraum an
+    (ensure_observation_partitions in create_database.sql).
     """
-    pt = Point(lon, lat)
-    matches = landcover_gdf[landcover_gdf.geometry.contains(pt)]
-    if not matches.empty:
-        return matches.iloc[0]["OBJVAL"]
-    return None
+    cur.execute(
+        "SELECT public.ensure_observation_partitions(%s::date, %s::date)",
+        (start_date.date(), end_date.date()),
+    )
+    conn.commit()
 
 
 def insert_observation(isozeit, speciesid, x, y, z):
     """
     Fügt eine Beobachtung in die Tabelle 'observations' ein.
     Prüft, ob die Art in der DB existiert, berechnet Landbedeckung und schreibt Geo-Daten.
+
+    Returns:
+        True, wenn die Beobachtung neu eingefügt wurde, sonst False
     """
     try:
         # Prüfen, ob Art in DB vorhanden
@@ -243,10 +438,10 @@ def insert_observation(isozeit, speciesid, x, y, z):
         if not cur.fetchone():
             logging.warning(
                 f"Species ID {speciesid} not found in the database. Skipping observation.")
-            return
+            return False
 
        # Landbedeckung am Beobachtungsort abfragen
-        landcover_value = get_landcover_value(float(x), float(y))
+        landcover_value = get_landcover_value(get_landcover_gdf(), float(x), float(y))
 
         sql = """
         INSERT INTO public.observations (date, speciesid, geom, landcover)
@@ -254,13 +449,316 @@ def insert_observation(isozeit, speciesid, x, y, z):
         ON CONFLICT DO NOTHING
         """
         cur.execute(sql, (isozeit, speciesid, x, y, z, landcover_value))
+        inserted = cur.rowcount == 1
         conn.commit()
         logging.info(
             f"Inserted observation {isozeit} | SID {speciesid} | LC {landcover_value}")
+        return inserted
     except Exception as e:
         logging.error(
             f"Database insert failed for {isozeit}, {speciesid}: {e}")
+        conn.rollback()
+        return False
+
+
+def load_species_ids():
+    """
+    Lädt alle bekannten Art-IDs aus der Tabelle 'species' als Set.
+    """
+    cur.execute("SELECT speciesid FROM public.species")
+    return {row[0] for row in cur.fetchall()}
+
+
+def insert_observations_batch(rows, species_ids):
+    """
+    Fügt einen ganzen API-Abschnitt in einer Transaktion in 'observations' ein.
+    Die Zeilen werden per COPY in eine temporäre Staging-Tabelle geladen und
+    von dort mit ON CONFLICT DO NOTHING übernommen.
 
+    Args:
+        rows (list): Geprüfte Tupel (isozeit, speciesid: int, lon, lat, alt: float),
+                     siehe getObservations
+        species_ids (set): Bekannte Art-IDs (siehe load_species_ids)
 
-get_families()
+    Returns:
+        tuple oder None: (Tage YYYY-MM-DD mit neuen Beobachtungen, Anzahl eingefügt),
+                         None wenn der Abschnitt nicht gespeichert werden konnte
+    """
+    started = time.perf_counter()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    known = [row for row in rows if row[1] in species_ids]
+    if len(known) < len(rows):
+        logging.warning(
+            f"Skipped {len(rows) - len(known)} observations with unknown species IDs")
+
+    # Landbedeckung für den ganzen Abschnitt in einer Index-Abfrage bestimmen
+    landcover_values = get_landcover_values(
+        get_landcover_gdf(),
+        [row[2] for row in known],
+        [row[3] for row in known],
+    )
+    for row, landcover_value in zip(known, landcover_values):
+        writer.writerow((*row, landcover_value))
+    buffer.seek(0)
+
+    try:
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS observations_staging (
+                date timestamp,
+                speciesid integer,
+                lon double precision,
+                lat double precision,
+                alt double precision,
+                landcover text
+            ) ON COMMIT DELETE ROWS
+        """)
+        cur.copy_expert(
+            "COPY observations_staging FROM STDIN WITH (FORMAT csv)", buffer)
+        cur.execute("""
+            INSERT INTO public.observations (date, speciesid, geom, landcover)
+            SELECT date, speciesid, ST_SetSRID(ST_MakePoint(lon, lat, alt), 4326), landcover
+            FROM observations_staging
+            ON CONFLICT DO NOTHING
+            RETURNING date::date
+        """)
+        touched_days = {row[0].isoformat() for row in cur.fetchall()}
+        inserted = cur.rowcount
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Batch insert of {len(rows)} observations failed: {e}")
+        return None
+
+    seconds = time.perf_counter() - started
+    logging.info(
+        f"Inserted {inserted} of {len(rows)} observations in {seconds:.2f}s "
+        f"({len(rows) / max(seconds, 1e-9):.0f} rows/s)")
+    return touched_days, inserted
+
+
+def refresh_rollups(days):
+    """
+    Berechnet die Tagesaggregate (obs_daily_*) für die angegebenen Tage neu.
+
+    Args:
+        days (Iterable[str]): Tage im Format YYYY-MM-DD
+    """
+    days = sorted(days)
+    if not days:
+        return
+    cur.execute("SELECT public.refresh_daily_rollups(%s::date[])", (days,))
+    bump_cache_generation(commit=False)
+    conn.commit()
+    logging.info(f"Refreshed daily rollups for {len(days)} day(s)")
+
+
+def bump_cache_generation(commit=True):
+    """
+    Erhöht den Generationszähler (cache_generation), damit der Server seine
+    Antwort-Caches verwirft und die neuen Daten ausliefert.
+    """
+    cur.execute(
+        "UPDATE public.cache_generation SET generation = generation + 1 WHERE id = 1")
+    if commit:
+        conn.commit()
 
+
+def rebuild_rollups():
+    """
+    Berechnet die Tagesaggregate für alle Tage mit Beobachtungen neu
+    (z.B. nach dem ersten Import oder nach update_observation_cells()).
+    """
+    cur.execute(
+        "SELECT DISTINCT date::date FROM public.observations WHERE date IS NOT NULL")
+    days = [row[0].isoformat() for row in cur.fetchall()]
+    refresh_rollups(days)
+
+
+def load_grids():
+    """
+    Schreibt die 1-km- und 5-km-Rasterzellen in die Tabellen 'grid1' und 'grid5'.
+    Die cell_id ist die Zeilenposition in der Datei und entspricht damit der
+    Feature-id, die der Server in /getGeojson/ zurückgibt.
+    """
+    for table, path in GRID_FILES.items():
+        grid = gpd.read_file(path).to_crs(epsg=4326)
+        rows = [(cell_id, geom.wkb) for cell_id, geom in enumerate(grid.geometry)]
+        cur.execute(f"TRUNCATE public.{table}")
+        execute_values(
+            cur,
+            f"INSERT INTO public.{table} (cell_id, geom) VALUES %s",
+            rows,
+            template="(%s, ST_SetSRID(ST_GeomFromWKB(%s), 4326))",
+        )
+        conn.commit()
+        logging.info(f"Loaded {len(rows)} cells into {table}")
+
+
+def grids_loaded():
+    """
+    True, wenn die Tabellen 'grid1' und 'grid5' Rasterzellen enthalten.
+    """
+    cur.execute("""
+        SELECT EXISTS (SELECT 1 FROM public.grid1)
+           AND EXISTS (SELECT 1 FROM public.grid5)
+    """)
+    return cur.fetchone()[0]
+
+
+def prepare_grids(reload=False, backfill=False):
+    """
+    Stellt vor einem Import sicher, dass 'grid1' und 'grid5' gefüllt sind;
+    sonst setzt der Trigger cell1/cell5 auf NULL. Sind die Tabellen leer
+    (oder reload=True), werden sie mit load_grids() geladen und die Zellen
+    der bestehenden Beobachtungen mit update_observation_cells() nachgeführt.
+
+    Args:
+        reload (bool): Raster auch dann neu laden, wenn sie bereits gefüllt sind
+        backfill (bool): Zellen der bestehenden Beobachtungen in jedem Fall neu berechnen
+
+    Returns:
+        bool: True, wenn die Zellen der bestehenden Beobachtungen neu berechnet wurden
+    """
+    if reload or not grids_loaded():
+        load_grids()
+        backfill = True
+    if backfill:
+        update_observation_cells()
+    return backfill
+
+
+def update_observation_cells():
+    """
+    Berechnet cell1/cell5/cell_lv95 für alle bestehenden Beobachtungen neu (Backfill).
+    Neue Beobachtungen erhalten die Zellen beim Einfügen über einen Trigger.
+    """
+    cur.execute("""
+        UPDATE public.observations o
+        SET cell1 = (SELECT g.cell_id FROM public.grid1 g
+                     WHERE ST_Contains(g.geom, o.geom) ORDER BY g.cell_id LIMIT 1),
+            cell5 = (SELECT g.cell_id FROM public.grid5 g
+                     WHERE ST_Contains(g.geom, o.geom) ORDER BY g.cell_id LIMIT 1),
+            cell_lv95 = public.lv95_cell(o.geom)
+    """)
+    conn.commit()
+    logging.info(f"Updated grid cells for {cur.rowcount} observations")
+
+
+def export_snapshot(directory=SNAPSHOT_DIR, batch_size=100_000):
+    """
+    Schreibt alle Beobachtungen spaltenweise als .npy-Dateien, sortiert nach
+    (speciesid, date), nach directory/gen-<generation> und setzt danach
+    directory/CURRENT auf diesen Ordner. Der Server verwendet den Snapshot,
+    solange seine Generation der cache_generation in der Datenbank entspricht.
+    Ältere Snapshots werden gelöscht.
+    """
+    # Generation und Beobachtungen aus demselben Datenbankzustand lesen
+    conn.commit()
+    cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    cur.execute("SELECT generation FROM public.cache_generation WHERE id = 1")
+    row = cur.fetchone()
+    generation = row[0] if row else 0
+
+    columns = {name: [] for name in SNAPSHOT_COLUMNS}
+    landcover_codes = {}
+    # Serverseitiger Cursor: die Beobachtungen werden blockweise gelesen
+    with conn.cursor(name="export_snapshot") as export_cur:
+        export_cur.itersize = batch_size
+        export_cur.execute("""
+            SELECT (date::date - DATE '1970-01-01') AS day, speciesid,
+                   ST_X(geom), ST_Y(geom), elevation, landcover,
+                   COALESCE(cell1, -1), COALESCE(cell5, -1), COALESCE(cell_lv95, -1)
+            FROM public.observations
+            WHERE speciesid IS NOT NULL
+            ORDER BY speciesid, date
+        """)
+        while rows := export_cur.fetchmany(batch_size):
+            values = dict(zip(SNAPSHOT_COLUMNS, zip(*rows)))
+            # Bodenbedeckung als Code (Index in meta.json "landcover"), 255 = keine
+            values["landcover"] = [
+                255 if value is None else landcover_codes.setdefault(value, len(landcover_codes))
+                for value in values["landcover"]]
+            for column, dtype in SNAPSHOT_COLUMNS.items():
+                # None (z.B. fehlende Höhe) → NaN über float64
+                columns[column].append(np.array(values[column], dtype=np.float64).astype(dtype))
+    conn.commit()
+    if len(landcover_codes) >= 255:
+        raise ValueError(f"Zu viele Bodenbedeckungsarten für den Snapshot: {len(landcover_codes)}")
+
+    # In temporären Ordner schreiben und umbenennen, damit der Server nie halbfertige Dateien sieht
+    name = f"gen-{generation}"
+    target = os.path.join(directory, name)
+    tmp = f"{target}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    rows = 0
+    for column, parts in columns.items():
+        values = np.concatenate(parts) if parts else np.empty(0, dtype=SNAPSHOT_COLUMNS[column])
+        rows = len(values)
+        np.save(os.path.join(tmp, f"{column}.npy"), values)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({
+            "generation": generation,
+            "rows": rows,
+            "landcover": list(landcover_codes),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }, f)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+
+    current_tmp = os.path.join(directory, f"CURRENT.tmp-{os.getpid()}")
+    with open(current_tmp, "w") as f:
+        f.write(name)
+    os.replace(current_tmp, os.path.join(directory, "CURRENT"))
+
+    for entry in os.listdir(directory):
+        if entry.startswith("gen-") and entry != name:
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    logging.info(f"Exported snapshot {name} with {rows} observations")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Füllt oder aktualisiert die Datenbank mit Daten von ornitho.ch")
+    parser.add_argument(
+        "--sync", action="store_true",
+        help="Nur Beobachtungen seit dem letzten Import laden (ohne Familien/Arten)")
+    parser.add_argument(
+        "--overlap-days", type=int, default=3,
+        help="Tage vor der neusten Beobachtung, die beim Sync erneut geladen werden")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Gleichzeitige API-Requests")
+    parser.add_argument("--rps", type=float, default=2.0,
+                        help="Maximale API-Requests pro Sekunde")
+    parser.add_argument("--no-batch", action="store_true",
+                        help="Beobachtungen einzeln statt per COPY einfügen")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="Nach dem Import keinen Snapshot für den Server schreiben")
+    parser.add_argument("--load-grids", action="store_true",
+                        help="grid1/grid5 neu laden (sonst nur, wenn die Tabellen leer sind)")
+    parser.add_argument("--backfill-cells", action="store_true",
+                        help="Zellen aller bestehenden Beobachtungen neu berechnen")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="Tagesaggregate für alle Tage neu berechnen")
+    args = parser.parse_args()
+
+    use_connection(connect())
+    # Nach neu berechneten Zellen stimmen die Tagesaggregate nicht mehr
+    if prepare_grids(reload=args.load_grids, backfill=args.backfill_cells) or args.rebuild_rollups:
+        rebuild_rollups()
+
+    options = {
+        "batch": not args.no_batch,
+        "max_workers": args.workers,
+        "requests_per_second": args.rps,
+    }
+    if args.sync:
+        syncObservations(overlap_days=args.overlap_days, **options)
+    else:
+        get_families()
+        get_species()
+        bump_cache_generation()
+        getObservations(**options)
+
+    if not args.no_snapshot:
+        export_snapshot()
@@ -0,0 +1,162 @@
+"""
+Caches für API-Antworten.
+
+Alle Caches sind an eine Generation gebunden: updateDb.py erhöht nach jedem
+Import den Zähler in der Tabelle cache_generation, der Server leert daraufhin
+seine Caches (siehe sync_cache_generation in main.py).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+def filter_key(**params):
+    """
+    Stabiler Schlüssel für Filterparameter: ID-Listen werden sortiert und
+    dedupliziert, damit gleiche Filter in beliebiger Reihenfolge denselben
+    Schlüssel ergeben.
+
+    Returns:
+        str: SHA-1-Hash der normalisierten Parameter
+    """
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(set(value))
+        normalized[name] = value
+    payload = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def normalize_date(value):
+    """
+    Vereinheitlicht Datumsangaben für Cache-Schlüssel, z.B. ergeben
+    "2024-05-01T00:00:00.000Z" und "2024-05-01T00:00:00" denselben Wert.
+    Wie in der Datenbank (timestamp without time zone) wird die Zeitzone ignoriert.
+    """
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None).isoformat()
+    except (TypeError, ValueError):
+        return value
+
+
+class LRUCache:
+    """
+    Thread-sicherer LRU-Cache für bytes-Werte, begrenzt auf max_bytes.
+    on_evict(key, value) wird für verdrängte Einträge aufgerufen.
+    """
+
+    def __init__(self, max_bytes, on_evict=None):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    async def aget(self, key):
+        """Wie get, für cached_response (nur Speicher, blockiert nicht)."""
+        return self.get(key)
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            if self.on_evict:
+                self.on_evict(key, value)
+            return
+        evicted = []
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                evicted.append(self.entries.popitem(last=False))
+                self.size -= len(evicted[-1][1])
+        if self.on_evict:
+            for evicted_key, evicted_value in evicted:
+                self.on_evict(evicted_key, evicted_value)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class ResponseCache:
+    """
+    Cache für fertig serialisierte Antworten (bytes).
+    Im Speicher begrenzt auf max_bytes; mit spill_dir werden verdrängte
+    Einträge auf die Festplatte ausgelagert und von dort wieder gelesen.
+    Die Festplatte wird nie im Event-Loop gelesen oder geschrieben: set()
+    übergibt verdrängte Einträge einem eigenen Thread, aget() liest über
+    asyncio.to_thread.
+    """
+
+    def __init__(self, max_bytes, spill_dir=None):
+        self.spill_dir = spill_dir
+        self.generation = None
+        self.memory = LRUCache(max_bytes, on_evict=self._schedule_spill if spill_dir else None)
+        self.spill_executor = ThreadPoolExecutor(1, thread_name_prefix="cache-spill") if spill_dir else None
+
+    def _spill_path(self, key, generation):
+        return os.path.join(self.spill_dir, f"gen-{generation}", f"{key}.bin")
+
+    def _schedule_spill(self, key, value):
+        self.spill_executor.submit(self._spill, key, value, self.generation)
+
+    def _spill(self, key, value, generation):
+        # Seit der Übergabe neue Generation → Eintrag ist veraltet
+        if generation != self.generation:
+            return
+        path = self._spill_path(key, generation)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _load(self, key, generation):
+        try:
+            with open(self._spill_path(key, generation), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    async def aget(self, key):
+        """Eintrag aus dem Speicher oder (ausserhalb des Event-Loops) von der Festplatte."""
+        value = self.memory.get(key)
+        if value is None and self.spill_dir:
+            generation = self.generation
+            value = await asyncio.to_thread(self._load, key, generation)
+            if value is not None and generation == self.generation:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+
+    def reset(self, generation):
+        """Leert den Cache und wechselt auf eine neue Generation."""
+        self.memory.clear()
+        self.generation = generation
+        if self.spill_dir and os.path.isdir(self.spill_dir):
+            current = f"gen-{generation}"
+            for name in os.listdir(self.spill_dir):
+                if name != current:
+                    shutil.rmtree(os.path.join(self.spill_dir, name), ignore_errors=True)
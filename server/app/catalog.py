@@ -0,0 +1,89 @@
+"""
+Katalog der Arten und Familien im Speicher des Servers.
+
+Die Tabellen species und family ändern sich nur beim Import (updateDb.py).
+Sie werden deshalb einmal geladen und beim nächsten Wechsel der
+cache_generation neu gelesen (siehe sync_cache_generation in main.py).
+Der Katalog beantwortet die Auflösung Name → speciesid und Familie → Arten
+ohne SQL und hält die Antworten von /getSpecies/ und /getFamilies/ fertig
+serialisiert (JSON und gzip) mit ETag bereit.
+"""
+import gzip
+import hashlib
+import json
+from datetime import date, datetime
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} ist nicht JSON-serialisierbar")
+
+
+class ListBody:
+    """Fertig serialisierte JSON-Liste mit gzip-Variante und ETag."""
+
+    def __init__(self, rows):
+        self.body = json.dumps(
+            rows, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_json_default
+        ).encode("utf-8")
+        # mtime=0 → gleicher Inhalt ergibt dieselben gzip-Bytes
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = '"catalog-' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+
+
+class Catalog:
+    """
+    Arten und Familien mit Indizes nach ID, lateinischem und deutschem Namen
+    sowie Familie. Namen werden ohne Beachtung der Gross-/Kleinschreibung
+    gesucht.
+    """
+
+    def __init__(self):
+        self.generation = None
+        self.load([], [])
+
+    def load(self, species_rows, family_rows, generation=None):
+        """Baut alle Indizes aus den Zeilen von species und family neu auf."""
+        species_rows = sorted(species_rows, key=lambda row: row["speciesid"])
+        family_rows = sorted(family_rows, key=lambda row: row["id"])
+
+        self.species_by_id = {row["speciesid"]: row for row in species_rows}
+        self.species_by_latin = {}
+        self.species_by_german = {}
+        self.species_by_family = {}
+        for row in species_rows:
+            if row.get("latinname"):
+                self.species_by_latin.setdefault(row["latinname"].casefold(), row)
+            if row.get("germanname"):
+                self.species_by_german.setdefault(row["germanname"].casefold(), row)
+            if row.get("family_id") is not None:
+                self.species_by_family.setdefault(row["family_id"], []).append(row["speciesid"])
+        self.families_by_id = {row["id"]: row for row in family_rows}
+
+        self.species_list = ListBody(species_rows)
+        self.families_list = ListBody(family_rows)
+        self.generation = generation
+
+    def species(self, name):
+        """Art zu einem lateinischen oder deutschen Namen (None, wenn unbekannt)."""
+        if not name:
+            return None
+        key = name.strip().casefold()
+        return self.species_by_latin.get(key) or self.species_by_german.get(key)
+
+    def species_ids(self, names):
+        """speciesids zu einer Liste von Namen; unbekannte Namen werden ausgelassen."""
+        ids = []
+        for name in names:
+            row = self.species(name)
+            if row is not None and row["speciesid"] not in ids:
+                ids.append(row["speciesid"])
+        return ids
+
+    def family_species_ids(self, family_ids):
+        """Alle speciesids der angegebenen Familien (sortiert, ohne Duplikate)."""
+        ids = set()
+        for family_id in family_ids:
+            ids.update(self.species_by_family.get(family_id, ()))
+        return sorted(ids)
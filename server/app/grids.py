@@ -0,0 +1,247 @@
+"""
+Rasterdaten (1 km / 5 km) in kompakter Binärform.
+
+Die Grid-Dateien werden einmalig umgewandelt (python -m app.grids) in:
+    bounds.npy        float64 (N, 4)  minx, miny, maxx, maxy pro Zelle
+    geometry.wkb      WKB aller Zellen hintereinander, wkb_offsets.npy (N + 1)
+    features.json     GeoJSON-Geometrie pro Zelle, feature_offsets.npy (N + 1)
+    grid.geojson      alle Zellen ohne Eigenschaften, als statische Datei für den Client
+
+Der Server lädt die Dateien erst bei der ersten Verwendung per mmap. Alle
+uvicorn-Worker teilen sich dadurch dieselben Seiten im Page-Cache, und die
+Geometrie muss für Antworten nicht erneut serialisiert werden.
+"""
+import json
+import mmap
+import os
+import shutil
+import threading
+
+import numpy as np
+
+# cell_id entspricht der Zeilenposition in der Quelldatei (wie in der DB, siehe grid1/grid5)
+GRID_SOURCES = {
+    "grid1": "data/km_Grid_1_wgs84.geojson",
+    "grid5": "data/km_Grid_5_wgs84.gpkg",
+}
+GRID_DIR = "data/grids"
+
+FEATURE_COLLECTION_START = b'{"type": "FeatureCollection", "features": ['
+FEATURE_COLLECTION_END = b"]}"
+
+# Eindeutige Kennung der Grids im Binärformat (pack_counts). grid1/grid5 behalten
+# ihre Zellgrösse in km als Kennung, die Stufen des LV95-Rasters erhalten
+# LV95_CODE_OFFSET + km (siehe main.py), damit sie sich nie überschneiden
+GRID_CODES = {"grid1": 1, "grid5": 5}
+LV95_CODE_OFFSET = 1000
+
+
+def build_grid(source, target):
+    """
+    Wandelt eine Grid-Datei (GeoPackage/GeoJSON) in die Binärform um.
+    Geschrieben wird in ein temporäres Verzeichnis, das danach umbenannt wird,
+    damit parallel startende Worker nie halbfertige Dateien sehen.
+    """
+    import geopandas as gpd
+    import shapely
+    from shapely.geometry import mapping
+
+    grid = gpd.read_file(source).to_crs(epsg=4326)
+    geometries = grid.geometry.values
+
+    tmp = f"{target}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+
+    np.save(os.path.join(tmp, "bounds.npy"), shapely.bounds(geometries).astype(np.float64))
+
+    wkb = [shapely.to_wkb(geom) for geom in geometries]
+    features = [json.dumps(mapping(geom)).encode("utf-8") for geom in geometries]
+    for name, parts in (("geometry.wkb", wkb), ("features.json", features)):
+        with open(os.path.join(tmp, name), "wb") as f:
+            for part in parts:
+                f.write(part)
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(part) for part in parts])
+        prefix = "wkb" if name == "geometry.wkb" else "feature"
+        np.save(os.path.join(tmp, f"{prefix}_offsets.npy"), offsets)
+
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Ein anderer Prozess war schneller → dessen Ergebnis verwenden
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _map_file(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Grid:
+    """
+    Lazily geladenes Raster. Die Daten werden beim ersten Zugriff gemappt,
+    fehlende Binärdateien werden dabei aus der Quelldatei erzeugt.
+    """
+
+    def __init__(self, source, directory):
+        self.source = source
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._tree = None
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if not os.path.exists(os.path.join(self.directory, "feature_offsets.npy")):
+                build_grid(self.source, self.directory)
+            path = self.directory
+            self._bounds = np.load(os.path.join(path, "bounds.npy"), mmap_mode="r")
+            self._wkb = _map_file(os.path.join(path, "geometry.wkb"))
+            self._wkb_offsets = np.load(os.path.join(path, "wkb_offsets.npy"), mmap_mode="r")
+            self._features = _map_file(os.path.join(path, "features.json"))
+            self._feature_offsets = np.load(
+                os.path.join(path, "feature_offsets.npy"), mmap_mode="r")
+            self._loaded = True
+
+    def __len__(self):
+        self._load()
+        return len(self._bounds)
+
+    @property
+    def bounds(self):
+        """Array (N, 4) mit minx, miny, maxx, maxy pro Zelle (read-only, mmap)."""
+        self._load()
+        return self._bounds
+
+    def geometry(self, cell_id):
+        """Shapely-Geometrie einer Zelle."""
+        import shapely
+
+        self._load()
+        start, end = self._wkb_offsets[cell_id], self._wkb_offsets[cell_id + 1]
+        return shapely.from_wkb(bytes(self._wkb[start:end]))
+
+    def geometry_json(self, cell_id):
+        """Vorberechnete GeoJSON-Geometrie einer Zelle (bytes)."""
+        self._load()
+        start, end = self._feature_offsets[cell_id], self._feature_offsets[cell_id + 1]
+        return self._features[start:end]
+
+    def geojson_path(self):
+        """
+        Pfad zur statischen GeoJSON-Datei mit allen Zellen (id = cell_id,
+        ohne Eigenschaften). Fehlt sie, wird sie aus features.json erzeugt.
+        """
+        self._load()
+        path = os.path.join(self.directory, "grid.geojson")
+        if not os.path.exists(path):
+            with self._lock:
+                if not os.path.exists(path):
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "wb") as f:
+                        f.write(b'{"type": "FeatureCollection", "features": [')
+                        for cell_id in range(len(self._bounds)):
+                            if cell_id:
+                                f.write(b", ")
+                            f.write(b'{"id": "%d", "type": "Feature", "properties": {}, "geometry": %s}'
+                                    % (cell_id, self.geometry_json(cell_id)))
+                        f.write(b"]}")
+                    os.replace(tmp_path, path)
+        return path
+
+    def cells_in_bbox(self, bbox):
+        """
+        Zell-IDs (sortiert), deren Geometrie die Bounding Box schneidet.
+        Verwendet einen STRtree, der beim ersten Aufruf aufgebaut wird.
+
+        Args:
+            bbox (Sequence[float]): minx, miny, maxx, maxy in WGS84
+        """
+        import shapely
+
+        self._load()
+        if self._tree is None:
+            with self._lock:
+                if self._tree is None:
+                    offsets = self._wkb_offsets
+                    geometries = shapely.from_wkb([
+                        bytes(self._wkb[start:end])
+                        for start, end in zip(offsets[:-1], offsets[1:])
+                    ])
+                    self._tree = shapely.STRtree(geometries)
+        cell_ids = self._tree.query(shapely.box(*bbox), predicate="intersects")
+        return np.sort(cell_ids)
+
+    def feature_collection(self, cell_ids, counts):
+        """
+        Baut eine GeoJSON-FeatureCollection mit der Eigenschaft 'count' pro Zelle.
+        Das Format entspricht GeoDataFrame.to_json() (id = cell_id als String).
+
+        Args:
+            cell_ids (Iterable[int]): Zell-IDs in Ausgabereihenfolge
+            counts (Iterable[int]): Anzahl Sichtungen pro Zelle
+
+        Returns:
+            str: FeatureCollection als JSON-Text
+        """
+        return (
+            FEATURE_COLLECTION_START + self.features(cell_ids, counts) + FEATURE_COLLECTION_END
+        ).decode("utf-8")
+
+    def features(self, cell_ids, counts):
+        """
+        Features mit der Eigenschaft 'count' als kommagetrennte JSON-bytes,
+        z.B. für blockweise gestreamte FeatureCollections.
+        """
+        return b", ".join(
+            b'{"id": "%d", "type": "Feature", "properties": {"count": %d}, "geometry": %s}'
+            % (cell_id, count, self.geometry_json(cell_id))
+            for cell_id, count in zip(cell_ids, counts)
+        )
+
+
+def pack_counts(sections):
+    """
+    Packt Zählungen pro Zelle in das kompakte Binärformat (alles uint32,
+    little-endian, damit der Client direkt Uint32Array-Sichten anlegen kann):
+
+        Anzahl Abschnitte
+        pro Abschnitt: Grid-Kennung (GRID_CODES), n, n Zell-IDs, n Zählungen
+
+    Args:
+        sections (Iterable[tuple]): (grid_name, cell_ids, counts)
+
+    Returns:
+        bytes
+    """
+    sections = list(sections)
+    parts = [np.array([len(sections)], dtype="<u4").tobytes()]
+    for grid_name, cell_ids, counts in sections:
+        parts.append(np.array([GRID_CODES[grid_name], len(cell_ids)], dtype="<u4").tobytes())
+        parts.append(np.asarray(cell_ids, dtype="<u4").tobytes())
+        parts.append(np.asarray(counts, dtype="<u4").tobytes())
+    return b"".join(parts)
+
+
+grids = {
+    name: Grid(source, os.path.join(GRID_DIR, name))
+    for name, source in GRID_SOURCES.items()
+}
+
+
+if __name__ == "__main__":
+    # Aufruf aus dem Ordner server: python -m app.grids
+    for name, source in GRID_SOURCES.items():
+        target = os.path.join(GRID_DIR, name)
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(GRID_DIR, exist_ok=True)
+        build_grid(source, target)
+        grid = Grid(source, target)
+        grid.geojson_path()
+        print(f"{name}: {len(grid)} Zellen → {target}")
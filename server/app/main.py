@@ -1,16 +1,72 @@
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import (
+    FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
-import geopandas as gpd
+from fastapi.middleware.gzip import GZipMiddleware
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+import asyncio
+import httpx
+import json
 import os
+import time
 from dotenv import load_dotenv
-from scripts.pictures import get_image_for_species, get_wikipedia_summary
+from app.cache import LRUCache, ResponseCache, filter_key, normalize_date
+from app.catalog import Catalog
+from app.snapshot import ALL_DAYS, EPOCH, SNAPSHOT_DIR, day_number, day_range, load_snapshot
+from app.grids import (
+    FEATURE_COLLECTION_END, FEATURE_COLLECTION_START, GRID_CODES, LV95_CODE_OFFSET, grids, pack_counts,
+)
+from app.pyramid import PYRAMID_LEVELS, level_name, pyramid_grids, sql_cell
+from app import metrics
+from app.metrics import MetricsMiddleware, record_filters, record_rows, record_stage, span
+from scripts.pictures import get_image_for_species, get_wikipedia_summary, http_client
+
+# Umgebungsvariablen laden
+load_dotenv()
+DB_PASSWD = os.getenv("DB_PASSWD")
+
+# Asynchroner PostgreSQL-Verbindungspool (psycopg 3), wird beim Start geöffnet
+db_pool = AsyncConnectionPool(
+    make_conninfo(
+        dbname="BirdApp",
+        user="postgres",
+        password=DB_PASSWD,
+        host="localhost",
+        port="5433",
+    ),
+    min_size=1,
+    max_size=10,
+    open=False,
+)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Öffnet den DB-Pool beim Start, lädt Generation, Katalog und Snapshot
+    und schliesst Pool und HTTP-Client beim Beenden.
+    """
+    await db_pool.open()
+    # Katalog vor dem ersten Request laden; schlägt das fehl, lädt ihn der erste Request
+    try:
+        await sync_cache_generation()
+    except Exception as e:
+        print(e)
+    yield
+    await db_pool.close()
+    await http_client.aclose()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS-Konfiguration für Frontend-Kommunikation
 origins = [
@@ -29,91 +85,437 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Umgebungsvariablen laden
-load_dotenv()
-DB_PASSWD = os.getenv("DB_PASSWD")
-
-# PostgreSQL-Verbindungspool
-db_pool = pool.SimpleConnectionPool(
-    minconn=1,
-    maxconn=10,
-    dbname="BirdApp",
-    user="postgres",
-    password=DB_PASSWD,
-    host="localhost",
-    port="5433",
-)
+# Grosse Antworten (GeoJSON, statische Grids) komprimiert ausliefern
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
-# Lade räumliche Rasterdaten
-grid5 = gpd.read_file("data/km_Grid_5_wgs84.gpkg")
-grid1 = gpd.read_file("data/km_Grid_1_wgs84.geojson")
+# Zuletzt hinzugefügt = äusserste Middleware: misst den ganzen Request inkl. Kompression
+app.add_middleware(MetricsMiddleware)
 
 
-def execute_query(query, params=None):
+async def execute_query(query, params=None):
     """
-    Führt eine SQL-Abfrage aus und gibt das Ergebnis zurück.
+    Führt eine SQL-Abfrage aus und gibt das Ergebnis als Liste von Dicts zurück.
     """
-    conn = None
     try:
-        conn = db_pool.getconn()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(query, params or ())
-        conn.commit()
-        return cur.fetchall()
+        started = time.perf_counter()
+        async with db_pool.connection() as conn:
+            record_stage("db_pool_wait", time.perf_counter() - started)
+            async with conn.cursor(row_factory=dict_row) as cur:
+                with span("db_query"):
+                    await cur.execute(query, params or ())
+                    rows = await cur.fetchall()
+                record_rows(len(rows))
+                return rows
     except Exception as e:
         print(e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {e}",
         )
-    finally:
-        if conn:
-            db_pool.putconn(conn)
+
+
+# Zeilen pro fetchmany() beim Streamen grosser Ergebnisse
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 2000))
+# Ergebnisse bis zu so vielen Zeilen werden ganz gelesen, die Verbindung
+# geht vor dem Senden an den Pool zurück
+STREAM_BUFFER_ROWS = int(os.getenv("STREAM_BUFFER_ROWS", 50_000))
+# Höchstens so viele Streams halten gleichzeitig eine Verbindung (Pool: max_size 10),
+# der Rest des Pools bleibt für die übrigen Abfragen frei
+STREAM_CONCURRENCY = int(os.getenv("STREAM_CONCURRENCY", 4))
+stream_slots = asyncio.Semaphore(STREAM_CONCURRENCY)
+
+
+async def stream_rows(query, params=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Führt eine SQL-Abfrage über einen serverseitigen (benannten) Cursor aus und
+    gibt das Ergebnis blockweise (fetchmany) als Listen von Dicts zurück.
+    Bis STREAM_BUFFER_ROWS Zeilen werden die Blöcke gepuffert und erst nach
+    der Rückgabe der Verbindung ausgegeben, sodass ein langsamer Client keine
+    Verbindung belegt. Grössere Ergebnisse werden mit offener Verbindung
+    weitergestreamt, höchstens STREAM_CONCURRENCY gleichzeitig.
+    """
+    buffered = []
+    try:
+        async with stream_slots:
+            started = time.perf_counter()
+            async with db_pool.connection() as conn:
+                record_stage("db_pool_wait", time.perf_counter() - started)
+                async with conn.cursor(name="stream_rows", row_factory=dict_row) as cur:
+                    count = 0
+                    with span("db_query"):
+                        await cur.execute(query, params or ())
+                    while True:
+                        with span("db_query"):
+                            rows = await cur.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        count += len(rows)
+                        if buffered is None:
+                            yield rows
+                        elif count <= STREAM_BUFFER_ROWS:
+                            buffered.append(rows)
+                        else:
+                            # Zu gross zum Puffern → Gepuffertes und Rest direkt senden
+                            for block in buffered + [rows]:
+                                yield block
+                            buffered = None
+                    record_rows(count)
+    except Exception as e:
+        # Die Antwort läuft bereits → Abbruch statt HTTP-Fehler
+        print(e)
+        raise
+
+    for rows in buffered or []:
+        yield rows
+
+
+# Antwort-Cache der Filter-Endpunkte; mit RESPONSE_CACHE_DIR werden aus dem
+# Speicher verdrängte Antworten auf die Festplatte ausgelagert
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", 128 * 1024 * 1024))
+# Gestreamte Antworten werden nur bis zu dieser Grösse zusätzlich gecacht
+RESPONSE_CACHE_MAX_ENTRY = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY", 16 * 1024 * 1024))
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES, os.getenv("RESPONSE_CACHE_DIR") or None)
+
+# Cache für Vektorkacheln, Schlüssel: Filter-Hash + z/x/y
+TILE_CACHE_BYTES = int(os.getenv("TILE_CACHE_BYTES", 64 * 1024 * 1024))
+tile_cache = LRUCache(TILE_CACHE_BYTES)
+
+# Höchstens so oft (Sekunden) wird der Generationszähler in der DB gelesen
+CACHE_GENERATION_INTERVAL = float(os.getenv("CACHE_GENERATION_INTERVAL", 5))
+generation_checked_at = float("-inf")
+# Nur ein Request liest die Generation, gleichzeitige Requests warten auf das Ergebnis
+generation_lock = asyncio.Lock()
+
+# Arten und Familien im Speicher, neu geladen bei jedem Wechsel der Generation
+catalog = Catalog()
+
+# Spaltenweiser Snapshot der Beobachtungen (siehe app/snapshot.py), None = nur SQL
+snapshot = None
+
+
+async def sync_cache_generation():
+    """
+    Liest den Generationszähler aus cache_generation und leert die Caches,
+    wenn updateDb.py seit der letzten Prüfung Daten importiert hat.
+
+    Läuft die Prüfung bereits, warten weitere Aufrufe auf deren Ergebnis,
+    statt mit einer noch unbekannten Generation weiterzuarbeiten. Der
+    Zeitpunkt der Prüfung wird erst nach erfolgreichem Lesen gesetzt;
+    schlägt die Abfrage fehl, versucht es der nächste Aufruf erneut.
+
+    Returns:
+        int: aktuelle Generation
+    """
+    global generation_checked_at, snapshot
+    if time.monotonic() - generation_checked_at < CACHE_GENERATION_INTERVAL:
+        return response_cache.generation
+
+    async with generation_lock:
+        # Während des Wartens von einem anderen Request abgeschlossen
+        if time.monotonic() - generation_checked_at < CACHE_GENERATION_INTERVAL:
+            return response_cache.generation
+
+        rows = await execute_query("SELECT generation FROM cache_generation WHERE id = 1")
+        generation = rows[0]["generation"] if rows else 0
+        if generation != response_cache.generation:
+            response_cache.reset(generation)
+            tile_cache.clear()
+        if generation != catalog.generation:
+            await refresh_catalog(generation)
+
+        # Veralteten Snapshot ersetzen, sobald updateDb.py den neuen exportiert hat
+        if snapshot is None or snapshot.generation != generation:
+            snapshot = await run_in_threadpool(load_snapshot, SNAPSHOT_DIR, snapshot)
+
+        generation_checked_at = time.monotonic()
+        return generation
+
+
+async def refresh_catalog(generation):
+    """Lädt die Tabellen species und family neu in den Katalog."""
+    species_rows = await execute_query("SELECT * FROM species")
+    family_rows = await execute_query("SELECT * FROM family")
+    catalog.load(species_rows, family_rows, generation)
+
+
+async def snapshot_query(compute, date_from=None, date_to=None):
+    """
+    Führt compute(snapshot, first_day, last_day) im Thread-Pool auf dem
+    Snapshot aus (ohne Zeitraum: alle Tage). Gibt None zurück, wenn kein zur
+    aktuellen Generation passender Snapshot geladen ist oder das Datum nicht
+    gelesen werden kann → die Abfrage läuft dann wie bisher über SQL.
+    """
+    current = snapshot
+    if current is None or current.generation != response_cache.generation:
+        return None
+    if date_from is None:
+        first_day, last_day = ALL_DAYS
+    else:
+        try:
+            first_day, last_day = day_range(date_from, date_to)
+        except ValueError:
+            return None
+    with span("snapshot"):
+        return await run_in_threadpool(compute, current, first_day, last_day)
+
+
+def etag_matches(http_request, etag):
+    """True, wenn If-None-Match des Requests das ETag (oder *) enthält."""
+    if_none_match = http_request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags or "*" in tags
+
+
+async def cached_response(
+    http_request, cache, key, compute, media_type="application/json", stream=False
+):
+    """
+    Gibt die Antwort für key aus dem Cache zurück oder berechnet sie mit
+    compute() (Coroutine, liefert bytes) und legt sie ab. Mit stream=True
+    liefert compute() einen asynchronen Iterator von bytes, der direkt als
+    StreamingResponse ausgegeben wird (siehe cache_stream).
+    Das ETag besteht aus Generation und Schlüssel; stimmt es mit If-None-Match
+    überein, wird 304 ohne Inhalt zurückgegeben.
+    """
+    generation = await sync_cache_generation()
+    etag = f'"{generation}-{key.replace("/", "-")}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(http_request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = await cache.aget(key)
+    if body is None:
+        if stream:
+            return StreamingResponse(
+                cache_stream(cache, key, compute()), media_type=media_type, headers=headers)
+        body = await compute()
+        cache.set(key, body)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+async def cache_stream(cache, key, chunks):
+    """
+    Gibt die Teile einer gestreamten Antwort weiter und legt sie danach im
+    Cache ab, sofern sie vollständig und höchstens RESPONSE_CACHE_MAX_ENTRY
+    Bytes gross ist. Grössere Antworten werden nicht zwischengespeichert.
+    """
+    parts, size = [], 0
+    async for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            if size <= RESPONSE_CACHE_MAX_ENTRY:
+                parts.append(chunk)
+            else:
+                parts = None
+        yield chunk
+    if parts is not None:
+        cache.set(key, b"".join(parts))
+
+
+def json_bytes(content):
+    """Serialisiert content wie JSONResponse (inkl. datetime usw.) zu bytes."""
+    with span("serialization"):
+        return json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Messwerte (Dauer, Grösse, Schritte pro Endpunkt) im Prometheus-Textformat."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/getSpecies/")
-async def get_species():
-    """Gibt alle Arten aus der Tabelle 'species' zurück."""
-    return execute_query("SELECT * FROM species")
+async def get_species(http_request: Request):
+    """Gibt alle Arten aus der Tabelle 'species' zurück (aus dem Katalog)."""
+    await sync_cache_generation()
+    return catalog_response(http_request, catalog.species_list)
 
 
 @app.get("/getFamilies/")
-async def get_families():
-    """Gibt alle Familien aus der Tabelle 'family' zurück."""
-    return execute_query("SELECT * FROM family")
+async def get_families(http_request: Request):
+    """Gibt alle Familien aus der Tabelle 'family' zurück (aus dem Katalog)."""
+    await sync_cache_generation()
+    return catalog_response(http_request, catalog.families_list)
+
+
+def catalog_response(http_request, list_body):
+    """
+    Antwort mit einer fertig serialisierten Liste des Katalogs (ListBody).
+    Clients mit gzip-Unterstützung erhalten direkt die vorkomprimierte
+    Variante, bei passendem If-None-Match wird 304 zurückgegeben.
+    """
+    headers = {"ETag": list_body.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(http_request, list_body.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if "gzip" in http_request.headers.get("accept-encoding", ""):
+        return Response(
+            content=list_body.gzipped, media_type="application/json",
+            headers={**headers, "Content-Encoding": "gzip"})
+    return Response(content=list_body.body, media_type="application/json", headers=headers)
 
 
 @app.get("/getObservationsTimeline/")
-async def get_observations_timeline(date_from: str, date_to: str, speciesids: str):
+async def get_observations_timeline(
+    http_request: Request,
+    date_from: str,
+    date_to: str,
+    speciesids: str,
+    bucket: Optional[str] = None,
+    by_species: bool = False,
+):
     """
     Gibt Beobachtungsanzahl pro Tag für bestimmte Arten im Zeitraum zurück.
+
+    Mit bucket ("day", "week" oder "month") und/oder by_species=true wird
+    eine lückenlose, nach Datum sortierte Zeitreihe in Spaltenform geliefert
+    (Zeitschritte ohne Sichtungen mit 0):
+
+        {"bucket": "week", "dates": ["2024-01-01", ...], "counts": [...],
+         "series": [{"speciesid": 1, "counts": [...]}, ...]}
+
+    "series" (eine Reihe pro Art) ist nur mit by_species=true enthalten.
     """
-    speciesid_list = speciesids.split(",")
-    placeholders = ",".join(["%s"] * len(speciesid_list))
-    sql = f"""
-        SELECT COUNT(o.*) AS count, o.date
-        FROM observations o
-        JOIN species s ON o.speciesid = s.speciesid
-        WHERE o.date BETWEEN %s AND %s
-          AND s.speciesid IN ({placeholders})
-        GROUP BY o.date
-        ORDER BY count DESC
+    speciesid_list = parse_id_list(speciesids, "speciesids")
+    record_filters(
+        speciesids=speciesid_list, date_from=date_from, date_to=date_to,
+        bucket=bucket, by_species=by_species,
+    )
+    columnar = bucket is not None or by_species
+    if columnar:
+        bucket = bucket or "day"
+        if bucket not in FRAME_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='bucket muss "day", "week" oder "month" sein',
+            )
+    elif not speciesid_list:
+        return []
+    key = filter_key(
+        endpoint="getObservationsTimeline", speciesids=speciesid_list,
+        date_from=normalize_date(date_from), date_to=normalize_date(date_to),
+        bucket=bucket, by_species=by_species,
+    )
+
+    if columnar:
+        return await cached_response(
+            http_request, response_cache, key,
+            lambda: timeline_series_body(speciesid_list, date_from, date_to, bucket, by_species))
+
+    async def compute():
+        days = await snapshot_query(
+            lambda snap, first, last: snap.timeline(speciesid_list, first, last), date_from, date_to)
+        if days is not None:
+            rows = [
+                {"count": count, "date": datetime.combine(EPOCH + timedelta(days=day), datetime.min.time())}
+                for day, count in zip(days[0].tolist(), days[1].tolist())
+            ]
+            rows.sort(key=lambda row: row["count"], reverse=True)
+            return json_bytes(rows)
+
+        placeholders = ",".join(["%s"] * len(speciesid_list))
+        sql = f"""
+            SELECT SUM(r.count) AS count, r.day::timestamp AS date
+            FROM obs_daily_cells r
+            WHERE r.day BETWEEN %s::timestamp AND %s::timestamp
+              AND r.speciesid IN ({placeholders})
+            GROUP BY r.day
+            ORDER BY count DESC
+        """
+        params = [date_from, date_to] + speciesid_list
+        return json_bytes(await execute_query(sql, params))
+
+    return await cached_response(http_request, response_cache, key, compute)
+
+
+# Schrittweite der Zeitschritte für generate_series
+BUCKET_INTERVALS = {"day": "1 day", "week": "1 week", "month": "1 month"}
+
+
+async def timeline_series_body(species_ids, date_from, date_to, bucket, by_species):
     """
-    params = [date_from, date_to] + speciesid_list
-    return execute_query(sql, params)
+    Berechnet die Spaltenform von /getObservationsTimeline/ als JSON-bytes.
+    Die Zeitschritte kommen aus generate_series (bzw. bucket_starts beim
+    Snapshot), fehlende Kombinationen aus Zeitschritt und Art werden mit 0
+    aufgefüllt.
+    """
+    species_ids = sorted(set(species_ids))
+    frames = bucket_starts(parse_date(date_from, "date_from"), parse_date(date_to, "date_to"), bucket)
+    counts = None
+
+    if species_ids:
+        counts = await snapshot_query(
+            lambda snap, first, last: snap.bucket_counts(
+                species_ids, first, last, [day_number(frame) for frame in frames]),
+            date_from, date_to)
+
+    if species_ids and counts is None:
+        rows = await execute_query(
+            """
+            WITH buckets AS (
+                SELECT generate_series(
+                    date_trunc(%s, %s::timestamp), %s::timestamp, %s::interval
+                )::date AS bucket
+            ), counts AS (
+                SELECT date_trunc(%s, r.day::timestamp)::date AS bucket, r.speciesid,
+                       SUM(r.count) AS count
+                FROM obs_daily_cells r
+                WHERE r.day BETWEEN %s::timestamp AND %s::timestamp
+                  AND r.speciesid = ANY(%s)
+                GROUP BY 1, 2
+            )
+            SELECT b.bucket, s.speciesid, COALESCE(c.count, 0) AS count
+            FROM buckets b
+            CROSS JOIN unnest(%s::int[]) AS s(speciesid)
+            LEFT JOIN counts c ON c.bucket = b.bucket AND c.speciesid = s.speciesid
+            ORDER BY b.bucket, s.speciesid
+        """,
+            [bucket, date_from, date_to, BUCKET_INTERVALS[bucket],
+             bucket, date_from, date_to, species_ids, species_ids],
+        )
+        position = {frame: index for index, frame in enumerate(frames)}
+        counts = {speciesid: [0] * len(frames) for speciesid in species_ids}
+        for row in rows:
+            if row["bucket"] in position:
+                counts[row["speciesid"]][position[row["bucket"]]] = row["count"]
+
+    counts = counts or {}
+    body = {
+        "bucket": bucket,
+        "dates": [frame.isoformat() for frame in frames],
+        "counts": [sum(values) for values in zip(*counts.values())] if counts else [0] * len(frames),
+    }
+    if by_species:
+        body["series"] = [
+            {"speciesid": speciesid, "counts": values} for speciesid, values in counts.items()]
+    return json_bytes(body)
 
 
 @app.get("/getImage/")
-def get_image(species: str):
+async def get_image(species: str):
     """Lädt ein Bild zur übergebenen Art (über Wikipedia Commons)."""
-    image_url = get_image_for_species(species)
+    try:
+        with span("wikipedia"):
+            image_url = await get_image_for_species(species)
+    except httpx.HTTPError as e:
+        print(e)
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Wikipedia nicht erreichbar")
     return JSONResponse(content={"image_url": image_url})
 
 
 @app.get("/getText/")
-def get_text(species: str):
+async def get_text(species: str):
     """Gibt eine Kurzbeschreibung der Art zurück (Wikipedia)."""
-    text_data = get_wikipedia_summary(species)
+    try:
+        with span("wikipedia"):
+            text_data = await get_wikipedia_summary(species)
+    except httpx.HTTPError as e:
+        print(e)
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Wikipedia nicht erreichbar")
     return JSONResponse(content=text_data)
 
 
@@ -122,120 +524,577 @@ class GeoJsonRequest(BaseModel):
     familiesIds: Optional[List[int]] = []
     date_from: str
     date_to: str
+    # Optional: sichtbarer Kartenausschnitt (minx, miny, maxx, maxy in WGS84) und Zoomstufe
+    bbox: Optional[List[float]] = None
+    zoom: Optional[float] = None
+    # "geojson" (FeatureCollections) oder "binary" (nur Zell-IDs und Zählungen, siehe pack_counts)
+    format: Optional[str] = "geojson"
+    # Optional: Stufe des LV95-Rasters in km (1, 2, 5, 10 oder 25) statt grid1/grid5
+    resolution_km: Optional[int] = None
+
+
+# Ab dieser Zoomstufe zeigt die Karte das 1-km-Raster, darunter das 5-km-Raster
+GRID1_MIN_ZOOM = 9
+
+# Stufen des LV95-Rasters (app/pyramid.py) als weitere Grids "lv95_<km>"
+grids.update(pyramid_grids)
+GRID_CODES.update({name: LV95_CODE_OFFSET + grid.km for name, grid in pyramid_grids.items()})
+
+# SQL-Ausdruck für die Zelle pro Grid auf obs_daily_cells r
+GRID_COLUMNS = {
+    "grid1": "r.cell1",
+    "grid5": "r.cell5",
+    **{level_name(km): sql_cell(km) for km in PYRAMID_LEVELS},
+}
+
+# Spalte im Snapshot und Stufe der Pyramide (None = Zellen direkt) pro Grid
+SNAPSHOT_CELLS = {
+    "grid1": ("cell1", None),
+    "grid5": ("cell5", None),
+    **{level_name(km): ("cell_lv95", km) for km in PYRAMID_LEVELS},
+}
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+
+@app.get("/grids/{grid_name}.geojson")
+async def get_grid_geometry(grid_name: str):
+    """
+    Gibt alle Zellen eines Grids (grid1 oder grid5) als GeoJSON zurück (id = cell_id).
+    Die Datei ändert sich nicht und kann vom Client dauerhaft gecacht werden;
+    die Zählungen kommen dann im Binärformat von /getGeojson/.
+    """
+    if grid_name not in grids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grid nicht gefunden")
+    path = await run_in_threadpool(grids[grid_name].geojson_path)
+    return FileResponse(
+        path,
+        media_type="application/geo+json",
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
 
 
 @app.post("/getGeojson/")
-def get_geojson(request: GeoJsonRequest):
+async def get_geojson(request: GeoJsonRequest, http_request: Request):
     """
     Gibt für gewählte Arten/Familien und Zeitraum ein Grid zurück.
+    Mit zoom wird nur das passende Grid (grid1 oder grid5) geliefert,
+    mit bbox nur die Zellen, die den Kartenausschnitt schneiden.
+    Mit format="binary" enthält die Antwort nur Zell-IDs und Zählungen
+    (Geometrie über /grids/{grid_name}.geojson).
+    Antworten werden pro Filter gecacht (siehe cached_response).
     """
-    response = {}
+    record_filters(
+        speciesids=request.speciesids, familiesIds=request.familiesIds,
+        date_from=request.date_from, date_to=request.date_to,
+        bbox=request.bbox, zoom=request.zoom, format=request.format,
+    )
+    if request.bbox is not None and len(request.bbox) != 4:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="bbox muss aus minx, miny, maxx, maxy bestehen",
+        )
+    if request.format not in ("geojson", "binary"):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='format muss "geojson" oder "binary" sein',
+        )
 
-    # Wenn keine Filter gesetzt sind → leere Grids zurückgeben
-    if not request.speciesids and not request.familiesIds:
-        response["grid1"] = grid1[["geometry"]].copy()
-        response["grid1"]["count"] = 0
-        response["grid1"] = response["grid1"][0:0].to_json()  # komplett leer
+    if request.resolution_km is not None:
+        grid_names = [pyramid_grid_name(request.resolution_km)]
+    elif request.zoom is None:
+        grid_names = ["grid1", "grid5"]
+    elif request.zoom >= GRID1_MIN_ZOOM:
+        grid_names = ["grid1"]
+    else:
+        grid_names = ["grid5"]
 
-        response["grid5"] = grid5[["geometry"]].copy()
-        response["grid5"]["count"] = 0
-        response["grid5"] = response["grid5"][0:0].to_json()
+    # Zoomstufen mit demselben Grid teilen sich einen Cache-Eintrag
+    key = filter_key(
+        endpoint="getGeojson",
+        speciesids=request.speciesids or [], familiesIds=request.familiesIds or [],
+        date_from=normalize_date(request.date_from), date_to=normalize_date(request.date_to),
+        grids=",".join(grid_names),
+        bbox=None if request.bbox is None else ",".join(repr(v) for v in request.bbox),
+        format=request.format,
+    )
+    if request.format == "binary":
+        return await cached_response(
+            http_request, response_cache, key,
+            lambda: binary_counts_body(request, grid_names), BINARY_MEDIA_TYPE)
+    return await cached_response(
+        http_request, response_cache, key,
+        lambda: geojson_chunks(request, grid_names), stream=True)
 
-        return JSONResponse(content=response)
 
-    # Andernfalls SQL zusammenbauen
-    where_clause = []
-    params = []
+def pyramid_grid_name(resolution_km):
+    """Name der Stufe des LV95-Rasters zu resolution_km (422 bei unbekannter Stufe)."""
+    if resolution_km not in PYRAMID_LEVELS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"resolution_km muss einer der Werte {', '.join(map(str, PYRAMID_LEVELS))} sein",
+        )
+    return level_name(resolution_km)
+
+
+async def visible_cells(request, grid_names):
+    """Sichtbare Zellen pro Grid über den räumlichen Index (None ohne bbox)."""
+    if request.bbox is None:
+        return None
+    with span("bbox_lookup"):
+        return {
+            name: await run_in_threadpool(grids[name].cells_in_bbox, request.bbox)
+            for name in grid_names
+        }
+
+
+async def geojson_chunks(request, grid_names):
+    """
+    Streamt die Antwort von /getGeojson/: {"grid5": "<FeatureCollection>"}.
+    Die Zählungen pro Zelle kommen aus dem Snapshot oder aus einer Abfrage pro
+    Grid (gleichzeitig, sql_grid_counts) und werden blockweise als Features
+    ausgegeben, sodass die FeatureCollection nie vollständig im Speicher liegt.
+    """
+    # Die FeatureCollection steht als JSON-String in der Antwort → Teile maskieren
+    def escape(part):
+        return json.dumps(part.decode("utf-8"), ensure_ascii=False)[1:-1].encode("utf-8")
+
+    # Wenn keine Filter gesetzt sind (oder die Familien keine Arten haben) → leere Grids zurückgeben
+    species_ids = resolve_species_ids(request.speciesids, request.familiesIds)
+    if not species_ids:
+        yield json_bytes({name: grids[name].feature_collection([], []) for name in grid_names})
+        return
+
+    counts = await grid_counts(species_ids, request, grid_names)
 
-    if request.speciesids:
-        placeholders = ",".join(["%s"] * len(request.speciesids))
-        where_clause.append(f"s.speciesid IN ({placeholders})")
-        params.extend(request.speciesids)
+    yield b"{"
+    for position, name in enumerate(grid_names):
+        # Immer eine FeatureCollection, ohne Sichtungen mit leerer features-Liste
+        yield (b"," if position else b"") + b'"%s":"' % name.encode("utf-8") \
+            + escape(FEATURE_COLLECTION_START)
+        separator = b""
+        cell_ids, cell_counts = counts[name]
+        for start in range(0, len(cell_ids), STREAM_BATCH_SIZE):
+            end = start + STREAM_BATCH_SIZE
+            with span("grid_join"):
+                features = await run_in_threadpool(
+                    grids[name].features, cell_ids[start:end], cell_counts[start:end])
+            yield escape(separator + features)
+            separator = b", "
+        yield escape(FEATURE_COLLECTION_END) + b'"'
+    yield b"}"
 
-    if request.familiesIds:
-        placeholders = ",".join(["%s"] * len(request.familiesIds))
-        where_clause.append(f"s.family_id IN ({placeholders})")
-        params.extend(request.familiesIds)
 
-    where_sql = " OR ".join(where_clause)
+async def grid_counts(species_ids, request, grid_names):
+    """
+    Zählungen pro Zelle für /getGeojson/: {grid: (sortierte Zell-IDs, Zählungen)},
+    aus dem Snapshot, falls er aktuell ist, sonst aus den Tagesaggregaten.
+    """
+    visible = await visible_cells(request, grid_names)
+    counts = await snapshot_grid_counts(species_ids, request, grid_names, visible)
+    if counts is None:
+        counts = await sql_grid_counts(species_ids, request, grid_names, visible)
+    return counts
+
+
+async def snapshot_grid_counts(species_ids, request, grid_names, visible):
+    """
+    Zählungen pro Zelle aus dem Snapshot für alle Grids, parallel gezählt
+    (Snapshot.grid_counts): {grid: (Zell-IDs, Zählungen)}, None ohne aktuellen Snapshot.
+    """
+    specs = []
+    for name in grid_names:
+        column, km = SNAPSHOT_CELLS[name]
+        specs.append((column, None if visible is None else visible[name], km))
+    counts = await snapshot_query(
+        lambda snap, first, last: snap.grid_counts(species_ids, first, last, specs),
+        request.date_from, request.date_to)
+    return None if counts is None else dict(zip(grid_names, counts))
+
+
+async def sql_grid_counts(species_ids, request, grid_names, visible):
+    """
+    Zählungen pro Zelle aus den Tagesaggregaten (obs_daily_cells): eine
+    Abfrage pro Grid, gleichzeitig über den Pool ausgeführt (asyncio.gather).
+    Returns: {grid: (sortierte Zell-IDs, Zählungen)}
+    """
+    join_sql, where_sql, filter_params = species_filter(species_ids)
+
+    async def count(name):
+        column = GRID_COLUMNS[name]
+        params = filter_params + [request.date_from, request.date_to]
+        viewport_sql = ""
+        if visible is not None:
+            viewport_sql = f"AND {column} = ANY(%s)"
+            params.append(visible[name].tolist())
+
+        sql = f"""
+            SELECT {column} AS cell_id, SUM(r.count) AS count
+            FROM obs_daily_cells r
+            {join_sql}
+            WHERE ({where_sql})
+              AND r.day BETWEEN %s::timestamp AND %s::timestamp
+              AND {column} IS NOT NULL
+              {viewport_sql}
+            GROUP BY 1
+            ORDER BY 1
+        """
+        rows = await execute_query(sql, params)
+        return [row["cell_id"] for row in rows], [row["count"] for row in rows]
+
+    counts = await asyncio.gather(*(count(name) for name in grid_names))
+    return dict(zip(grid_names, counts))
+
+
+async def binary_counts_body(request, grid_names):
+    """Berechnet die Antwort von /getGeojson/ im Binärformat (pack_counts)."""
+    # Wenn keine Filter gesetzt sind (oder die Familien keine Arten haben) → leere Grids zurückgeben
+    species_ids = resolve_species_ids(request.speciesids, request.familiesIds)
+    if not species_ids:
+        return pack_counts((name, [], []) for name in grid_names)
+
+    counts = await grid_counts(species_ids, request, grid_names)
+    with span("serialization"):
+        return pack_counts((name, *counts[name]) for name in grid_names)
+
+
+# Ab so vielen Arten wird die Liste gejoint statt mit = ANY(...) gefiltert
+SPECIES_JOIN_THRESHOLD = int(os.getenv("SPECIES_JOIN_THRESHOLD", 500))
+
+
+def resolve_species_ids(speciesids, familiesIds):
+    """
+    Arten ODER Familien als sortierte Liste von speciesids. Die Familien
+    werden über den Katalog in ihre Arten aufgelöst, damit die Abfragen
+    ohne Join auf species auskommen.
+    """
+    species_ids = set(speciesids or [])
+    species_ids.update(catalog.family_species_ids(familiesIds or []))
+    return sorted(species_ids)
+
+
+def species_filter(species_ids):
+    """
+    Baut den Filter auf die Arten für obs_daily_cells r.
+    Bis SPECIES_JOIN_THRESHOLD Arten: r.speciesid = ANY(%s) (Index-Suche),
+    darüber ein Join auf die als Relation entpackte Liste (Hash-Join).
+
+    Returns:
+        tuple: (Join-SQL nach FROM, SQL-Bedingung, Parameterliste)
+    """
+    if len(species_ids) > SPECIES_JOIN_THRESHOLD:
+        join_sql = "JOIN unnest(%s::int[]) AS f(speciesid) ON f.speciesid = r.speciesid"
+        return join_sql, "TRUE", [list(species_ids)]
+    return "", "r.speciesid = ANY(%s)", [list(species_ids)]
+
+
+def parse_id_list(value, name):
+    """Wandelt eine kommagetrennte ID-Liste ("1,2,3") in eine Liste von int um."""
+    if not value:
+        return []
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{name} muss eine kommagetrennte Liste von IDs sein",
+        )
+
+
+class FramesRequest(BaseModel):
+    # Gleiche Filter wie GeoJsonRequest, aber immer NDJSON (kein "format");
+    # unbekannte Felder werden mit 422 abgelehnt statt ignoriert
+    model_config = ConfigDict(extra="forbid")
+
+    speciesids: Optional[List[int]] = []
+    familiesIds: Optional[List[int]] = []
+    date_from: str
+    date_to: str
+    bbox: Optional[List[float]] = None
+    zoom: Optional[float] = None
+    resolution_km: Optional[int] = None
+    # Zeitschritt pro Frame: "day", "week" (ab Montag) oder "month"
+    bucket: str = "week"
+
+
+FRAME_BUCKETS = ("day", "week", "month")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def bucket_start(day, bucket):
+    """Erster Tag des Zeitschritts, in dem day liegt (wie date_trunc in PostgreSQL)."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+# Höchstens so viele Zeitschritte pro Antwort (/getObservationsTimeline/, /getFrames/)
+MAX_BUCKETS = int(os.getenv("MAX_BUCKETS", 3660))
+
+
+def bucket_starts(date_from, date_to, bucket):
+    """
+    Alle Zeitschritte (erster Tag) von date_from bis date_to.
+    Mehr als MAX_BUCKETS Zeitschritte werden mit 422 abgelehnt.
+    """
+    starts = []
+    day = bucket_start(date_from, bucket)
+    while day <= date_to:
+        if len(starts) == MAX_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Höchstens {MAX_BUCKETS} Zeitschritte, bitte Zeitraum verkürzen "
+                       f"oder einen gröberen bucket wählen",
+            )
+        starts.append(day)
+        if bucket == "month":
+            day = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            day += timedelta(days=7 if bucket == "week" else 1)
+    return starts
+
+
+def parse_date(value, name):
+    """Liest ein ISO-Datum (auch mit Uhrzeit/Zeitzone) und gibt den Tag zurück."""
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{name} muss ein ISO-Datum sein",
+        )
+
+
+@app.post("/getFrames/")
+async def get_frames(request: FramesRequest):
+    """
+    Gibt für eine Animation die Anzahl Sichtungen pro Zelle für jeden Zeitschritt
+    (bucket) im Zeitraum zurück. Alle Frames werden in einer einzigen Abfrage
+    aggregiert und als NDJSON gestreamt, eine Zeile pro Frame:
+
+        {"frame": "2024-05-06", "cells": [Zell-IDs], "counts": [Zählungen]}
+
+    Auch Zeitschritte ohne Sichtungen erhalten eine (leere) Zeile. Das Grid
+    wird wie bei /getGeojson/ über resolution_km oder zoom gewählt (ohne
+    beides: grid5) und im Header X-Grid angegeben, die Geometrie kommt aus
+    /grids/{grid_name}.geojson.
+    """
+    record_filters(
+        speciesids=request.speciesids, familiesIds=request.familiesIds,
+        date_from=request.date_from, date_to=request.date_to,
+        bbox=request.bbox, zoom=request.zoom, resolution_km=request.resolution_km,
+        bucket=request.bucket,
+    )
+    if request.bucket not in FRAME_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='bucket muss "day", "week" oder "month" sein',
+        )
+    if request.bbox is not None and len(request.bbox) != 4:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="bbox muss aus minx, miny, maxx, maxy bestehen",
+        )
+
+    frames = bucket_starts(
+        parse_date(request.date_from, "date_from"),
+        parse_date(request.date_to, "date_to"),
+        request.bucket,
+    )
+    if request.resolution_km is not None:
+        grid_name = pyramid_grid_name(request.resolution_km)
+    elif request.zoom is not None and request.zoom >= GRID1_MIN_ZOOM:
+        grid_name = "grid1"
+    else:
+        grid_name = "grid5"
+    cell_column = GRID_COLUMNS[grid_name]
+    headers = {"X-Grid": grid_name}
+
+    # Ohne Filter (oder Familien ohne Arten) → nur leere Frames
+    species_ids = []
+    if request.speciesids or request.familiesIds:
+        await sync_cache_generation()
+        species_ids = resolve_species_ids(request.speciesids, request.familiesIds)
+    if not species_ids:
+        return StreamingResponse(
+            frame_lines(None, None, frames), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    join_sql, where_sql, params = species_filter(species_ids)
+    params = [request.bucket] + params + [request.date_from, request.date_to]
+
+    viewport_sql = ""
+    if request.bbox is not None:
+        with span("bbox_lookup"):
+            visible = await run_in_threadpool(grids[grid_name].cells_in_bbox, request.bbox)
+        viewport_sql = f"AND {cell_column} = ANY(%s)"
+        params.append(visible.tolist())
+
     sql = f"""
-        SELECT o.*
-        FROM observations o
-        JOIN species s ON o.speciesid = s.speciesid
+        SELECT date_trunc(%s, r.day::timestamp)::date AS frame,
+               {cell_column} AS cell_id,
+               SUM(r.count) AS count
+        FROM obs_daily_cells r
+        {join_sql}
         WHERE ({where_sql})
-          AND o.date BETWEEN %s AND %s
+          AND r.day BETWEEN %s::timestamp AND %s::timestamp
+          AND {cell_column} IS NOT NULL
+          {viewport_sql}
+        GROUP BY 1, 2
+        ORDER BY 1, 2
     """
-    params += [request.date_from, request.date_to]
+    return StreamingResponse(
+        frame_lines(sql, params, frames), media_type=NDJSON_MEDIA_TYPE, headers=headers)
 
-    # Lade Sichtungen als GeoDataFrame
-    conn = db_pool.getconn()
-    try:
-        sightings = gpd.GeoDataFrame.from_postgis(sql, conn, params=params)
-    finally:
-        db_pool.putconn(conn)
 
-    # Wenn keine Sichtungen → Geometrien ohne Zählung zurückgeben
-    if sightings.empty:
-        return JSONResponse(content={"grid1": [], "grid5": []})
+async def frame_lines(sql, params, frames):
+    """
+    Liest die nach Frame sortierten Zeilen blockweise (stream_rows) und gibt pro Frame eine NDJSON-Zeile aus, sobald der Frame vollständig ist.
+    Frames ohne Zeilen werden leer ergänzt.
+    """
+    def line(frame, cells, counts):
+        return json.dumps(
+            {"frame": frame.isoformat(), "cells": cells, "counts": counts},
+            separators=(",", ":"),
+        ) + "\n"
+
+    index = 0
+    if sql is not None:
+        current, cells, counts = None, [], []
+        async for rows in stream_rows(sql, params):
+            for row in rows:
+                frame = row["frame"]
+                if frame != current:
+                    if current is not None:
+                        yield line(current, cells, counts)
+                    while index < len(frames) and frames[index] < frame:
+                        yield line(frames[index], [], [])
+                        index += 1
+                    if index < len(frames) and frames[index] == frame:
+                        index += 1
+                    current, cells, counts = frame, [], []
+                cells.append(row["cell_id"])
+                counts.append(row["count"])
+        if current is not None:
+            yield line(current, cells, counts)
+
+    for frame in frames[index:]:
+        yield line(frame, [], [])
 
-    # Zähle Sichtungen pro Zelle (grid)
-    def count_points_per_cell(grid, sightings):
-        if "id" not in grid.columns:
-            grid["id"] = grid.index
-        joined = gpd.sjoin(grid, sightings, how="inner", predicate="contains")
-        counts = joined.groupby("id").size().rename("count").reset_index()
-        grid = grid.merge(counts, on="id", how="left")
-        grid["count"] = grid["count"].fillna(0).astype(int)
-        return grid[grid["count"] > 0][["geometry", "count"]]
 
-    response["grid1"] = count_points_per_cell(grid1, sightings).to_json()
-    response["grid5"] = count_points_per_cell(grid5, sightings).to_json()
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
 
-    return JSONResponse(content=response)
+
+@app.get("/tiles/{z}/{x}/{y}.pbf")
+async def get_tile(
+    http_request: Request,
+    z: int,
+    x: int,
+    y: int,
+    date_from: str,
+    date_to: str,
+    speciesids: Optional[str] = None,
+    familiesIds: Optional[str] = None,
+):
+    """
+    Gibt eine Mapbox-Vektorkachel (Layer 'density') mit der Anzahl Sichtungen
+    pro Rasterzelle zurück. Ab Zoomstufe 9 wird das 1-km-Raster verwendet,
+    darunter das 5-km-Raster. Filter wie bei /getGeojson/ (IDs kommagetrennt).
+    """
+    species_list = parse_id_list(speciesids, "speciesids")
+    family_list = parse_id_list(familiesIds, "familiesIds")
+    record_filters(
+        speciesids=species_list, familiesIds=family_list,
+        date_from=date_from, date_to=date_to, tile=f"{z}/{x}/{y}",
+    )
+    if not species_list and not family_list:
+        return Response(content=b"", media_type=MVT_MEDIA_TYPE)
+
+    grid_name = "grid1" if z >= GRID1_MIN_ZOOM else "grid5"
+    cell_column = GRID_COLUMNS[grid_name]
+    key = filter_key(
+        speciesids=species_list, familiesIds=family_list,
+        date_from=normalize_date(date_from), date_to=normalize_date(date_to),
+    ) + f"/{z}/{x}/{y}"
+
+    async def compute():
+        species_ids = resolve_species_ids(species_list, family_list)
+        if not species_ids:
+            return b""
+        join_sql, where_sql, params = species_filter(species_ids)
+        sql = f"""
+            WITH bounds AS (
+                SELECT ST_TileEnvelope(%s, %s, %s) AS envelope
+            ), cells AS (
+                SELECT g.cell_id, g.geom
+                FROM {grid_name} g, bounds b
+                WHERE g.geom && ST_Transform(b.envelope, 4326)
+            ), counts AS (
+                SELECT {cell_column} AS cell_id, SUM(r.count) AS count
+                FROM obs_daily_cells r
+                {join_sql}
+                WHERE ({where_sql})
+                  AND r.day BETWEEN %s::timestamp AND %s::timestamp
+                  AND {cell_column} IN (SELECT cell_id FROM cells)
+                GROUP BY 1
+            ), mvt AS (
+                SELECT c.cell_id, k.count,
+                       ST_AsMVTGeom(ST_Transform(c.geom, 3857), b.envelope) AS geom
+                FROM counts k
+                JOIN cells c ON c.cell_id = k.cell_id, bounds b
+            )
+            SELECT ST_AsMVT(mvt, 'density', 4096, 'geom') AS tile FROM mvt
+        """
+        rows = await execute_query(sql, [z, x, y] + params + [date_from, date_to])
+        return bytes(rows[0]["tile"] or b"")
+
+    return await cached_response(http_request, tile_cache, key, compute, MVT_MEDIA_TYPE)
 
 
 @app.get("/getHoehenDiagramm")
-def getHoehenDiagramm(species: str):
+async def getHoehenDiagramm(species: str):
     """
     Gibt Häufigkeit der Sichtungen in Höhenklassen (500m-Stufen) zurück.
     """
-    conn = db_pool.getconn()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(
-                "SELECT speciesid FROM species WHERE latinname = %s", (species,)
-            )
-            result = cursor.fetchone()
-            if not result:
-                return JSONResponse(
-                    content={"error": "Art nicht gefunden"}, status_code=404
-                )
-            speciesid = result[0]
-
-        with conn.cursor() as cursor:
-            cursor.execute(
+    await sync_cache_generation()
+    result = catalog.species(species)
+    if result is None:
+        return JSONResponse(
+            content={"error": "Art nicht gefunden"}, status_code=404
+        )
+    speciesid = result["speciesid"]
+
+    counts = await snapshot_query(
+        lambda snap, first, last: snap.elevation_counts([speciesid], first, last, 500))
+    if counts is not None:
+        data = [
+            {"elevation": f"{band * 500}-{band * 500 + 499}", "count": counts[band]}
+            for band in sorted(counts)
+        ]
+        return JSONResponse(content=data)
+
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
                 """
                 SELECT
                     CONCAT(
-                        FLOOR(ST_Z(geom) / 500) * 500,
+                        FLOOR(elevation_band / 5.0) * 500,
                         '-',
-                        FLOOR(ST_Z(geom) / 500) * 500 + 499
+                        FLOOR(elevation_band / 5.0) * 500 + 499
                     ) AS elevation_label,
-                    COUNT(*) AS count
-                FROM observations
-                WHERE ST_Z(geom) IS NOT NULL
-                    AND speciesid = %s
-                GROUP BY FLOOR(ST_Z(geom) / 500)
-                ORDER BY FLOOR(ST_Z(geom) / 500)
+                    SUM(count) AS count
+                FROM obs_daily_elevation
+                WHERE speciesid = %s
+                GROUP BY FLOOR(elevation_band / 5.0)
+                ORDER BY FLOOR(elevation_band / 5.0)
             """,
                 (speciesid,),
             )
-            rows = cursor.fetchall()
+            rows = await cursor.fetchall()
 
-        data = [{"elevation": row[0], "count": row[1]} for row in rows]
-
-    finally:
-        db_pool.putconn(conn)
+    data = [{"elevation": row[0], "count": row[1]} for row in rows]
 
     return JSONResponse(content=data)
 
@@ -257,47 +1116,190 @@ COVERAGE_DATA = [
 
 
 @app.get("/getLandcover/")
-def get_landcover_timeline(latinName: Optional[str] = None):
+async def get_landcover_timeline(http_request: Request, latinName: Optional[str] = None):
     """
     Gibt Beobachtungsanzahl nach Landbedeckung zurück.
     """
-    conn = db_pool.getconn()
-    try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            params = []
-            species_filter = ""
-
-            if latinName:
-                names = [name.strip() for name in latinName.split(",")]
-                placeholders = ",".join(["%s"] * len(names))
-                species_filter = f"AND s.latinname IN ({placeholders})"
-                params.extend(names)
-
-            cursor.execute(
-                f"""
-                SELECT 
-                    o.landcover,
-                    COUNT(*) AS count
-                FROM observations o
-                JOIN species s ON o.speciesid = s.speciesid
-                WHERE o.landcover IS NOT NULL
-                    {species_filter}
-                GROUP BY o.landcover
-            """,
-                params,
-            )
+    names = [name.strip() for name in latinName.split(",")] if latinName else []
+    record_filters(latinName=names)
+    key = filter_key(endpoint="getLandcover", latinName=names)
+    return await cached_response(
+        http_request, response_cache, key, lambda: landcover_body(names))
+
+
+async def landcover_body(names):
+    """Berechnet die Antwort von /getLandcover/ als JSON-bytes."""
+    params = []
+    species_filter = ""
+
+    # Namen → speciesids über den Katalog (cached_response hat ihn aktualisiert)
+    if names:
+        species_filter = "AND r.speciesid = ANY(%s)"
+        params.append(catalog.species_ids(names))
+
+    rows = []
+    snapshot_counts = None
+    if names and params[0]:
+        snapshot_counts = await snapshot_query(
+            lambda snap, first, last: snap.landcover_counts(params[0], first, last))
+    if snapshot_counts is not None:
+        rows = [{"landcover": key, "count": count} for key, count in snapshot_counts.items()]
+    elif not names or params[0]:
+        rows = await execute_query(
+            f"""
+            SELECT
+                r.landcover,
+                SUM(r.count) AS count
+            FROM obs_daily_landcover r
+            WHERE TRUE
+                {species_filter}
+            GROUP BY r.landcover
+        """,
+            params,
+        )
+
+    # Unbekannte Arten → alle Zählungen 0
+    db_counts = {row["landcover"]: row["count"] for row in rows}
+
+    # Kombiniere mit COVERAGE_DATA
+    merged = []
+    for entry in COVERAGE_DATA:
+        key = entry["key"]
+        merged.append({**entry, "count": db_counts.get(key, 0)})
+
+    return json_bytes(merged)
+
+
+class HistogramRequest(BaseModel):
+    speciesids: Optional[List[int]] = []
+    familiesIds: Optional[List[int]] = []
+    date_from: str
+    date_to: str
+    # Breite der Höhenklassen in m, Vielfaches von 100 (Auflösung von obs_daily_elevation)
+    bin_width: int = 500
+
+
+@app.post("/getHistograms/")
+async def get_histograms(request: HistogramRequest, http_request: Request):
+    """
+    Gibt für mehrere Arten und Familien auf einmal die Sichtungen nach
+    Höhenklassen und nach Landbedeckung im Zeitraum zurück, eine Serie pro
+    gewählter Art bzw. Familie:
+
+        {"bin_width": 500, "elevation_bins": [0, 500, ...],
+         "landcover": [{"key", "area", "color"}, ...],
+         "series": [{"type": "species", "id": 1, "name": "Amsel",
+                     "elevation": [...], "landcover": [...], "landcover_per_km2": [...]}]}
+
+    Alle Serien verwenden dieselben Höhenklassen (Untergrenze in m) und die
+    Reihenfolge von COVERAGE_DATA. landcover_per_km2 ist die Anzahl
+    Sichtungen pro km² der jeweiligen Bodenbedeckung.
+    """
+    record_filters(
+        speciesids=request.speciesids, familiesIds=request.familiesIds,
+        date_from=request.date_from, date_to=request.date_to, bin_width=request.bin_width,
+    )
+    if request.bin_width <= 0 or request.bin_width % 100:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="bin_width muss ein positives Vielfaches von 100 sein",
+        )
+
+    key = filter_key(
+        endpoint="getHistograms",
+        speciesids=request.speciesids or [], familiesIds=request.familiesIds or [],
+        date_from=normalize_date(request.date_from), date_to=normalize_date(request.date_to),
+        bin_width=request.bin_width,
+    )
+    return await cached_response(http_request, response_cache, key, lambda: histograms_body(request))
+
+
+async def histograms_body(request):
+    """Berechnet die Antwort von /getHistograms/ als JSON-bytes."""
+    species_ids = resolve_species_ids(request.speciesids, request.familiesIds)
+
+    # Höhen und Landbedeckung aller Arten in einer Abfrage aus den Tagesaggregaten
+    rows = []
+    if species_ids:
+        rows = await snapshot_query(
+            lambda snap, first, last: snapshot_histogram_rows(
+                snap, first, last, species_ids, request.bin_width),
+            request.date_from, request.date_to)
+    if rows is None:
+        date_params = [request.date_from, request.date_to]
+        rows = await execute_query(
+            """
+            SELECT 'elevation' AS kind, speciesid,
+                   FLOOR(elevation_band / %s::numeric)::integer AS bin,
+                   NULL AS landcover, SUM(count) AS count
+            FROM obs_daily_elevation
+            WHERE speciesid = ANY(%s) AND day BETWEEN %s::timestamp AND %s::timestamp
+            GROUP BY speciesid, 3
+            UNION ALL
+            SELECT 'landcover', speciesid, NULL, landcover, SUM(count)
+            FROM obs_daily_landcover
+            WHERE speciesid = ANY(%s) AND day BETWEEN %s::timestamp AND %s::timestamp
+            GROUP BY speciesid, landcover
+        """,
+            [request.bin_width // 100, species_ids] + date_params + [species_ids] + date_params,
+        )
+
+    # Zählungen pro Art: {speciesid: {Höhenklasse: count}} bzw. {speciesid: {landcover: count}}
+    elevation, landcover = {}, {}
+    for row in rows:
+        if row["kind"] == "elevation":
+            elevation.setdefault(row["speciesid"], {})[row["bin"]] = row["count"]
+        else:
+            landcover.setdefault(row["speciesid"], {})[row["landcover"]] = row["count"]
 
-            db_counts = {row["landcover"]: row["count"] for row in cursor.fetchall()}
+    bins = sorted({b for counts in elevation.values() for b in counts})
+    if bins:
+        bins = list(range(bins[0], bins[-1] + 1))
 
-            # Kombiniere mit COVERAGE_DATA
-            merged = []
-            for entry in COVERAGE_DATA:
-                key = entry["key"]
-                merged.append({**entry, "count": db_counts.get(key, 0)})
+    # Serien: gewählte Arten einzeln, Familien über alle ihre Arten summiert
+    series = []
+    for speciesid in dict.fromkeys(request.speciesids or []):
+        row = catalog.species_by_id.get(speciesid, {})
+        series.append(("species", speciesid, row.get("germanname") or row.get("latinname"), [speciesid]))
+    for family_id in dict.fromkeys(request.familiesIds or []):
+        row = catalog.families_by_id.get(family_id, {})
+        series.append((
+            "family", family_id, row.get("latin_name"), catalog.family_species_ids([family_id])))
 
-            return JSONResponse(content=merged)
+    result = []
+    for kind, item_id, name, members in series:
+        elevation_counts = [
+            sum(elevation.get(s, {}).get(b, 0) for s in members) for b in bins]
+        landcover_counts = [
+            sum(landcover.get(s, {}).get(entry["key"], 0) for s in members) for entry in COVERAGE_DATA]
+        result.append({
+            "type": kind,
+            "id": item_id,
+            "name": name,
+            "elevation": elevation_counts,
+            "landcover": landcover_counts,
+            "landcover_per_km2": [
+                round(count / (entry["area"] / 1_000_000), 6)
+                for count, entry in zip(landcover_counts, COVERAGE_DATA)
+            ],
+        })
 
-    finally:
-        db_pool.putconn(conn)
+    return json_bytes({
+        "bin_width": request.bin_width,
+        "elevation_bins": [b * request.bin_width for b in bins],
+        "landcover": COVERAGE_DATA,
+        "series": result,
+    })
 
 
+def snapshot_histogram_rows(snap, first_day, last_day, species_ids, bin_width):
+    """Zeilen wie die SQL-Abfrage von histograms_body, berechnet aus dem Snapshot."""
+    rows = []
+    for speciesid in species_ids:
+        for band, count in snap.elevation_counts([speciesid], first_day, last_day, bin_width).items():
+            rows.append({"kind": "elevation", "speciesid": speciesid, "bin": band,
+                         "landcover": None, "count": count})
+        for landcover, count in snap.landcover_counts([speciesid], first_day, last_day).items():
+            rows.append({"kind": "landcover", "speciesid": speciesid, "bin": None,
+                         "landcover": landcover, "count": count})
+    return rows
@@ -0,0 +1,221 @@
+"""
+Messwerte pro Request im Prometheus-Textformat (/metrics).
+
+MetricsMiddleware misst Dauer, Status und Antwortgrösse jedes Requests.
+Innerhalb der Handler werden einzelne Schritte mit span("name") gemessen
+(Warten auf den DB-Pool, SQL, Zuordnung zu Rasterzellen, Serialisierung).
+Ist SLOW_REQUEST_MS gesetzt, werden langsamere Requests mit ihren Schritten
+und Filterparametern im Logger "app.slow" protokolliert.
+
+Die Werte gelten pro Prozess (bei mehreren uvicorn-Workern pro Worker).
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Opt-in: Requests ab dieser Dauer (ms) protokollieren
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS")) if os.getenv("SLOW_REQUEST_MS") else None
+slow_log = logging.getLogger("app.slow")
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, description, labels=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(label_values)
+            if entry is None:
+                entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (counts, total, count) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    labels = _label_text(self.labels + ("le",), label_values + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_text(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUESTS = Counter(
+    "birdapp_requests_total", "Anzahl Requests", ("method", "path", "status"))
+REQUEST_SECONDS = Histogram(
+    "birdapp_request_seconds", "Dauer der Requests", ("method", "path"))
+RESPONSE_BYTES = Histogram(
+    "birdapp_response_bytes", "Grösse der Antworten (nach Kompression)", ("path",), BYTES_BUCKETS)
+STAGE_SECONDS = Histogram(
+    "birdapp_stage_seconds",
+    "Dauer einzelner Schritte (db_pool_wait, db_query, bbox_lookup, grid_join, serialization, ...)",
+    ("stage", "path"))
+DB_ROWS = Histogram(
+    "birdapp_db_rows", "Anzahl von der Datenbank gelieferter Zeilen", ("path",), ROWS_BUCKETS)
+
+REGISTRY = [REQUESTS, REQUEST_SECONDS, RESPONSE_BYTES, STAGE_SECONDS, DB_ROWS]
+
+
+class RequestStats:
+    """Schritte und Filter des laufenden Requests (für das Slow-Request-Log)."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.stages = {}
+        self.filters = {}
+        self.rows = 0
+
+    @property
+    def path(self):
+        # Nach dem Routing steht die Vorlage (z.B. /tiles/{z}/{x}/{y}.pbf) im Scope;
+        # unbekannte Pfade werden zusammengefasst, damit die Labels begrenzt bleiben
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+def _current_path():
+    stats = current_request.get()
+    return stats.path if stats is not None else ""
+
+
+@contextmanager
+def span(stage):
+    """Misst die Dauer eines Schritts im laufenden Request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_stage(stage, seconds):
+    """Erfasst eine bereits gemessene Dauer eines Schritts."""
+    STAGE_SECONDS.observe(seconds, stage, _current_path())
+    stats = current_request.get()
+    if stats is not None:
+        stats.stages[stage] = stats.stages.get(stage, 0.0) + seconds
+
+
+def record_rows(count):
+    """Zählt von der Datenbank gelieferte Zeilen."""
+    DB_ROWS.observe(count, _current_path())
+    stats = current_request.get()
+    if stats is not None:
+        stats.rows += count
+
+
+def record_filters(**filters):
+    """Merkt sich die Filterparameter des Requests für das Slow-Request-Log."""
+    stats = current_request.get()
+    if stats is not None:
+        stats.filters.update(filters)
+
+
+def render():
+    """Alle Messwerte im Prometheus-Textformat."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI-Middleware: Dauer, Status und Antwortgrösse pro Request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            seconds = time.perf_counter() - started
+            path = stats.path
+            REQUESTS.inc(scope["method"], path, status)
+            REQUEST_SECONDS.observe(seconds, scope["method"], path)
+            RESPONSE_BYTES.observe(size, path)
+            current_request.reset(token)
+
+            if SLOW_REQUEST_MS is not None and seconds * 1000 >= SLOW_REQUEST_MS:
+                slow_log.warning(json.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status,
+                    "duration_ms": round(seconds * 1000, 1),
+                    "bytes": size,
+                    "rows": stats.rows,
+                    "stages_ms": {name: round(value * 1000, 1) for name, value in stats.stages.items()},
+                    "filters": stats.filters,
+                }, default=str))
@@ -0,0 +1,152 @@
+"""
+Hierarchisches Raster im Schweizer Koordinatensystem LV95 (EPSG:2056).
+
+Jede Beobachtung erhält beim Einfügen ihre 1-km-Zelle (cell_lv95, Funktion
+lv95_cell in create_database.sql):
+
+    cell_lv95 = iy * 400 + ix    ix = floor((E - 2'450'000) / 1000), 0 ≤ ix < 400
+                                 iy = floor((N - 1'050'000) / 1000), 0 ≤ iy < 250
+
+Die gröberen Stufen (2, 5, 10, 25 km) werden daraus nur mit ganzzahliger
+Division berechnet, in SQL (sql_cell) wie im Snapshot (rollup):
+
+    Zelle auf Stufe km = (iy // km) * (400 // km) + (ix // km)
+
+Damit braucht keine Zoomstufe einen räumlichen Join. Die Geometrie der
+Zellen wird ebenfalls berechnet (Eckpunkte LV95 → WGS84 mit den
+Näherungsformeln von swisstopo, Genauigkeit ca. 1 m) und steht wie bei den
+Grids aus Dateien unter /grids/lv95_<km>.geojson bereit.
+"""
+import json
+import os
+
+import numpy as np
+
+from app.grids import GRID_DIR, Grid
+
+ORIGIN_E = 2_450_000
+ORIGIN_N = 1_050_000
+BASE_COLUMNS = 400
+BASE_ROWS = 250
+PYRAMID_LEVELS = (1, 2, 5, 10, 25)
+
+
+def wgs84_to_lv95(lon, lat):
+    """WGS84 (Grad) → LV95 (E, N in m), Näherungsformeln von swisstopo."""
+    lon, lat = np.asarray(lon, dtype=np.float64), np.asarray(lat, dtype=np.float64)
+    phi = (lat * 3600 - 169028.66) / 10000
+    lam = (lon * 3600 - 26782.5) / 10000
+    e = (2600072.37 + 211455.93 * lam - 10938.51 * lam * phi
+         - 0.36 * lam * phi ** 2 - 44.54 * lam ** 3)
+    n = (1200147.07 + 308807.95 * phi + 3745.25 * lam ** 2 + 76.63 * phi ** 2
+         - 194.56 * lam ** 2 * phi + 119.79 * phi ** 3)
+    return e, n
+
+
+def lv95_to_wgs84(e, n):
+    """LV95 (E, N in m) → WGS84 (lon, lat in Grad), Näherungsformeln von swisstopo."""
+    y = (np.asarray(e, dtype=np.float64) - 2_600_000) / 1_000_000
+    x = (np.asarray(n, dtype=np.float64) - 1_200_000) / 1_000_000
+    lam = 2.6779094 + 4.728982 * y + 0.791484 * y * x + 0.1306 * y * x ** 2 - 0.0436 * y ** 3
+    phi = (16.9023892 + 3.238272 * x - 0.270978 * y ** 2 - 0.002528 * x ** 2
+           - 0.0447 * y ** 2 * x - 0.0140 * x ** 3)
+    return lam * 100 / 36, phi * 100 / 36
+
+
+def level_name(km):
+    return f"lv95_{km}"
+
+
+def rollup(cells, km):
+    """1-km-Zellen (Array, ≥ 0) → Zellen der Stufe km."""
+    cells = np.asarray(cells, dtype=np.int64)
+    ix, iy = cells % BASE_COLUMNS, cells // BASE_COLUMNS
+    return (iy // km) * (BASE_COLUMNS // km) + ix // km
+
+
+def sql_cell(km, column="r.cell_lv95"):
+    """SQL-Ausdruck für die Zelle der Stufe km aus der 1-km-Zelle (Ganzzahldivision)."""
+    if km == 1:
+        return column
+    return f"(({column} / {BASE_COLUMNS}) / {km} * {BASE_COLUMNS // km} + ({column} % {BASE_COLUMNS}) / {km})"
+
+
+class PyramidGrid(Grid):
+    """
+    Eine Stufe der Pyramide mit derselben Schnittstelle wie Grid
+    (features, feature_collection, cells_in_bbox, geojson_path).
+    Grenzen und GeoJSON-Geometrien werden beim ersten Zugriff berechnet.
+    """
+
+    def __init__(self, km):
+        super().__init__(None, os.path.join(GRID_DIR, level_name(km)))
+        self.km = km
+        self.columns = BASE_COLUMNS // km
+        self.rows = BASE_ROWS // km
+
+    def _corners(self):
+        """Eckpunkte (N, 5, 2) aller Zellen in WGS84, Ring im Gegenuhrzeigersinn."""
+        size = self.km * 1000
+        cell_ids = np.arange(self.columns * self.rows)
+        e0 = ORIGIN_E + (cell_ids % self.columns) * size
+        n0 = ORIGIN_N + (cell_ids // self.columns) * size
+        ring_e = np.stack([e0, e0 + size, e0 + size, e0, e0], axis=1)
+        ring_n = np.stack([n0, n0, n0 + size, n0 + size, n0], axis=1)
+        lon, lat = lv95_to_wgs84(ring_e, ring_n)
+        return np.stack([lon, lat], axis=2)
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            corners = self._corners()
+            # minx, miny, maxx, maxy pro Zelle
+            self._bounds = np.concatenate([corners.min(axis=1), corners.max(axis=1)], axis=1)
+            features = [
+                json.dumps({"type": "Polygon", "coordinates": [ring]}).encode("utf-8")
+                for ring in np.round(corners, 7).tolist()
+            ]
+            self._features = b"".join(features)
+            offsets = np.zeros(len(features) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(feature) for feature in features])
+            self._feature_offsets = offsets
+            os.makedirs(self.directory, exist_ok=True)
+            self._loaded = True
+
+    def geometry(self, cell_id):
+        """Shapely-Polygon einer Zelle (WGS84)."""
+        from shapely.geometry import shape
+
+        return shape(json.loads(self.geometry_json(cell_id)))
+
+    def cells_in_bbox(self, bbox):
+        """
+        Zell-IDs (sortiert) im Kartenausschnitt, berechnet über die
+        LV95-Indizes. Die Ränder der Bounding Box werden dafür abgetastet,
+        da sie in LV95 leicht gekrümmt sind.
+
+        Args:
+            bbox (Sequence[float]): minx, miny, maxx, maxy in WGS84
+        """
+        minx, miny, maxx, maxy = bbox
+        steps = np.linspace(0, 1, 17)
+        lon = np.concatenate([minx + (maxx - minx) * steps, np.full(17, maxx),
+                              minx + (maxx - minx) * steps, np.full(17, minx)])
+        lat = np.concatenate([np.full(17, miny), miny + (maxy - miny) * steps,
+                              np.full(17, maxy), miny + (maxy - miny) * steps])
+        e, n = wgs84_to_lv95(lon, lat)
+        size = self.km * 1000
+        if e.max() < ORIGIN_E or n.max() < ORIGIN_N \
+                or e.min() >= ORIGIN_E + self.columns * size or n.min() >= ORIGIN_N + self.rows * size:
+            return np.empty(0, dtype=np.int64)
+        ix = np.clip(np.floor((np.array([e.min(), e.max()]) - ORIGIN_E) / size), 0, self.columns - 1)
+        iy = np.clip(np.floor((np.array([n.min(), n.max()]) - ORIGIN_N) / size), 0, self.rows - 1)
+        columns = np.arange(int(ix[0]), int(ix[1]) + 1)
+        rows = np.arange(int(iy[0]), int(iy[1]) + 1)
+        return (rows[:, None] * self.columns + columns[None, :]).ravel()
+
+
+# Stufen der Pyramide, in main.py zu den Grids hinzugefügt (Name "lv95_<km>")
+pyramid_grids = {level_name(km): PyramidGrid(km) for km in PYRAMID_LEVELS}
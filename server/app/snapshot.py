@@ -0,0 +1,260 @@
+"""
+Spaltenweiser Snapshot der Beobachtungen für Auswertungen ohne Datenbank.
+
+updateDb.py schreibt nach jedem Import (export_snapshot) in SNAPSHOT_DIR:
+    gen-<generation>/day.npy         int32    Tage seit 1970-01-01
+    gen-<generation>/speciesid.npy   int32
+    gen-<generation>/lon.npy         float32  WGS84
+    gen-<generation>/lat.npy         float32  WGS84
+    gen-<generation>/elevation.npy   float64  m ü. M., NaN = unbekannt
+    gen-<generation>/landcover.npy   uint8    Index in meta.json "landcover", 255 = keine
+    gen-<generation>/cell1.npy       int32    -1 = ausserhalb des Grids
+    gen-<generation>/cell5.npy       int32    -1 = ausserhalb des Grids
+    gen-<generation>/cell_lv95.npy   int32    1-km-Zelle LV95 (app/pyramid.py), -1 = ausserhalb
+    gen-<generation>/meta.json       {"generation", "rows", "landcover", "created"}
+    CURRENT                          Name des aktuellen Ordners (gen-<generation>)
+
+Die Zeilen sind nach (speciesid, day) sortiert: die Beobachtungen einer Art
+in einem Zeitraum bilden einen zusammenhängenden Bereich, der per
+Binärsuche gefunden wird. Der Server mappt die Dateien (mmap) und verwendet
+den Snapshot nur, wenn seine Generation der cache_generation in der
+Datenbank entspricht; sonst beantwortet er die Abfragen wie bisher mit SQL.
+
+Die Zählung pro Zelle (cell_counts, grid_counts) wird in Blöcke von
+SNAPSHOT_BLOCK_ROWS Zeilen aufgeteilt und auf SNAPSHOT_WORKERS Prozesse
+verteilt. Prozesse statt Threads, weil np.isin und die Indexierung den GIL
+nicht durchgehend freigeben; die Prozesse mappen die .npy-Dateien selbst,
+übergeben werden nur Pfad und Zeilenbereiche. Mehrere Grids werden dabei
+gleichzeitig gezählt, die Teilergebnisse mit bincount addiert.
+"""
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.pyramid import rollup
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshot")
+# Prozesse für die Zählung pro Zelle (Standard: alle Kerne, 1 = im Server-Prozess)
+SNAPSHOT_WORKERS = int(os.getenv("SNAPSHOT_WORKERS") or os.cpu_count() or 1)
+SNAPSHOT_BLOCK_ROWS = int(os.getenv("SNAPSHOT_BLOCK_ROWS", 1_000_000))
+
+COLUMNS = ("day", "speciesid", "lon", "lat", "elevation", "landcover", "cell1", "cell5", "cell_lv95")
+NO_LANDCOVER = 255
+EPOCH = date(1970, 1, 1)
+# Zeitraum ohne Einschränkung (erster, letzter Tag)
+ALL_DAYS = (-(2 ** 31), 2 ** 31 - 1)
+
+
+# "spawn": der Server läuft mit Threads, fork würde deren Zustand (Locks) kopieren.
+# Die Prozesse starten erst beim ersten Auftrag.
+_executor = ProcessPoolExecutor(
+    SNAPSHOT_WORKERS, mp_context=multiprocessing.get_context("spawn")) \
+    if SNAPSHOT_WORKERS > 1 else None
+
+# In jedem Prozess gemappte Spalten (Pfad der .npy-Datei → Array)
+_mapped = {}
+
+
+def day_number(value):
+    """Tage seit 1970-01-01 für ein date."""
+    return (value - EPOCH).days
+
+
+def day_range(date_from, date_to):
+    """
+    Erster und letzter Tag (Tage seit 1970-01-01) wie der SQL-Filter
+    'day BETWEEN date_from::timestamp AND date_to::timestamp'.
+    Eine Uhrzeit nach Mitternacht in date_from schliesst dessen Tag aus.
+    """
+    start = datetime.fromisoformat(date_from).replace(tzinfo=None)
+    end = datetime.fromisoformat(date_to).replace(tzinfo=None)
+    first = start.date() + timedelta(days=1 if start.time() != datetime.min.time() else 0)
+    return day_number(first), day_number(end.date())
+
+
+def _blocks(ranges, block_rows):
+    """Teilt Zeilenbereiche in Blöcke von höchstens block_rows Zeilen (Listen von Bereichen)."""
+    blocks, block, size = [], [], 0
+    for start, end in ranges:
+        while start < end:
+            take = min(end - start, block_rows - size)
+            block.append((start, start + take))
+            size += take
+            start += take
+            if size == block_rows:
+                blocks.append(block)
+                block, size = [], 0
+    if block:
+        blocks.append(block)
+    return blocks
+
+
+def _block_counts(values, ranges, visible_cells, km):
+    """Zählungen pro Zelle (bincount) für die Zeilenbereiche eines Blocks."""
+    cells = np.concatenate([values[start:end] for start, end in ranges])
+    cells = cells[cells >= 0]
+    if km is not None:
+        cells = rollup(cells, km)
+    if visible_cells is not None:
+        cells = cells[np.isin(cells, visible_cells)]
+    return np.bincount(cells)
+
+
+def _file_block_counts(path, ranges, visible_cells, km):
+    """_block_counts für eine .npy-Datei, im Prozess des Executors gemappt."""
+    values = _mapped.get(path)
+    if values is None:
+        # Spalten älterer Snapshots freigeben
+        if len(_mapped) >= 2 * len(COLUMNS):
+            _mapped.clear()
+        values = _mapped[path] = np.load(path, mmap_mode="r")
+    return _block_counts(values, ranges, visible_cells, km)
+
+
+class Snapshot:
+    """Gemappte Spalten eines exportierten Snapshots."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.generation = meta["generation"]
+        self.landcover_keys = meta["landcover"]
+        for column in COLUMNS:
+            setattr(self, column, np.load(os.path.join(directory, f"{column}.npy"), mmap_mode="r"))
+        self.rows = len(self.day)
+
+    def ranges(self, species_ids, first_day, last_day):
+        """Zeilenbereiche (start, end) der Arten im Zeitraum (Binärsuche)."""
+        ranges = []
+        for speciesid in sorted(set(species_ids)):
+            start = np.searchsorted(self.speciesid, speciesid, side="left")
+            end = np.searchsorted(self.speciesid, speciesid, side="right")
+            if start == end:
+                continue
+            days = self.day[start:end]
+            low = start + np.searchsorted(days, first_day, side="left")
+            high = start + np.searchsorted(days, last_day, side="right")
+            if low < high:
+                ranges.append((int(low), int(high)))
+        return ranges
+
+    def column(self, name, ranges):
+        """Werte einer Spalte in den Zeilenbereichen (als Kopie)."""
+        values = getattr(self, name)
+        if not ranges:
+            return np.empty(0, dtype=values.dtype)
+        return np.concatenate([values[start:end] for start, end in ranges])
+
+    def timeline(self, species_ids, first_day, last_day):
+        """Anzahl Sichtungen pro Tag: (Tage seit 1970-01-01, Zählungen) ohne leere Tage."""
+        days = self.column("day", self.ranges(species_ids, first_day, last_day))
+        if not len(days):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        counts = np.bincount(days - first_day)
+        present = np.flatnonzero(counts)
+        return present + first_day, counts[present]
+
+    def bucket_counts(self, species_ids, first_day, last_day, starts):
+        """
+        Zählungen pro Art und Zeitschritt: {speciesid: [counts]}.
+        starts: erster Tag jedes Zeitschritts (Tage seit 1970-01-01, aufsteigend).
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        counts = {}
+        for speciesid in species_ids:
+            days = self.column("day", self.ranges([speciesid], first_day, last_day))
+            index = np.searchsorted(starts, days, side="right") - 1
+            counts[speciesid] = np.bincount(
+                index[index >= 0], minlength=len(starts)).tolist()
+        return counts
+
+    def cell_counts(self, species_ids, first_day, last_day, cell_column, visible_cells=None, km=None):
+        """
+        Zählung pro Zelle: (sortierte Zell-IDs, Zählungen) wie sql_grid_counts in main.py.
+        Mit km werden die 1-km-Zellen von cell_lv95 auf diese Stufe zusammengefasst.
+        """
+        return self.grid_counts(
+            species_ids, first_day, last_day, [(cell_column, visible_cells, km)])[0]
+
+    def grid_counts(self, species_ids, first_day, last_day, grids):
+        """
+        cell_counts für mehrere Grids auf einmal, parallel über Blöcke und Grids.
+
+        Args:
+            grids (list): (cell_column, visible_cells, km) pro Grid
+        Returns:
+            list: (sortierte Zell-IDs, Zählungen) pro Grid
+        """
+        blocks = _blocks(self.ranges(species_ids, first_day, last_day), SNAPSHOT_BLOCK_ROWS)
+        tasks = [
+            (index, column, block, visible_cells, km)
+            for index, (column, visible_cells, km) in enumerate(grids)
+            for block in blocks
+        ]
+        results = None
+        if _executor is not None and len(tasks) > 1:
+            futures = [
+                _executor.submit(
+                    _file_block_counts, os.path.abspath(os.path.join(self.directory, f"{column}.npy")),
+                    block, visible_cells, km)
+                for _, column, block, visible_cells, km in tasks]
+            try:
+                results = [future.result() for future in futures]
+            except OSError:
+                # Ordner inzwischen durch einen neueren Snapshot ersetzt, nur noch hier gemappt
+                results = None
+        if results is None:
+            results = [
+                _block_counts(getattr(self, column), block, visible_cells, km)
+                for _, column, block, visible_cells, km in tasks]
+
+        totals = [np.zeros(0, dtype=np.int64) for _ in grids]
+        for (index, *_), counts in zip(tasks, results):
+            if len(counts) > len(totals[index]):
+                totals[index], counts = counts, totals[index]
+            totals[index][:len(counts)] += counts
+
+        output = []
+        for counts in totals:
+            present = np.flatnonzero(counts)
+            output.append((present.tolist(), counts[present].tolist()))
+        return output
+
+    def elevation_counts(self, species_ids, first_day, last_day, bin_width):
+        """Zählung pro Höhenklasse: {Klasse (Untergrenze / bin_width): count}."""
+        elevation = self.column("elevation", self.ranges(species_ids, first_day, last_day))
+        bins = np.floor(elevation[~np.isnan(elevation)] / bin_width).astype(np.int64)
+        values, counts = np.unique(bins, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def landcover_counts(self, species_ids, first_day, last_day):
+        """Zählung pro Bodenbedeckung: {landcover: count}."""
+        codes = self.column("landcover", self.ranges(species_ids, first_day, last_day))
+        counts = np.bincount(codes[codes != NO_LANDCOVER], minlength=len(self.landcover_keys))
+        return {
+            key: int(count) for key, count in zip(self.landcover_keys, counts) if count
+        }
+
+
+def load_snapshot(directory=SNAPSHOT_DIR, current=None):
+    """
+    Lädt den aktuellen Snapshot (Datei CURRENT). Gibt current zurück, wenn
+    dieser bereits geladen ist, und None, wenn kein Snapshot vorhanden ist.
+    """
+    try:
+        with open(os.path.join(directory, "CURRENT")) as f:
+            path = os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+    if current is not None and os.path.abspath(current.directory) == os.path.abspath(path):
+        return current
+    try:
+        return Snapshot(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(e)
+        return None
@@ -1,7 +1,16 @@
-import requests
+import httpx
+from scripts.wikicache import cached
 
+# Gemeinsamer HTTP-Client: hält Verbindungen zu Wikipedia offen (Keep-Alive)
+http_client = httpx.AsyncClient(
+    timeout=10.0,
+    follow_redirects=True,
+    headers={"User-Agent": "Vogelradar/1.0 (https://github.com/JonasHeinz/BirdApp)"},
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
 
-def get_wikipedia_page_title(search_term, lang="de"):
+
+async def get_wikipedia_page_title(search_term, lang="de"):
     """
     Sucht den Wikipedia-Seitentitel zu einem Suchbegriff in der gewünschten Sprache.
 
@@ -11,6 +20,9 @@ def get_wikipedia_page_title(search_term, lang="de"):
 
     Returns:
         str oder None: Titel der relevantesten Wikipedia-Seite oder None, wenn nichts gefunden.
+
+    Raises:
+        httpx.HTTPError: bei Verbindungsfehlern und Fehlerstatus (z.B. 429, 5xx)
     """
     url = f"https://{lang}.wikipedia.org/w/api.php"
     params = {
@@ -20,7 +32,8 @@ def get_wikipedia_page_title(search_term, lang="de"):
         "srsearch": search_term,
         "utf8": 1
     }
-    response = requests.get(url, params=params)
+    response = await http_client.get(url, params=params)
+    response.raise_for_status()
     data = response.json()
     # Extrahiere Suchergebnisse
     search_results = data.get("query", {}).get("search", [])
@@ -30,7 +43,8 @@ def get_wikipedia_page_title(search_term, lang="de"):
     return None
 
 
-def get_wikipedia_summary(species):
+@cached("summary", is_empty=lambda data: data["summary"] is None)
+async def get_wikipedia_summary(species):
     """
     Holt die Kurzbeschreibung (Summary) einer Art von der deutschsprachigen Wikipedia.
 
@@ -40,27 +54,32 @@ def get_wikipedia_summary(species):
     Returns:
         dict: Dictionary mit Zusammenfassung, URL und deutschem Namen.
               Falls nicht gefunden, sind alle Werte None.
+
+    Raises:
+        httpx.HTTPError: bei Verbindungsfehlern und Fehlerstatus ausser 404
+                         (wird nicht gecacht, der nächste Aufruf versucht es erneut)
     """
     lang = "de"
-    title = get_wikipedia_page_title(species, lang)
+    title = await get_wikipedia_page_title(species, lang)
     if not title:
         return {"summary": None, "url": None, "de_name": None}
 
     # API für Kurzfassung der Seite
     url = f"https://{lang}.wikipedia.org/api/rest_v1/page/summary/{title.replace(' ', '_')}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        return {
-            "summary": data.get("extract"),
-            "url": data.get("content_urls", {}).get("desktop", {}).get("page"),
-            "de_name": data.get("title")
-        }
-
-    return {"summary": None, "url": None, "de_name": None}
+    response = await http_client.get(url)
+    # Nur eine fehlende Seite gilt als "nicht gefunden" und wird gecacht
+    if response.status_code == 404:
+        return {"summary": None, "url": None, "de_name": None}
+    response.raise_for_status()
+    data = response.json()
+    return {
+        "summary": data.get("extract"),
+        "url": data.get("content_urls", {}).get("desktop", {}).get("page"),
+        "de_name": data.get("title")
+    }
 
 
-def get_wikipedia_image(title):
+async def get_wikipedia_image(title):
     """
     Holt die Originalbild-URL einer Wikipedia-Seite anhand ihres Titels (englische Wikipedia).
 
@@ -69,6 +88,9 @@ def get_wikipedia_image(title):
 
     Returns:
         str oder None: URL zum Originalbild oder None, wenn kein Bild vorhanden.
+
+    Raises:
+        httpx.HTTPError: bei Verbindungsfehlern und Fehlerstatus (z.B. 429, 5xx)
     """
     url = f"https://en.wikipedia.org/w/api.php"
     params = {
@@ -79,7 +101,8 @@ def get_wikipedia_image(title):
         "titles": title,
         "utf8": 1
     }
-    response = requests.get(url, params=params)
+    response = await http_client.get(url, params=params)
+    response.raise_for_status()
     data = response.json()
     pages = data.get("query", {}).get("pages", {})
     for page in pages.values():
@@ -88,7 +111,8 @@ def get_wikipedia_image(title):
     return None
 
 
-def get_image_for_species(sci_name):
+@cached("image", is_empty=lambda image_url: image_url is None)
+async def get_image_for_species(sci_name):
     """
 Versucht, ein Bild zu einer Art zuerst auf der englischsprachigen Wikipedia zu finden.
 Falls kein Bild gefunden wird, wird das auch mit dem wissenschaftlichen Namen versucht.
@@ -99,11 +123,11 @@ Args:
 Returns:
     str oder None: Bild-URL oder None, falls kein Bild gefunden.
 """
-    image_url = get_wikipedia_image(sci_name)
+    image_url = await get_wikipedia_image(sci_name)
     if image_url:
         return image_url
 
-    title = get_wikipedia_page_title(sci_name, lang="en")
+    title = await get_wikipedia_page_title(sci_name, lang="en")
     if title:
-        return get_wikipedia_image(title)
+        return await get_wikipedia_image(title)
     return None
@@ -0,0 +1,68 @@
+"""
+Füllt den Wikipedia-Cache (Bild und Kurzbeschreibung) für alle Arten
+aus der Tabelle 'species'.
+
+Aufruf aus dem Ordner server:
+    python -m scripts.prewarm_wikipedia [--force] [--delay 0.2]
+"""
+import argparse
+import asyncio
+import os
+
+import psycopg
+from dotenv import load_dotenv
+
+from scripts.pictures import get_image_for_species, get_wikipedia_summary, http_client
+from scripts.wikicache import wiki_cache
+
+
+def load_latin_names():
+    """Liest alle lateinischen Artnamen aus der Datenbank."""
+    load_dotenv()
+    conn = psycopg.connect(
+        dbname="BirdApp",
+        user="postgres",
+        password=os.getenv("DB_PASSWD"),
+        host="localhost",
+        port="5433",
+    )
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT latinname FROM species WHERE latinname IS NOT NULL ORDER BY latinname"
+            )
+            return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Wikipedia-Cache vorwärmen")
+    parser.add_argument("--force", action="store_true",
+                        help="Auch gültige Einträge neu laden")
+    parser.add_argument("--delay", type=float, default=0.2,
+                        help="Pause zwischen zwei Arten in Sekunden (Wikipedia schonen)")
+    args = parser.parse_args()
+
+    names = load_latin_names()
+    fetched = 0
+    for index, name in enumerate(names, start=1):
+        for namespace, lookup in (("image", get_image_for_species),
+                                  ("summary", get_wikipedia_summary)):
+            if not args.force and wiki_cache.get(f"{namespace}:{name}")[0]:
+                continue
+            try:
+                await lookup.refresh(name)
+                fetched += 1
+            except Exception as e:
+                print(f"Fehler bei {name} ({namespace}): {e}")
+            await asyncio.sleep(args.delay)
+        if index % 50 == 0:
+            print(f"{index}/{len(names)} Arten verarbeitet")
+
+    print(f"Fertig: {len(names)} Arten, {fetched} Einträge neu geladen")
+    await http_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
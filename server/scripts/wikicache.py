@@ -0,0 +1,150 @@
+import asyncio
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Cache-Datei und Gültigkeitsdauer (Sekunden) für Treffer und leere Ergebnisse
+CACHE_PATH = os.getenv("WIKI_CACHE_PATH", "data/wikipedia_cache.sqlite")
+CACHE_TTL = int(os.getenv("WIKI_CACHE_TTL", 30 * 24 * 3600))
+CACHE_NEGATIVE_TTL = int(os.getenv("WIKI_CACHE_NEGATIVE_TTL", 6 * 3600))
+CACHE_MEMORY_SIZE = int(os.getenv("WIKI_CACHE_MEMORY_SIZE", 2048))
+
+
+class TTLCache:
+    """
+    Zweistufiger Cache: LRU im Prozess vor einer SQLite-Datei auf der Festplatte.
+    Jeder Eintrag hat ein Ablaufdatum, abgelaufene Einträge gelten als Fehltreffer.
+
+    Der LRU und die Datei haben getrennte Locks: peek blockiert nie auf
+    einen laufenden Datenbankzugriff und kann im Event-Loop aufgerufen
+    werden, get und set greifen auf die Datei zu (in async-Code über
+    asyncio.to_thread, siehe cached).
+    """
+
+    def __init__(self, path, maxsize=2048):
+        self.maxsize = maxsize
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def peek(self, key):
+        """
+        Sucht nur im LRU (ohne Dateizugriff).
+
+        Returns:
+            tuple: (True, Wert) bei einem gültigen Eintrag, sonst (False, None)
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and entry[1] > now:
+                self.memory.move_to_end(key)
+                return True, entry[0]
+            return False, None
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (True, Wert) bei einem gültigen Eintrag, sonst (False, None)
+        """
+        hit, value = self.peek(key)
+        if hit:
+            return hit, value
+
+        now = time.time()
+        with self.db_lock:
+            row = self.db.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        with self.lock:
+            if not row or row[1] <= now:
+                self.memory.pop(key, None)
+                return False, None
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            return True, value
+
+    def set(self, key, value, ttl):
+        expires = time.time() + ttl
+        with self.db_lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires),
+            )
+            self.db.commit()
+        with self.lock:
+            self._remember(key, value, expires)
+
+    def _remember(self, key, value, expires):
+        self.memory[key] = (value, expires)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+
+wiki_cache = TTLCache(CACHE_PATH, CACHE_MEMORY_SIZE)
+
+
+def cached(namespace, is_empty):
+    """
+    Dekorator, der Ergebnisse einer (auch asynchronen) Funktion mit einem
+    Argument in wiki_cache ablegt.
+    Leere Ergebnisse (is_empty) werden ebenfalls gecacht, aber kürzer.
+    Fehler (Exceptions) werden nicht gecacht.
+
+    Die dekorierte Funktion erhält zusätzlich refresh(arg), das den Cache umgeht
+    und den Eintrag neu schreibt.
+
+    Bei asynchronen Funktionen werden Treffer im LRU direkt beantwortet, die
+    SQLite-Zugriffe laufen in einem Thread (asyncio.to_thread) und blockieren
+    den Event-Loop nicht.
+    """
+    def store(arg, value):
+        ttl = CACHE_NEGATIVE_TTL if is_empty(value) else CACHE_TTL
+        wiki_cache.set(f"{namespace}:{arg}", value, ttl)
+        return value
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            async def refresh(arg):
+                return await asyncio.to_thread(store, arg, await func(arg))
+
+            @wraps(func)
+            async def wrapper(arg):
+                key = f"{namespace}:{arg}"
+                hit, value = wiki_cache.peek(key)
+                if not hit:
+                    hit, value = await asyncio.to_thread(wiki_cache.get, key)
+                if hit:
+                    return value
+                return await refresh(arg)
+        else:
+            def refresh(arg):
+                return store(arg, func(arg))
+
+            @wraps(func)
+            def wrapper(arg):
+                hit, value = wiki_cache.get(f"{namespace}:{arg}")
+                if hit:
+                    return value
+                return refresh(arg)
+
+        wrapper.refresh = refresh
+        return wrapper
+
+    return decorator
@@ -0,0 +1,13 @@
+"""
+Gemeinsame Einstellungen der Tests des Servers.
+
+Aufruf aus dem Ordner server: python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Wikipedia-Cache der Tests nicht in data/ anlegen
+os.environ.setdefault("WIKI_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "wikipedia_cache.sqlite"))
@@ -0,0 +1,72 @@
+"""Tests für sync_cache_generation: gleichzeitige Requests direkt nach dem Start."""
+import asyncio
+
+import httpx
+import pytest
+
+from app import main
+from app.catalog import Catalog
+
+SPECIES = [{"speciesid": 1, "latinname": "Parus major", "germanname": "Kohlmeise", "family_id": 7}]
+FAMILIES = [{"id": 7, "latin_name": "Paridae"}]
+
+
+@pytest.fixture
+def slow_db(monkeypatch):
+    """Ersetzt die Datenbank durch eine, die 50 ms pro Abfrage braucht."""
+    queries = []
+
+    async def execute_query(query, params=None):
+        queries.append(query)
+        await asyncio.sleep(0.05)
+        if "cache_generation" in query:
+            return [{"generation": 4}]
+        if "FROM species" in query:
+            return SPECIES
+        if "FROM family" in query:
+            return FAMILIES
+        return []
+
+    monkeypatch.setattr(main, "execute_query", execute_query)
+    monkeypatch.setattr(main, "catalog", Catalog())
+    monkeypatch.setattr(main, "generation_checked_at", float("-inf"))
+    monkeypatch.setattr(main, "generation_lock", asyncio.Lock())
+    monkeypatch.setattr(main.response_cache, "generation", None)
+    return queries
+
+
+def get_all(*paths):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get(path) for path in paths))
+    return asyncio.run(run())
+
+
+def test_concurrent_first_requests_wait_for_catalog(slow_db):
+    species, families = get_all("/getSpecies/", "/getFamilies/")
+    assert species.json() == SPECIES
+    assert families.json() == FAMILIES
+    # Die Generation wird nur einmal gelesen
+    assert sum("cache_generation" in query for query in slow_db) == 1
+
+
+def test_response_cache_etag_uses_known_generation(slow_db):
+    responses = get_all(*["/getObservationsTimeline/?speciesids=1&date_from=2024-01-01&date_to=2024-12-31"] * 3)
+    for response in responses:
+        assert response.headers["ETag"].startswith('"4-')
+
+
+def test_failed_generation_read_is_retried(slow_db, monkeypatch):
+    working = main.execute_query
+
+    async def failing(query, params=None):
+        raise RuntimeError("Datenbank nicht erreichbar")
+
+    monkeypatch.setattr(main, "execute_query", failing)
+    with pytest.raises(RuntimeError):
+        asyncio.run(main.sync_cache_generation())
+    assert main.generation_checked_at == float("-inf")
+
+    monkeypatch.setattr(main, "execute_query", working)
+    assert asyncio.run(main.sync_cache_generation()) == 4
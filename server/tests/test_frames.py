@@ -0,0 +1,38 @@
+"""Tests für die Parameter von /getFrames/."""
+from fastapi.testclient import TestClient
+
+from app import main
+
+FILTER = {"date_from": "2024-01-01", "date_to": "2024-01-03", "bucket": "day"}
+
+
+def test_resolution_km_selects_pyramid_grid():
+    response = TestClient(main.app).post("/getFrames/", json={**FILTER, "resolution_km": 2})
+    assert response.status_code == 200
+    assert response.headers["X-Grid"] == "lv95_2"
+    assert len(response.text.splitlines()) == 3
+
+
+def test_unknown_resolution_and_format_are_rejected():
+    client = TestClient(main.app)
+    assert client.post("/getFrames/", json={**FILTER, "resolution_km": 3}).status_code == 422
+    assert client.post("/getFrames/", json={**FILTER, "format": "binary"}).status_code == 422
+
+
+def test_too_many_buckets_are_rejected(monkeypatch):
+    async def execute_query(query, params=None):
+        return [{"generation": 1}] if "cache_generation" in query else []
+
+    monkeypatch.setattr(main, "execute_query", execute_query)
+    monkeypatch.setattr(main, "snapshot", None)
+    monkeypatch.setattr(main, "MAX_BUCKETS", 100)
+    client = TestClient(main.app)
+    long_range = {"date_from": "2000-01-01", "date_to": "2024-01-01"}
+
+    assert client.post("/getFrames/", json={**long_range, "bucket": "day"}).status_code == 422
+    assert client.get("/getObservationsTimeline/", params={
+        **long_range, "speciesids": "1", "bucket": "week"}).status_code == 422
+    # 24 Jahre in Monaten: 289 Zeitschritte
+    assert client.get("/getObservationsTimeline/", params={
+        **long_range, "speciesids": "1", "bucket": "month"}).status_code == 422
+    assert client.post("/getFrames/", json={**FILTER, "bucket": "day"}).status_code == 200
@@ -0,0 +1,60 @@
+"""Tests für die Antwort von /getGeojson/ im GeoJSON-Format."""
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.catalog import Catalog
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def execute_query(query, params=None):
+        return [{"generation": 1}] if "cache_generation" in query else []
+
+    async def stream_rows(query, params=None):
+        return
+        yield
+
+    catalog = Catalog()
+    catalog.load([{"speciesid": 1, "latinname": "Parus major", "germanname": "Kohlmeise"}], [], 1)
+    monkeypatch.setattr(main, "execute_query", execute_query)
+    monkeypatch.setattr(main, "stream_rows", stream_rows)
+    monkeypatch.setattr(main, "catalog", catalog)
+    monkeypatch.setattr(main, "snapshot", None)
+    monkeypatch.setattr(main, "generation_checked_at", float("-inf"))
+    main.response_cache.reset(None)
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("speciesids", [[], [1]])
+def test_empty_grids_are_feature_collections(client, speciesids):
+    response = client.post("/getGeojson/", json={
+        "speciesids": speciesids, "date_from": "2024-01-01", "date_to": "2024-01-31",
+        "resolution_km": 25,
+    })
+    assert response.status_code == 200
+    assert json.loads(response.json()["lv95_25"]) == {"type": "FeatureCollection", "features": []}
+
+
+def test_sql_counts_query_grids_concurrently(client, monkeypatch):
+    running, overlap = [0], [0]
+
+    async def execute_query(query, params=None):
+        if "cache_generation" in query:
+            return [{"generation": 1}]
+        running[0] += 1
+        overlap[0] = max(overlap[0], running[0])
+        await asyncio.sleep(0.05)
+        running[0] -= 1
+        return [{"cell_id": 3, "count": 2}]
+
+    monkeypatch.setattr(main, "execute_query", execute_query)
+    response = client.post("/getGeojson/", json={
+        "speciesids": [1], "date_from": "2024-01-01", "date_to": "2024-01-31", "format": "binary",
+    })
+    assert response.status_code == 200
+    # grid1 und grid5: je eine Abfrage, gleichzeitig
+    assert overlap[0] == 2
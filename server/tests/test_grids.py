@@ -0,0 +1,40 @@
+"""Tests für das Binärformat von /getGeojson/ (pack_counts)."""
+import numpy as np
+
+from app import grids, main  # noqa: F401 (main ergänzt GRID_CODES um das LV95-Raster)
+
+
+def unpack_counts(payload):
+    """Liest pack_counts wie parseCounts in BirdMap.jsx: {Kennung: (Zell-IDs, Zählungen)}."""
+    values = np.frombuffer(payload, dtype="<u4")
+    sections, offset = {}, 1
+    for _ in range(values[0]):
+        code, n = int(values[offset]), int(values[offset + 1])
+        assert code not in sections
+        sections[code] = (values[offset + 2:offset + 2 + n].tolist(),
+                          values[offset + 2 + n:offset + 2 + 2 * n].tolist())
+        offset += 2 + 2 * n
+    assert offset == len(values)
+    return sections
+
+
+def test_grid_codes_are_unique():
+    assert len(set(grids.GRID_CODES.values())) == len(grids.GRID_CODES)
+    assert set(grids.GRID_CODES) == set(grids.grids)
+    # Bisherige Kennungen bleiben für bestehende Clients gleich
+    assert grids.GRID_CODES["grid1"] == 1 and grids.GRID_CODES["grid5"] == 5
+
+
+def test_pack_legacy_and_lv95_grids_together():
+    sections = [
+        ("grid1", [3, 7], [1, 2]),
+        ("grid5", [4], [9]),
+        ("lv95_1", [3, 7, 8], [5, 6, 7]),
+        ("lv95_5", [], []),
+    ]
+    unpacked = unpack_counts(grids.pack_counts(sections))
+    assert unpacked == {
+        grids.GRID_CODES[name]: (cell_ids, counts) for name, cell_ids, counts in sections
+    }
+    assert grids.GRID_CODES["lv95_1"] not in (1, 5)
+    assert grids.GRID_CODES["lv95_5"] not in (1, 5)
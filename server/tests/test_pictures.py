@@ -0,0 +1,88 @@
+"""Tests für die Wikipedia-Abfragen (scripts/pictures.py) und ihren Cache."""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from scripts import pictures, wikicache
+
+
+def wikipedia(summary_status):
+    """Stub von Wikipedia: Suche findet die Seite, Summary antwortet mit summary_status."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/w/api.php":
+            return httpx.Response(200, json={"query": {"search": [{"title": "Kohlmeise"}]}})
+        if summary_status != 200:
+            return httpx.Response(summary_status)
+        return httpx.Response(200, json={
+            "extract": "Die Kohlmeise ist eine Vogelart.",
+            "title": "Kohlmeise",
+            "content_urls": {"desktop": {"page": "https://de.wikipedia.org/wiki/Kohlmeise"}},
+        })
+
+    return httpx.MockTransport(handler), calls
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = wikicache.TTLCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(wikicache, "wiki_cache", cache)
+    return cache
+
+
+def use_transport(monkeypatch, transport):
+    monkeypatch.setattr(pictures, "http_client", httpx.AsyncClient(transport=transport))
+
+
+def test_server_error_is_not_cached(cache, monkeypatch):
+    transport, calls = wikipedia(503)
+    use_transport(monkeypatch, transport)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(pictures.get_wikipedia_summary("Parus major"))
+    assert cache.get("summary:Parus major") == (False, None)
+
+    # Wikipedia wieder erreichbar → der nächste Aufruf lädt die Zusammenfassung
+    transport, calls = wikipedia(200)
+    use_transport(monkeypatch, transport)
+    summary = asyncio.run(pictures.get_wikipedia_summary("Parus major"))
+    assert summary["de_name"] == "Kohlmeise"
+    assert cache.get("summary:Parus major") == (True, summary)
+
+
+def test_missing_page_is_cached(cache, monkeypatch):
+    transport, calls = wikipedia(404)
+    use_transport(monkeypatch, transport)
+    summary = asyncio.run(pictures.get_wikipedia_summary("Parus major"))
+    assert summary == {"summary": None, "url": None, "de_name": None}
+    assert cache.get("summary:Parus major") == (True, summary)
+
+    asyncio.run(pictures.get_wikipedia_summary("Parus major"))
+    assert len(calls) == 2
+
+
+def test_cache_file_is_read_and_written_off_the_event_loop(cache, monkeypatch):
+    transport, calls = wikipedia(200)
+    use_transport(monkeypatch, transport)
+    threads = []
+    for name in ("get", "set"):
+        method = getattr(cache, name)
+
+        def record(*args, method=method):
+            threads.append(threading.current_thread())
+            return method(*args)
+        monkeypatch.setattr(cache, name, record)
+
+    async def lookup():
+        await pictures.get_wikipedia_summary("Parus major")
+        # Zweiter Aufruf: Treffer im LRU, ohne Dateizugriff
+        await pictures.get_wikipedia_summary("Parus major")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(lookup())
+    assert len(threads) == 2
+    assert loop_thread not in threads
+    assert len(calls) == 2
@@ -0,0 +1,45 @@
+"""Tests für ResponseCache: Auslagern auf die Festplatte ausserhalb des Event-Loops."""
+import asyncio
+import threading
+
+from app.cache import ResponseCache
+
+
+def test_spilled_entries_are_read_and_written_off_the_event_loop(tmp_path, monkeypatch):
+    cache = ResponseCache(max_bytes=10, spill_dir=str(tmp_path))
+    cache.reset(3)
+    threads = []
+    spill, load = cache._spill, cache._load
+
+    def record_spill(*args):
+        threads.append(("spill", threading.current_thread()))
+        spill(*args)
+
+    def record_load(*args):
+        threads.append(("load", threading.current_thread()))
+        return load(*args)
+
+    monkeypatch.setattr(cache, "_spill", record_spill)
+    monkeypatch.setattr(cache, "_load", record_load)
+
+    async def run():
+        cache.set("a", b"12345678")
+        cache.set("b", b"abcdefgh")  # verdrängt "a"
+        cache.spill_executor.submit(lambda: None).result()
+        assert (tmp_path / "gen-3" / "a.bin").read_bytes() == b"12345678"
+        # "a" zurück in den Speicher verdrängt "b"
+        result = await cache.aget("a"), await cache.aget("missing")
+        cache.spill_executor.submit(lambda: None).result()
+        return result
+
+    assert asyncio.run(run()) == (b"12345678", None)
+    assert sorted(name for name, _ in threads) == ["load", "load", "spill", "spill"]
+    assert threading.main_thread() not in [thread for _, thread in threads]
+
+
+def test_spill_of_old_generation_is_dropped(tmp_path):
+    cache = ResponseCache(max_bytes=10, spill_dir=str(tmp_path))
+    cache.reset(1)
+    cache._spill("a", b"old", 0)
+    assert not (tmp_path / "gen-0").exists()
+    assert asyncio.run(cache.aget("a")) is None
@@ -0,0 +1,45 @@
+"""Tests für Snapshot.grid_counts: Zählung in Prozessen wie im Server-Prozess."""
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from app import snapshot
+from app.snapshot import ALL_DAYS, COLUMNS, Snapshot
+
+
+@pytest.fixture
+def snap(tmp_path):
+    rng = np.random.default_rng(1)
+    rows = 5000
+    values = {
+        "day": np.sort(rng.integers(19000, 19100, rows)).astype(np.int32),
+        "speciesid": np.ones(rows, dtype=np.int32),
+        "lon": rng.uniform(6, 10, rows).astype(np.float32),
+        "lat": rng.uniform(46, 48, rows).astype(np.float32),
+        "elevation": rng.uniform(200, 3000, rows),
+        "landcover": rng.integers(0, 3, rows).astype(np.uint8),
+        "cell1": rng.integers(-1, 500, rows).astype(np.int32),
+        "cell5": rng.integers(-1, 50, rows).astype(np.int32),
+        "cell_lv95": rng.integers(-1, 100_000, rows).astype(np.int32),
+    }
+    for column in COLUMNS:
+        np.save(os.path.join(tmp_path, f"{column}.npy"), values[column])
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump({"generation": 0, "rows": rows, "landcover": ["a", "b", "c"]}, f)
+    return Snapshot(str(tmp_path))
+
+
+def test_process_pool_counts_match_single_process(snap, monkeypatch):
+    grids = [("cell1", None, None), ("cell5", np.array([1, 2, 3]), None), ("cell_lv95", None, 5)]
+    monkeypatch.setattr(snapshot, "SNAPSHOT_BLOCK_ROWS", 1000)
+    monkeypatch.setattr(snapshot, "_executor", None)
+    single = snap.grid_counts([1], *ALL_DAYS, grids)
+
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        monkeypatch.setattr(snapshot, "_executor", executor)
+        assert snap.grid_counts([1], *ALL_DAYS, grids) == single
+    assert sum(single[0][1]) == np.count_nonzero(np.load(os.path.join(snap.directory, "cell1.npy")) >= 0)
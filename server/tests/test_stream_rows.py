@@ -0,0 +1,71 @@
+"""Tests für stream_rows: Rückgabe der Verbindung vor dem Senden kleiner Ergebnisse."""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app import main
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params):
+        pass
+
+    async def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+class FakePool:
+    """Pool mit einer Verbindung, der festhält, ob sie gerade ausgeliehen ist."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.in_use = False
+
+    @asynccontextmanager
+    async def connection(self):
+        self.in_use = True
+        try:
+            yield self
+        finally:
+            self.in_use = False
+
+    def cursor(self, **kwargs):
+        return FakeCursor(list(self.rows))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool([{"n": n} for n in range(10)])
+    monkeypatch.setattr(main, "db_pool", pool)
+    monkeypatch.setattr(main, "stream_slots", asyncio.Semaphore(1))
+    return pool
+
+
+def collect(pool):
+    async def run():
+        blocks = []
+        async for rows in main.stream_rows("SELECT", batch_size=3):
+            blocks.append((len(rows), pool.in_use))
+        return blocks
+    return asyncio.run(run())
+
+
+def test_small_result_is_sent_after_release(pool, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_BUFFER_ROWS", 100)
+    assert collect(pool) == [(3, False), (3, False), (3, False), (1, False)]
+
+
+def test_large_result_is_streamed_with_open_connection(pool, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_BUFFER_ROWS", 4)
+    assert collect(pool) == [(3, True), (3, True), (3, True), (1, True)]